@@ -9,6 +9,9 @@ db = SQLAlchemy()
 login_manager = LoginManager()
 migrate = Migrate()
 
+CORS_ORIGINS = ["http://localhost:3000", "http://127.0.0.1:3000"]
+CORS_METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"]
+
 def create_app():
     app = Flask(__name__)
     
@@ -28,23 +31,94 @@ def create_app():
     
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     
+    # Connection pool sizing and SQLite pragmas (DB_ENGINE_PROFILE=default disables)
+    from engine_profile import engine_options, install_sqlite_pragmas
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+    
+    # Apply pending migrations at startup (defaults to on for local SQLite only)
+    auto_migrate = os.environ.get('AUTO_MIGRATE')
+    if auto_migrate is None:
+        app.config['AUTO_MIGRATE'] = app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite')
+    else:
+        app.config['AUTO_MIGRATE'] = auto_migrate.lower() in ('1', 'true', 'yes')
+    
+    # Violation write-behind buffer (0 disables buffering)
+    app.config['VIOLATION_FLUSH_INTERVAL'] = float(os.environ.get('VIOLATION_FLUSH_INTERVAL', 1.0))
+    app.config['VIOLATION_BUFFER_LIMIT'] = int(os.environ.get('VIOLATION_BUFFER_LIMIT', 100000))
+    app.config['VIOLATION_FLUSH_RETRIES'] = int(os.environ.get('VIOLATION_FLUSH_RETRIES', 5))
+    
+    # Cached user principals for the login loader (TTL 0 disables caching)
+    app.config['PRINCIPAL_CACHE_TTL'] = float(os.environ.get('PRINCIPAL_CACHE_TTL', 60))
+    app.config['PRINCIPAL_CACHE_SIZE'] = int(os.environ.get('PRINCIPAL_CACHE_SIZE', 10000))
+    
+    # Login-storm mode: password checks in a bounded process pool (0 workers checks inline)
+    app.config['LOGIN_POOL_WORKERS'] = int(os.environ.get('LOGIN_POOL_WORKERS', 0))
+    app.config['LOGIN_QUEUE_LIMIT'] = int(os.environ.get('LOGIN_QUEUE_LIMIT', 0))
+    app.config['LOGIN_RETRY_AFTER'] = int(os.environ.get('LOGIN_RETRY_AFTER', 2))
+    app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt')
+    
+    # Roster imports: processes hashing initial passwords (0 uses every CPU)
+    app.config['BULK_HASH_WORKERS'] = int(os.environ.get('BULK_HASH_WORKERS', 0))
+    
+    # Exam-start admission: token bucket per worker (rate 0 disables)
+    app.config['START_ADMISSION_RATE'] = float(os.environ.get('START_ADMISSION_RATE', 0))
+    app.config['START_ADMISSION_BURST'] = int(os.environ.get('START_ADMISSION_BURST', 0))
+    
+    # Server-side exam timer: sweep interval (0 disables), chunk size and late-submit grace in seconds
+    app.config['EXAM_SWEEP_INTERVAL'] = float(os.environ.get('EXAM_SWEEP_INTERVAL', 30))
+    app.config['EXAM_SWEEP_BATCH'] = int(os.environ.get('EXAM_SWEEP_BATCH', 500))
+    app.config['EXAM_SUBMIT_GRACE'] = int(os.environ.get('EXAM_SUBMIT_GRACE', 30))
+    
+    # Submission queue: grading poll interval in seconds (0 grades inside submit_exam) and batch size
+    app.config['SUBMIT_QUEUE_INTERVAL'] = float(os.environ.get('SUBMIT_QUEUE_INTERVAL', 1))
+    app.config['SUBMIT_QUEUE_BATCH'] = int(os.environ.get('SUBMIT_QUEUE_BATCH', 500))
+    
+    # Request metrics: share of requests profiled (0 installs no hooks), N+1 repeat threshold, scrape token
+    app.config['METRICS_SAMPLE_RATE'] = float(os.environ.get('METRICS_SAMPLE_RATE', 1))
+    app.config['METRICS_REPEAT_THRESHOLD'] = int(os.environ.get('METRICS_REPEAT_THRESHOLD', 10))
+    app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN', '')
+    
+    # Live proctoring feed: workers on this host exchange events through sockets here ('' keeps them per worker)
+    from live_feed import default_directory
+    app.config['LIVE_FEED_DIR'] = os.environ.get('LIVE_FEED_DIR', default_directory(app.config['SQLALCHEMY_DATABASE_URI']))
+    app.config['LIVE_FEED_KEEPALIVE'] = float(os.environ.get('LIVE_FEED_KEEPALIVE', 15))
+    
     # Initialize extensions
     db.init_app(app)
+    with app.app_context():
+        install_sqlite_pragmas(db.engine)
     login_manager.init_app(app)
-    migrate.init_app(app, db)
+    from schema import MIGRATIONS_DIR
+    migrate.init_app(app, db, directory=MIGRATIONS_DIR, render_as_batch=True)
     CORS(app, 
-         resources={r"/api/*": {"origins": ["http://localhost:3000", "http://127.0.0.1:3000"]}},
+         resources={r"/api/*": {"origins": CORS_ORIGINS}},
          supports_credentials=True,
          allow_headers=["Content-Type", "Authorization"],
-         methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
+         methods=CORS_METHODS)
     
     # Import models
     from models import User, Exam, Question, ExamSession, Violation, Result
+    from violation_buffer import violation_buffer
+    violation_buffer.init_app(app)
+    from principals import principal_cache
+    principal_cache.init_app(app)
+    from password_pool import password_hasher
+    password_hasher.init_app(app)
+    from live_feed import live_feed
+    live_feed.init_app(app)
+    from exam_start import start_admission
+    start_admission.init_app(app)
+    from exam_timer import session_sweeper
+    session_sweeper.init_app(app)
+    from submission_queue import submission_queue
+    submission_queue.init_app(app)
+    from metrics import request_metrics
+    request_metrics.init_app(app)
     
     # User loader for Flask-Login
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        return principal_cache.get(int(user_id))
     
     # Register blueprints
     from routes.auth import auth_bp
@@ -59,8 +133,12 @@ def create_app():
     app.register_blueprint(violations_bp, url_prefix='/api/violations')
     app.register_blueprint(results_bp, url_prefix='/api/results')
     
-    # Create tables
-    with app.app_context():
-        db.create_all()
+    # Register CLI commands
+    from commands import register_commands
+    register_commands(app)
+    
+    # Check migration state instead of creating tables
+    from schema import check_schema
+    check_schema(app)
     
     return app
@@ -0,0 +1,250 @@
+"""Native async handlers for the chatty exam endpoints.
+
+Violation logging, answer autosave, heartbeats and the admin live feed are
+served by Starlette on an async engine; every other path falls through to
+the Flask app via WsgiToAsgi. Both share the URL space under /api and
+Flask-Login's session and remember cookies, so clients cannot tell which
+side answered.
+"""
+from contextlib import asynccontextmanager
+from functools import wraps
+from asgiref.wsgi import WsgiToAsgi
+from flask_login.utils import decode_cookie
+from itsdangerous import BadSignature
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Mount, Route
+from app import db, CORS_ORIGINS, CORS_METHODS
+from engine_profile import engine_options, install_sqlite_pragmas
+from models import User, ExamSession, Violation, AnswerPatch
+from principals import principal_cache, UserPrincipal, PRINCIPAL_COLUMNS
+from violation_buffer import violation_buffer, count_violations, violation_rows
+from autosave import normalize_patch, append_patch_statement, patch_rows, fold_answer_log, FOLD_THRESHOLD
+from exam_timer import heartbeat_statement, heartbeat_payload, session_sweeper
+from routes.violations import single_violation, violation_batch, logged_payload, publish_violations
+from live_feed import live_feed, SSE_HEADERS
+from metrics import request_metrics
+
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+}
+
+def async_database_url(url):
+    """The Flask engine's URL with the matching asyncio driver"""
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(f'No async driver configured for {backend}')
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+def create_async_database(flask_app):
+    with flask_app.app_context():
+        url = db.engine.url
+    options = engine_options(flask_app.config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() == 'sqlite' and options:
+        # aiosqlite defaults to NullPool, which takes no sizing options
+        options['poolclass'] = AsyncAdaptedQueuePool
+    engine = create_async_engine(async_database_url(url), **options)
+    install_sqlite_pragmas(engine.sync_engine)
+    request_metrics.instrument_engine(engine.sync_engine)
+    return engine, async_sessionmaker(engine, expire_on_commit=False)
+
+def session_user_id(request):
+    """User id from the Flask session cookie, or else the remember cookie"""
+    flask_app = request.app.state.flask_app
+    cookie = request.cookies.get(flask_app.config['SESSION_COOKIE_NAME'])
+    if cookie:
+        serializer = flask_app.session_interface.get_signing_serializer(flask_app)
+        try:
+            data = serializer.loads(cookie, max_age=int(flask_app.permanent_session_lifetime.total_seconds()))
+        except BadSignature:
+            data = {}
+        if data.get('_user_id'):
+            return int(data['_user_id'])
+
+    remember = request.cookies.get(flask_app.config.get('REMEMBER_COOKIE_NAME', 'remember_token'))
+    if remember:
+        user_id = decode_cookie(remember, key=flask_app.secret_key)
+        if user_id:
+            return int(user_id)
+    return None
+
+async def current_principal(request, db_session):
+    user_id = session_user_id(request)
+    if user_id is None:
+        return None
+
+    principal = principal_cache.lookup(user_id)
+    if principal is None:
+        row = (await db_session.execute(select(*PRINCIPAL_COLUMNS).where(User.id == user_id))).first()
+        if row is None:
+            return None
+        principal = principal_cache.store(UserPrincipal(*row))
+    return principal
+
+def role_endpoint(role, message):
+    """Async counterpart of student_required/admin_required with a per-request DB session"""
+    def decorator(handler):
+        name = f'async.{handler.__name__}'
+
+        async def respond(request):
+            async with request.app.state.sessionmaker() as db_session:
+                try:
+                    principal = await current_principal(request, db_session)
+                    if principal is None:
+                        return JSONResponse({'error': 'Authentication required'}, status_code=401)
+                    if principal.role != role:
+                        return JSONResponse({'error': message}, status_code=403)
+                    return await handler(request, db_session, principal)
+                except Exception as e:
+                    await db_session.rollback()
+                    return JSONResponse({'error': str(e)}, status_code=500)
+
+        @wraps(handler)
+        async def endpoint(request):
+            token = request_metrics.start() if request_metrics.enabled else None
+            response = await respond(request)
+            if token is not None:
+                request_metrics.finish(token, name, request.method, response.status_code)
+            return response
+        return endpoint
+    return decorator
+
+student_endpoint = role_endpoint('student', 'Student access required')
+admin_endpoint = role_endpoint('admin', 'Admin access required')
+
+async def _json_body(request):
+    body = await request.body()
+    return await request.json() if body else {}
+
+async def _record_violations(db_session, session_id, student, events):
+    counted = (await db_session.execute(
+        count_violations(session_id, student.id, len(events))
+    )).one_or_none()
+    if counted is None:
+        await db_session.rollback()
+        row = (await db_session.execute(
+            select(ExamSession.start_time).where(ExamSession.id == session_id)
+        )).first()
+        # A provisioned session does not exist for the student until it starts
+        if not row or row.start_time is None:
+            return JSONResponse({'error': 'Session not found'}, status_code=404)
+        return JSONResponse({'error': 'Unauthorized'}, status_code=403)
+
+    rows = violation_rows(session_id, events)
+    if violation_buffer.write_through:
+        await db_session.execute(insert(Violation), rows)
+        await db_session.commit()
+    else:
+        await db_session.commit()
+        violation_buffer.enqueue(rows)
+
+    violation_count, exam_id = counted
+    publish_violations(exam_id, session_id, student, events, violation_count)
+    return JSONResponse(logged_payload(len(events), violation_count), status_code=201)
+
+@student_endpoint
+async def log_violation(request, db_session, principal):
+    session_id, events, error = single_violation(await _json_body(request))
+    if error:
+        return JSONResponse({'error': error}, status_code=400)
+    return await _record_violations(db_session, session_id, principal, events)
+
+@student_endpoint
+async def log_violations_batch(request, db_session, principal):
+    session_id, events, error = violation_batch(await _json_body(request))
+    if error:
+        return JSONResponse({'error': error}, status_code=400)
+    return await _record_violations(db_session, session_id, principal, events)
+
+@student_endpoint
+async def autosave_answers(request, db_session, principal):
+    session_id = request.path_params['session_id']
+    data = await _json_body(request)
+
+    patch, error = normalize_patch(data.get('answers'))
+    if error:
+        return JSONResponse({'error': error}, status_code=400)
+
+    pending = (await db_session.execute(
+        append_patch_statement(session_id, principal.id, len(patch), session_sweeper.cutoff())
+    )).scalar_one_or_none()
+    if pending is None:
+        await db_session.rollback()
+        row = (await db_session.execute(
+            select(ExamSession.student_id, ExamSession.is_completed, ExamSession.start_time)
+            .where(ExamSession.id == session_id)
+        )).first()
+        if not row or row.start_time is None:
+            return JSONResponse({'error': 'Session not found'}, status_code=404)
+        if row.student_id != principal.id:
+            return JSONResponse({'error': 'Unauthorized'}, status_code=403)
+        if row.is_completed:
+            return JSONResponse({'error': 'Exam already submitted'}, status_code=400)
+        return JSONResponse({'error': 'Time for this exam is up'}, status_code=400)
+
+    await db_session.execute(insert(AnswerPatch), patch_rows(session_id, patch))
+
+    # Periodically fold the log back into the session
+    if pending >= FOLD_THRESHOLD:
+        await db_session.run_sync(
+            lambda sync_session: fold_answer_log(sync_session.get(ExamSession, session_id), sync_session)
+        )
+
+    await db_session.commit()
+    return JSONResponse({'message': 'Answers saved', 'saved': len(patch)})
+
+@student_endpoint
+async def heartbeat(request, db_session, principal):
+    row = (await db_session.execute(heartbeat_statement(request.path_params['session_id']))).first()
+    if not row:
+        return JSONResponse({'error': 'Session not found'}, status_code=404)
+    if row.student_id != principal.id:
+        return JSONResponse({'error': 'Unauthorized'}, status_code=403)
+    return JSONResponse(heartbeat_payload(row))
+
+@admin_endpoint
+async def exam_live_feed(request, db_session, principal):
+    # The DB session closes when this returns, before the stream starts
+    return StreamingResponse(
+        live_feed.stream_async(request.path_params['exam_id']),
+        media_type='text/event-stream',
+        headers=SSE_HEADERS
+    )
+
+def create_async_app(flask_app):
+    """Starlette app serving the async endpoints in front of the Flask app"""
+    engine, sessionmaker = create_async_database(flask_app)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        await engine.dispose()
+
+    # Flask-CORS only sees requests that reach Flask; preflights still do
+    cors = [Middleware(
+        CORSMiddleware,
+        allow_origins=CORS_ORIGINS,
+        allow_methods=CORS_METHODS,
+        allow_headers=['Content-Type', 'Authorization'],
+        allow_credentials=True
+    )]
+    routes = [
+        Route('/api/violations', log_violation, methods=['POST'], middleware=cors),
+        Route('/api/violations/batch', log_violations_batch, methods=['POST'], middleware=cors),
+        Route('/api/student/sessions/{session_id:int}/answers', autosave_answers, methods=['PATCH'], middleware=cors),
+        Route('/api/student/sessions/{session_id:int}/heartbeat', heartbeat, methods=['POST'], middleware=cors),
+        Route('/api/admin/exams/{exam_id:int}/live', exam_live_feed, methods=['GET'], middleware=cors),
+        Mount('', app=WsgiToAsgi(flask_app)),
+    ]
+
+    app = Starlette(routes=routes, lifespan=lifespan)
+    app.state.flask_app = flask_app
+    app.state.engine = engine
+    app.state.sessionmaker = sessionmaker
+    return app
@@ -0,0 +1,115 @@
+import json
+from datetime import datetime
+from sqlalchemy import delete, func, insert, or_, select, update
+from app import db
+from models import AnswerPatch, ExamSession
+
+# Fold the log into ExamSession.answers once this many patches are pending
+FOLD_THRESHOLD = 50
+VALID_ANSWERS = ('A', 'B', 'C', 'D')
+
+def normalize_patch(patch):
+    """Validate a {question_id: option} patch; returns (answers, error)"""
+    if not isinstance(patch, dict) or not patch:
+        return None, 'answers must be a non-empty object'
+
+    normalized = {}
+    for question_id, answer in patch.items():
+        if not str(question_id).isdigit():
+            return None, f'Invalid question id: {question_id}'
+        if answer in (None, ''):
+            normalized[int(question_id)] = None
+        elif isinstance(answer, str) and answer.upper() in VALID_ANSWERS:
+            normalized[int(question_id)] = answer.upper()
+        else:
+            return None, f'Answer for question {question_id} must be A, B, C, D or null'
+    return normalized, None
+
+def append_patch_statement(session_id, student_id, count, cutoff):
+    """UPDATE counting count new patches against an open session of the student.
+
+    Sessions whose deadline is before cutoff no longer take answers, and
+    provisioned sessions take none until they are started.
+    """
+    return (
+        update(ExamSession)
+        .where(
+            ExamSession.id == session_id,
+            ExamSession.student_id == student_id,
+            ExamSession.is_completed == False,
+            ExamSession.start_time.isnot(None),
+            or_(ExamSession.deadline.is_(None), ExamSession.deadline >= cutoff)
+        )
+        .values(pending_answer_patches=func.coalesce(ExamSession.pending_answer_patches, 0) + count)
+        .returning(ExamSession.pending_answer_patches)
+    )
+
+def patch_rows(session_id, patch):
+    now = datetime.utcnow()
+    return [{
+        'session_id': session_id,
+        'question_id': question_id,
+        'answer': answer,
+        'created_at': now
+    } for question_id, answer in patch.items()]
+
+def append_patch(session_id, student_id, patch, cutoff):
+    """Append changed answers to the session log.
+
+    Returns the number of pending patches after the append, or None if the
+    session is not an open, in-time session of the student.
+    """
+    pending = db.session.execute(
+        append_patch_statement(session_id, student_id, len(patch), cutoff)
+    ).scalar_one_or_none()
+    if pending is None:
+        return None
+
+    db.session.execute(insert(AnswerPatch), patch_rows(session_id, patch))
+    return pending
+
+def _apply(answers, patches):
+    for question_id, answer in patches:
+        if answer is None:
+            answers.pop(str(question_id), None)
+        else:
+            answers[str(question_id)] = answer
+    return answers
+
+def _load_patches(session_id, db_session=None):
+    return (db_session or db.session).query(AnswerPatch.id, AnswerPatch.question_id, AnswerPatch.answer).filter(
+        AnswerPatch.session_id == session_id
+    ).order_by(AnswerPatch.id).all()
+
+def merged_answers(session):
+    """Saved answers with any unfolded patches applied, without writing"""
+    patches = _load_patches(session.id)
+    return _apply(session.get_answers(), [(p.question_id, p.answer) for p in patches])
+
+def fold_answer_log(session, db_session=None):
+    """Fold pending patches into ExamSession.answers and trim the log.
+
+    Patches are claimed with DELETE ... RETURNING, so concurrent folds
+    each apply and count only the rows they removed. The saved answers are
+    re-read under a row lock after the claim, so a fold never writes over
+    a newer one. The caller commits. Returns the merged answers.
+    db_session defaults to the Flask-SQLAlchemy session.
+    """
+    db_session = db_session or db.session
+    claimed = db_session.execute(
+        delete(AnswerPatch)
+        .where(AnswerPatch.session_id == session.id)
+        .returning(AnswerPatch.id, AnswerPatch.question_id, AnswerPatch.answer)
+        .execution_options(synchronize_session=False)
+    ).all()
+    saved = db_session.execute(
+        select(ExamSession.answers).where(ExamSession.id == session.id).with_for_update()
+    ).scalar_one()
+    answers = _apply(json.loads(saved) if saved else {},
+                     [(p.question_id, p.answer) for p in sorted(claimed, key=lambda p: p.id)])
+    if not claimed:
+        return answers
+
+    session.set_answers(answers)
+    session.pending_answer_patches = ExamSession.pending_answer_patches - len(claimed)
+    return answers
@@ -0,0 +1,183 @@
+"""Chatty-endpoint throughput under uvicorn, WsgiToAsgi versus native async.
+
+Serves the app with uvicorn in a child process, first as the plain Flask app
+behind WsgiToAsgi and then through async_api, and drives the exam hot path
+(one violation, one answer autosave, one heartbeat per loop) from an
+increasing number of concurrent client connections, each signed in as its
+own student. Prints a JSON report per concurrency level.
+
+    python benchmarks/async_endpoints.py --connections 16 64 256 --seconds 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PASSWORD = 'bench-password'
+
+def seed(db, students):
+    from sqlalchemy import insert
+    from werkzeug.security import generate_password_hash
+    from models import User, Exam, ExamSession
+
+    # Cheap hashes: the benchmark measures the exam endpoints, not login
+    password_hash = generate_password_hash(PASSWORD, 'pbkdf2:sha256:1000')
+    now = datetime.utcnow()
+    db.session.execute(insert(User), [{
+        'id': i, 'username': f'user{i}', 'email': f'user{i}@example.com',
+        'password_hash': password_hash, 'role': 'admin' if i == 1 else 'student', 'created_at': now
+    } for i in range(1, students + 2)])
+    db.session.execute(insert(Exam), [{
+        'id': 1, 'title': 'Exam', 'duration': 600, 'total_marks': 10,
+        'passing_marks': 5, 'created_by': 1, 'created_at': now
+    }])
+    db.session.execute(insert(ExamSession), [{
+        'id': i, 'student_id': i + 1, 'exam_id': 1, 'start_time': now,
+        'is_completed': False, 'violation_count': 0
+    } for i in range(1, students + 1)])
+    db.session.commit()
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * fraction))] * 1000, 1)
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+SERVER = """
+import sys, uvicorn
+from asgiref.wsgi import WsgiToAsgi
+from app import create_app
+from async_api import create_async_app
+flask_app = create_app()
+app = create_async_app(flask_app) if sys.argv[1] == 'async' else WsgiToAsgi(flask_app)
+uvicorn.run(app, host='127.0.0.1', port=int(sys.argv[2]), log_level='warning')
+"""
+
+def serve(name):
+    """Start uvicorn in its own process so clients do not share its GIL"""
+    import httpx
+
+    port = free_port()
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    server = subprocess.Popen([sys.executable, '-c', SERVER, name, str(port)], cwd=backend_dir)
+    base_url = f'http://127.0.0.1:{port}'
+    while True:
+        try:
+            httpx.get(base_url + '/api/auth/me')
+            return server, base_url
+        except httpx.TransportError:
+            if server.poll() is not None:
+                raise RuntimeError(f'{name} server exited with {server.returncode}')
+            time.sleep(0.1)
+
+async def drive(base_url, connections, seconds):
+    import httpx
+
+    latency = []
+    errors = 0
+
+    async def client(session_id):
+        nonlocal errors
+        async with httpx.AsyncClient(base_url=base_url, timeout=60) as http:
+            await http.post('/api/auth/login', json={
+                'email': f'user{session_id + 1}@example.com', 'password': PASSWORD
+            })
+            signed_in.append(session_id)
+            if len(signed_in) == connections:
+                started.set()
+            await started.wait()
+            question = 0
+            while not stop.is_set():
+                question = question % 40 + 1
+                for method, path, body in (
+                    ('POST', '/api/violations', {'session_id': session_id, 'violation_type': 'tab_switch'}),
+                    ('PATCH', f'/api/student/sessions/{session_id}/answers', {'answers': {str(question): 'A'}}),
+                    ('POST', f'/api/student/sessions/{session_id}/heartbeat', None),
+                ):
+                    start = time.perf_counter()
+                    try:
+                        response = await http.request(method, path, json=body)
+                    except httpx.TransportError:
+                        errors += 1
+                        continue
+                    if response.status_code >= 300:
+                        errors += 1
+                    else:
+                        latency.append(time.perf_counter() - start)
+
+    signed_in = []
+    started = asyncio.Event()
+    stop = asyncio.Event()
+    tasks = [asyncio.create_task(client(i + 1)) for i in range(connections)]
+    # Every connection signs in before the clock starts
+    await started.wait()
+    begin = time.perf_counter()
+    await asyncio.sleep(seconds)
+    stop.set()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - begin
+
+    return {
+        'requests_per_sec': round(len(latency) / elapsed, 1),
+        'errors': errors,
+        'p50_ms': percentile(latency, 0.5),
+        'p99_ms': percentile(latency, 0.99),
+    }
+
+def run_mode(name, connections, args, workdir):
+    os.environ['DATABASE_URL'] = f'sqlite:///{os.path.join(workdir, f"{name}-{connections}.db")}'
+
+    from app import create_app, db
+
+    flask_app = create_app()
+    with flask_app.app_context():
+        seed(db, connections)
+        db.engine.dispose()
+
+    server, base_url = serve(name)
+    try:
+        return asyncio.run(drive(base_url, connections, args.seconds))
+    finally:
+        server.terminate()
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--connections', type=int, nargs='+', default=[16, 64, 256])
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ['AUTO_MIGRATE'] = '1'
+    report = []
+    try:
+        for connections in args.connections:
+            wsgi = run_mode('wsgi', connections, args, workdir)
+            native = run_mode('async', connections, args, workdir)
+            report.append({
+                'connections': connections,
+                'wsgi_to_asgi': wsgi,
+                'native_async': native,
+                'throughput_ratio': round(native['requests_per_sec'] / wsgi['requests_per_sec'], 1) if wsgi['requests_per_sec'] else None
+            })
+    finally:
+        shutil.rmtree(workdir)
+
+    print(json.dumps({'seconds': args.seconds, 'levels': report}, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""Concurrent writer throughput with and without the SQLite engine profile.
+
+Runs the violation hot path (counter bump plus detail insert, one commit
+each) from several writer threads while reader threads poll the session,
+first against SQLAlchemy's defaults (DB_ENGINE_PROFILE=default) and then
+against the tuned profile (WAL, synchronous=NORMAL, busy_timeout, mmap).
+Each run gets a fresh database file; a JSON report is printed.
+
+    python benchmarks/concurrent_writers.py --writers 8 --readers 4 --seconds 5
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def seed(db, sessions):
+    from sqlalchemy import insert
+    from models import User, Exam, ExamSession
+
+    now = datetime.utcnow()
+    db.session.execute(insert(User), [{
+        'id': i, 'username': f'user{i}', 'email': f'user{i}@example.com',
+        'password_hash': 'x', 'role': 'admin' if i == 1 else 'student', 'created_at': now
+    } for i in range(1, sessions + 2)])
+    db.session.execute(insert(Exam), [{
+        'id': 1, 'title': 'Exam', 'duration': 60, 'total_marks': 10,
+        'passing_marks': 5, 'created_by': 1, 'created_at': now
+    }])
+    db.session.execute(insert(ExamSession), [{
+        'id': i, 'student_id': i + 1, 'exam_id': 1, 'start_time': now,
+        'is_completed': False, 'violation_count': 0
+    } for i in range(1, sessions + 1)])
+    db.session.commit()
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * fraction))] * 1000, 3)
+
+def run_profile(profile, args, workdir):
+    from sqlalchemy import update, select
+    from sqlalchemy.exc import OperationalError
+
+    os.environ['DB_ENGINE_PROFILE'] = profile
+    os.environ['DATABASE_URL'] = f'sqlite:///{os.path.join(workdir, profile + ".db")}'
+
+    from app import create_app, db
+    from models import ExamSession, Violation
+
+    app = create_app()
+    with app.app_context():
+        seed(db, args.writers)
+        journal_mode = db.session.execute(db.text('PRAGMA journal_mode')).scalar()
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    stats = {'writes': 0, 'reads': 0, 'errors': 0, 'write_latency': [], 'read_latency': []}
+
+    def writer(session_id):
+        with app.app_context():
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    db.session.execute(
+                        update(ExamSession).where(ExamSession.id == session_id)
+                        .values(violation_count=ExamSession.violation_count + 1)
+                    )
+                    db.session.add(Violation(session_id=session_id, violation_type='no_face',
+                                             timestamp=datetime.utcnow()))
+                    db.session.commit()
+                except OperationalError:
+                    db.session.rollback()
+                    with lock:
+                        stats['errors'] += 1
+                    continue
+                elapsed = time.perf_counter() - start
+                with lock:
+                    stats['writes'] += 1
+                    stats['write_latency'].append(elapsed)
+
+    def reader(session_id):
+        with app.app_context():
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    db.session.execute(
+                        select(ExamSession.violation_count).where(ExamSession.id == session_id)
+                    ).scalar()
+                    db.session.commit()
+                except OperationalError:
+                    db.session.rollback()
+                    with lock:
+                        stats['errors'] += 1
+                    continue
+                elapsed = time.perf_counter() - start
+                with lock:
+                    stats['reads'] += 1
+                    stats['read_latency'].append(elapsed)
+
+    threads = [threading.Thread(target=writer, args=(i + 1,)) for i in range(args.writers)]
+    threads += [threading.Thread(target=reader, args=(i % args.writers + 1,)) for i in range(args.readers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        db.engine.dispose()
+
+    return {
+        'journal_mode': journal_mode,
+        'writes_per_sec': round(stats['writes'] / elapsed, 1),
+        'reads_per_sec': round(stats['reads'] / elapsed, 1),
+        'lock_errors': stats['errors'],
+        'write_p50_ms': percentile(stats['write_latency'], 0.5),
+        'write_p99_ms': percentile(stats['write_latency'], 0.99),
+        'read_p50_ms': percentile(stats['read_latency'], 0.5),
+        'read_p99_ms': percentile(stats['read_latency'], 0.99),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ['AUTO_MIGRATE'] = '1'
+    try:
+        default = run_profile('default', args, workdir)
+        tuned = run_profile('tuned', args, workdir)
+    finally:
+        shutil.rmtree(workdir)
+
+    print(json.dumps({
+        'writers': args.writers,
+        'readers': args.readers,
+        'seconds': args.seconds,
+        'default': default,
+        'tuned': tuned,
+        'write_speedup': round(tuned['writes_per_sec'] / default['writes_per_sec'], 1) if default['writes_per_sec'] else None
+    }, indent=2))
+
+if __name__ == '__main__':
+    main()
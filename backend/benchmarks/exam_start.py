@@ -0,0 +1,150 @@
+"""Exam-start herd: many students calling start_exam at the same instant.
+
+Releases one thread per student against POST /api/student/exams/<id>/start
+at once, first with nothing prepared, then with the sessions provisioned
+beforehand, then provisioned and behind the admission gate with clients
+honouring the retry hint. Each run gets a fresh database file; a JSON
+report is printed.
+
+    python benchmarks/exam_start.py --students 2000 --rate 400 --burst 50
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def seed(db, students, questions):
+    from sqlalchemy import insert
+    from models import User, Exam, Question
+
+    now = datetime.utcnow()
+    db.session.execute(insert(User), [{
+        'id': i, 'username': f'user{i}', 'email': f'user{i}@example.com',
+        'password_hash': 'x', 'role': 'admin' if i == 1 else 'student', 'created_at': now
+    } for i in range(1, students + 2)])
+    db.session.execute(insert(Exam), [{
+        'id': 1, 'title': 'Exam', 'duration': 60, 'total_marks': questions,
+        'passing_marks': questions // 2, 'created_by': 1, 'created_at': now,
+        'randomize_questions': True, 'question_count': questions
+    }])
+    db.session.execute(insert(Question), [{
+        'exam_id': 1, 'question_text': f'Question {i}', 'option_a': 'A', 'option_b': 'B',
+        'option_c': 'C', 'option_d': 'D', 'correct_answer': 'A', 'marks': 1, 'created_at': now
+    } for i in range(questions)])
+    db.session.commit()
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * fraction))] * 1000, 1)
+
+def run_mode(name, provision, rate, args, workdir):
+    from sqlalchemy import event
+
+    os.environ['DATABASE_URL'] = f'sqlite:///{os.path.join(workdir, name + ".db")}'
+    os.environ['START_ADMISSION_RATE'] = str(rate)
+    os.environ['START_ADMISSION_BURST'] = str(args.burst)
+
+    from app import create_app, db
+    from exam_start import provision_sessions
+
+    app = create_app()
+    with app.app_context():
+        seed(db, args.students, args.questions)
+        if provision:
+            provision_sessions(1)
+            db.session.commit()
+        engine = db.engine
+
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda *a: statements.append(1))
+
+    lock = threading.Lock()
+    stats = {'started': 0, 'busy_503': 0, 'errors': 0, 'latency': [], 'admitted_at': []}
+    ready = threading.Barrier(args.students + 1)
+    go = threading.Event()
+
+    def student(user_id):
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+        ready.wait()
+        go.wait()
+        while True:
+            start = time.perf_counter()
+            response = client.post('/api/student/exams/1/start')
+            elapsed = time.perf_counter() - start
+            if response.status_code == 503:
+                with lock:
+                    stats['busy_503'] += 1
+                time.sleep(response.get_json()['retry_after'])
+                continue
+            with lock:
+                if response.status_code in (200, 201):
+                    stats['started'] += 1
+                    stats['latency'].append(elapsed)
+                    stats['admitted_at'].append(time.perf_counter())
+                else:
+                    stats['errors'] += 1
+            return
+
+    threads = [threading.Thread(target=student, args=(i + 2,)) for i in range(args.students)]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    del statements[:]
+    started = time.perf_counter()
+    go.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        db.engine.dispose()
+
+    return {
+        'provisioned': provision,
+        'admission_rate': rate,
+        'started': stats['started'],
+        'errors': stats['errors'],
+        'busy_503': stats['busy_503'],
+        'all_started_s': round(max(stats['admitted_at'], default=started) - started, 2),
+        'wall_s': round(elapsed, 2),
+        'start_p50_ms': percentile(stats['latency'], 0.5),
+        'start_p99_ms': percentile(stats['latency'], 0.99),
+        'statements_per_start': round(len(statements) / max(1, stats['started']), 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=2000)
+    parser.add_argument('--questions', type=int, default=50)
+    parser.add_argument('--rate', type=float, default=400, help='admitted starts per second in the gated run')
+    parser.add_argument('--burst', type=int, default=50)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ['AUTO_MIGRATE'] = '1'
+    try:
+        report = {
+            'students': args.students,
+            'on_demand': run_mode('on_demand', False, 0, args, workdir),
+            'provisioned': run_mode('provisioned', True, 0, args, workdir),
+            'provisioned_gated': run_mode('provisioned_gated', True, args.rate, args, workdir),
+        }
+    finally:
+        shutil.rmtree(workdir)
+
+    print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
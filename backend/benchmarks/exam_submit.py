@@ -0,0 +1,140 @@
+"""Exam-end herd: every student's client auto-submitting at the same instant.
+
+Starts one session per student, then releases one thread per student
+against POST /api/student/sessions/<id>/submit at once, first grading
+inside the request, then through the submission queue. Reports submit
+latency and how long until every result was stored. Each run gets a
+fresh database file; a JSON report is printed.
+
+    python benchmarks/exam_submit.py --students 2000 --questions 50
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def seed(db, students, questions):
+    from sqlalchemy import insert
+    from models import User, Exam, Question
+
+    now = datetime.utcnow()
+    db.session.execute(insert(User), [{
+        'id': i, 'username': f'user{i}', 'email': f'user{i}@example.com',
+        'password_hash': 'x', 'role': 'admin' if i == 1 else 'student', 'created_at': now
+    } for i in range(1, students + 2)])
+    db.session.execute(insert(Exam), [{
+        'id': 1, 'title': 'Exam', 'duration': 60, 'total_marks': questions,
+        'passing_marks': questions // 2, 'created_by': 1, 'created_at': now,
+        'negative_marking': True, 'negative_marks_value': 0.25, 'question_count': questions
+    }])
+    db.session.execute(insert(Question), [{
+        'exam_id': 1, 'question_text': f'Question {i}', 'option_a': 'A', 'option_b': 'B',
+        'option_c': 'C', 'option_d': 'D', 'correct_answer': 'ABCD'[i % 4], 'marks': 1, 'created_at': now
+    } for i in range(questions)])
+    db.session.commit()
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * fraction))] * 1000, 1)
+
+def run_mode(name, interval, args, workdir):
+    os.environ['DATABASE_URL'] = f'sqlite:///{os.path.join(workdir, name + ".db")}'
+    os.environ['SUBMIT_QUEUE_INTERVAL'] = str(interval)
+    os.environ['SUBMIT_QUEUE_BATCH'] = str(args.batch)
+
+    from app import create_app, db
+    from models import Result
+    from exam_start import provision_sessions
+
+    app = create_app()
+    with app.app_context():
+        seed(db, args.students, args.questions)
+        provision_sessions(1)
+        db.session.commit()
+
+    rng = random.Random(0)
+    lock = threading.Lock()
+    stats = {'accepted': 0, 'errors': 0, 'latency': []}
+    ready = threading.Barrier(args.students + 1)
+    go = threading.Event()
+
+    def student(user_id):
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+        session_id = client.post('/api/student/exams/1/start').get_json()['session']['id']
+        with lock:
+            answers = {str(q): rng.choice('ABCD') for q in range(1, args.questions + 1)}
+        ready.wait()
+        go.wait()
+        start = time.perf_counter()
+        response = client.post(f'/api/student/sessions/{session_id}/submit', json={'answers': answers})
+        elapsed = time.perf_counter() - start
+        with lock:
+            if response.status_code in (200, 202):
+                stats['accepted'] += 1
+                stats['latency'].append(elapsed)
+            else:
+                stats['errors'] += 1
+
+    threads = [threading.Thread(target=student, args=(i + 2,)) for i in range(args.students)]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    started = time.perf_counter()
+    go.set()
+    for thread in threads:
+        thread.join()
+    acknowledged = time.perf_counter() - started
+
+    with app.app_context():
+        while Result.query.count() < stats['accepted']:
+            time.sleep(0.05)
+        graded = time.perf_counter() - started
+        db.engine.dispose()
+
+    return {
+        'submit_queue_interval': interval,
+        'accepted': stats['accepted'],
+        'errors': stats['errors'],
+        'all_acknowledged_s': round(acknowledged, 2),
+        'all_graded_s': round(graded, 2),
+        'submit_p50_ms': percentile(stats['latency'], 0.5),
+        'submit_p99_ms': percentile(stats['latency'], 0.99),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=2000)
+    parser.add_argument('--questions', type=int, default=50)
+    parser.add_argument('--interval', type=float, default=1, help='queue poll interval in the queued run')
+    parser.add_argument('--batch', type=int, default=500)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ['AUTO_MIGRATE'] = '1'
+    os.environ['EXAM_SWEEP_INTERVAL'] = '0'
+    try:
+        report = {
+            'students': args.students,
+            'synchronous': run_mode('synchronous', 0, args, workdir),
+            'queued': run_mode('queued', args.interval, args, workdir),
+        }
+    finally:
+        shutil.rmtree(workdir)
+
+    print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""Listing serialization: ORM hydration and to_dict versus column projections.
+
+Seeds a temporary SQLite database, then builds the exam, result and
+violation listings both ways inside a request context: hydrating model
+instances, calling to_dict() and jsonify, against selecting the columns as
+rows and encoding them with serialization.dumps (orjson when installed).
+Both produce the same JSON. Milliseconds per listing are printed as JSON.
+
+    python benchmarks/json_listing.py --exams 500 --results 20000 --repeat 20
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def seed(db, args):
+    from sqlalchemy import insert
+    from models import User, Exam, ExamSession, Result, Violation
+
+    rng = random.Random(args.seed)
+    now = datetime.utcnow()
+    students = max(1, args.results // 10)
+    db.session.execute(insert(User), [{
+        'id': i, 'username': f'user{i}', 'email': f'user{i}@example.com',
+        'password_hash': 'x', 'role': 'admin' if i == 1 else 'student', 'created_at': now
+    } for i in range(1, students + 2)])
+    db.session.execute(insert(Exam), [{
+        'id': i, 'title': f'Exam {i}', 'description': 'Generated', 'duration': 60, 'total_marks': 50,
+        'passing_marks': 25, 'created_by': 1, 'created_at': now, 'question_count': 50
+    } for i in range(1, args.exams + 1)])
+    db.session.execute(insert(ExamSession), [{
+        'id': i, 'student_id': 2 + i % students, 'exam_id': 1 + i % args.exams,
+        'start_time': now, 'is_completed': True, 'violation_count': 0
+    } for i in range(1, args.results + 1)])
+    percentages = [rng.uniform(0, 100) for _ in range(args.results)]
+    db.session.execute(insert(Result), [{
+        'student_id': 2 + i % students, 'exam_id': 1 + i % args.exams, 'session_id': i,
+        'marks_obtained': percentages[i - 1] / 2, 'total_marks': 50, 'percentage': percentages[i - 1],
+        'passed': percentages[i - 1] >= 50, 'correct_answers': 20, 'wrong_answers': 5, 'unanswered': 25,
+        'created_at': now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+    } for i in range(1, args.results + 1)])
+    db.session.execute(insert(Violation), [{
+        'session_id': 1, 'violation_type': rng.choice(['no_face', 'tab_switch']),
+        'timestamp': now + timedelta(seconds=i), 'details': f'event {i}'
+    } for i in range(args.violations)])
+    db.session.commit()
+
+def listings(db, limit):
+    """(name, ORM builder, projection builder) per listing; each returns JSON bytes"""
+    from flask import jsonify
+    from sqlalchemy import select
+    from models import Exam, Result, User, Violation
+    from serialization import EXAM_COLUMNS, RESULT_COLUMNS, VIOLATION_COLUMNS, records, json_response
+
+    def orm_exams():
+        return jsonify({'exams': [exam.to_dict() for exam in Exam.query.all()]}).get_data()
+
+    def projected_exams():
+        return json_response({'exams': records(db.session.execute(select(*EXAM_COLUMNS)).all())}).get_data()
+
+    def orm_results():
+        rows = db.session.query(Result, Exam.title, User.username).join(
+            Exam, Result.exam_id == Exam.id
+        ).join(User, Result.student_id == User.id).order_by(Result.created_at.desc()).limit(limit).all()
+        results = []
+        for result, exam_title, student_name in rows:
+            result_dict = result.to_dict()
+            result_dict['exam_title'] = exam_title
+            result_dict['student_name'] = student_name
+            results.append(result_dict)
+        return jsonify({'results': results}).get_data()
+
+    def projected_results():
+        rows = db.session.execute(
+            select(*RESULT_COLUMNS, Exam.title.label('exam_title'), User.username.label('student_name'))
+            .join(Exam, Result.exam_id == Exam.id)
+            .join(User, Result.student_id == User.id)
+            .order_by(Result.created_at.desc()).limit(limit)
+        ).all()
+        return json_response({'results': records(rows)}).get_data()
+
+    def orm_violations():
+        violations = Violation.query.filter_by(session_id=1).all()
+        return jsonify({'violations': [v.to_dict() for v in violations]}).get_data()
+
+    def projected_violations():
+        rows = db.session.execute(select(*VIOLATION_COLUMNS).where(Violation.session_id == 1)).all()
+        return json_response({'violations': records(rows)}).get_data()
+
+    return [
+        ('exams', orm_exams, projected_exams),
+        (f'results_{limit}', orm_results, projected_results),
+        ('violations', orm_violations, projected_violations),
+    ]
+
+def timed(db, build, repeat):
+    samples = []
+    for _ in range(repeat):
+        # A fresh session each time, as each request gets
+        db.session.remove()
+        start = time.perf_counter()
+        build()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return round(samples[len(samples) // 2] * 1000, 2)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--exams', type=int, default=500)
+    parser.add_argument('--results', type=int, default=20000)
+    parser.add_argument('--violations', type=int, default=2000, help='violations in the listed session')
+    parser.add_argument('--limit', type=int, default=2000, help='rows in the results listing')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f'sqlite:///{os.path.join(workdir, "listing.db")}'
+    os.environ['AUTO_MIGRATE'] = '1'
+    os.environ['METRICS_SAMPLE_RATE'] = '0'
+    try:
+        from app import create_app, db
+        import serialization
+
+        app = create_app()
+        report = {'encoder': 'orjson' if serialization.orjson is not None else 'json'}
+        with app.app_context():
+            seed(db, args)
+            with app.test_request_context():
+                for name, orm, projected in listings(db, args.limit):
+                    if json.loads(orm()) != json.loads(projected()):
+                        raise RuntimeError(f'{name}: the two paths disagree')
+                    orm_ms = timed(db, orm, args.repeat)
+                    projected_ms = timed(db, projected, args.repeat)
+                    report[name] = {
+                        'orm_to_dict_ms': orm_ms,
+                        'projection_ms': projected_ms,
+                        'speedup': round(orm_ms / projected_ms, 1),
+                    }
+            db.session.remove()
+    finally:
+        shutil.rmtree(workdir)
+
+    print(json.dumps(report, indent=2))
+
+if __name__ == '__main__':
+    main()
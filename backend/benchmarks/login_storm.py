@@ -0,0 +1,152 @@
+"""Login throughput and unrelated-endpoint latency during a login storm.
+
+Floods POST /api/auth/login from many threads while probe threads poll
+GET /api/student/exams as an already signed-in student, first with
+password checks inline on the request thread and then with login-storm
+mode (LOGIN_POOL_WORKERS > 0). Prints a JSON report.
+
+    python benchmarks/login_storm.py --storm 32 --probes 2 --seconds 10 --pool-workers 2
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PASSWORD = 'storm-password'
+
+def seed(db, students, method):
+    from sqlalchemy import insert
+    from werkzeug.security import generate_password_hash
+    from models import User
+
+    password_hash = generate_password_hash(PASSWORD, method)
+    now = datetime.utcnow()
+    db.session.execute(insert(User), [{
+        'id': i, 'username': f'student{i}', 'email': f'student{i}@example.com',
+        'password_hash': password_hash, 'role': 'student', 'created_at': now
+    } for i in range(1, students + 1)])
+    db.session.commit()
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * fraction))] * 1000, 1)
+
+def run_mode(name, pool_workers, args, workdir):
+    os.environ['DATABASE_URL'] = f'sqlite:///{os.path.join(workdir, name + ".db")}'
+    os.environ['LOGIN_POOL_WORKERS'] = str(pool_workers)
+
+    from app import create_app, db
+    from password_pool import password_hasher
+
+    app = create_app()
+    with app.app_context():
+        seed(db, args.students, app.config['PASSWORD_HASH_METHOD'])
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    logins = {'ok': 0, 'busy': 0, 'failed': 0, 'latency': []}
+    probe_latency = []
+
+    def storm(worker):
+        rng = random.Random(worker)
+        client = app.test_client()
+        while not stop.is_set():
+            student = rng.randint(2, args.students)
+            start = time.perf_counter()
+            response = client.post('/api/auth/login', json={
+                'email': f'student{student}@example.com', 'password': PASSWORD
+            })
+            elapsed = time.perf_counter() - start
+            with lock:
+                if response.status_code == 200:
+                    logins['ok'] += 1
+                    logins['latency'].append(elapsed)
+                elif response.status_code == 503:
+                    logins['busy'] += 1
+                else:
+                    logins['failed'] += 1
+            if response.status_code == 503:
+                # A real client honours Retry-After; keep the storm going but yield
+                time.sleep(0.01)
+
+    def probe():
+        client = app.test_client()
+        client.post('/api/auth/login', json={'email': 'student1@example.com', 'password': PASSWORD})
+        while not stop.is_set():
+            start = time.perf_counter()
+            client.get('/api/student/exams')
+            elapsed = time.perf_counter() - start
+            with lock:
+                probe_latency.append(elapsed)
+            time.sleep(0.005)
+
+    # Warm the probe session and any process pool before the storm starts
+    threads = [threading.Thread(target=probe) for _ in range(args.probes)]
+    for thread in threads:
+        thread.start()
+    time.sleep(1)
+    with lock:
+        probe_latency.clear()
+
+    storm_threads = [threading.Thread(target=storm, args=(i,)) for i in range(args.storm)]
+    started = time.perf_counter()
+    for thread in storm_threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads + storm_threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        db.engine.dispose()
+    password_hasher.shutdown()
+
+    return {
+        'pool_workers': pool_workers,
+        'logins_per_sec': round(logins['ok'] / elapsed, 1),
+        'busy_503': logins['busy'],
+        'failed': logins['failed'],
+        'login_p50_ms': percentile(logins['latency'], 0.5),
+        'login_p99_ms': percentile(logins['latency'], 0.99),
+        'probe_requests': len(probe_latency),
+        'probe_p50_ms': percentile(probe_latency, 0.5),
+        'probe_p99_ms': percentile(probe_latency, 0.99),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=500)
+    parser.add_argument('--storm', type=int, default=32, help='concurrent login threads')
+    parser.add_argument('--probes', type=int, default=2, help='threads polling an unrelated endpoint')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--pool-workers', type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ['AUTO_MIGRATE'] = '1'
+    try:
+        inline = run_mode('inline', 0, args, workdir)
+        pooled = run_mode('pooled', args.pool_workers, args, workdir)
+    finally:
+        shutil.rmtree(workdir)
+
+    print(json.dumps({
+        'storm_threads': args.storm,
+        'seconds': args.seconds,
+        'inline': inline,
+        'login_storm_mode': pooled
+    }, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+"""SQL statement and wall-clock budgets for every API endpoint at scale.
+
+A wrapper around tests/test_query_budget.py, which seeds a realistic data
+set and checks every endpoint against its statement and time budgets:
+the options set the scale, and the exit status is pytest's.
+
+    python benchmarks/query_budget.py --students 2000 --exams 300 --attempts 10
+"""
+import argparse
+import os
+import sys
+import pytest
+
+TESTS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=2000)
+    parser.add_argument('--exams', type=int, default=300)
+    parser.add_argument('--questions', type=int, default=20, help='questions per exam')
+    parser.add_argument('--attempts', type=int, default=10, help='results per student')
+    parser.add_argument('--history', type=int, default=200, help='results of the probe student')
+    parser.add_argument('--roster', type=int, default=50, help='rows in the imported roster')
+    parser.add_argument('--time-factor', type=float, default=1.0, help='scale every wall-clock budget')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    for name, value in vars(args).items():
+        os.environ[f'QUERY_BUDGET_{name.upper()}'] = str(value)
+    sys.exit(pytest.main(['-q', os.path.join(TESTS, 'test_query_budget.py')]))
+
+if __name__ == '__main__':
+    main()
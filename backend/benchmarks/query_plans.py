@@ -0,0 +1,139 @@
+"""Before/after query plans and timings for the hot-path indexes.
+
+Seeds a temporary SQLite database at the latest migration, copies it,
+downgrades the copy to the baseline schema (no indexes), then runs the
+hot lookups against both and prints a JSON report.
+
+    python benchmarks/query_plans.py --students 2000 --exams 40
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+QUERIES = {
+    'start_exam_session_lookup': (
+        'SELECT id FROM exam_sessions WHERE student_id = :student_id AND exam_id = :exam_id '
+        'AND is_completed = 1 LIMIT 1'
+    ),
+    'exam_results': 'SELECT id, percentage, passed FROM results WHERE exam_id = :exam_id',
+    'student_results': (
+        'SELECT id, exam_id, percentage FROM results WHERE student_id = :student_id '
+        'ORDER BY created_at DESC'
+    ),
+    'recent_results': 'SELECT id FROM results ORDER BY created_at DESC LIMIT 10',
+    'session_violations': 'SELECT id, violation_type FROM violations WHERE session_id = :session_id',
+    'exam_questions': 'SELECT id, correct_answer, marks FROM questions WHERE exam_id = :exam_id',
+}
+
+def seed(db, args):
+    from sqlalchemy import insert
+    from models import User, Exam, Question, ExamSession, Result, Violation
+
+    rng = random.Random(args.seed)
+    now = datetime.utcnow()
+    db.session.execute(insert(User), [{
+        'id': i, 'username': f'user{i}', 'email': f'user{i}@example.com',
+        'password_hash': 'x', 'role': 'admin' if i == 1 else 'student', 'created_at': now
+    } for i in range(1, args.students + 2)])
+    db.session.execute(insert(Exam), [{
+        'id': i, 'title': f'Exam {i}', 'duration': 60, 'total_marks': args.questions,
+        'passing_marks': args.questions // 2, 'created_by': 1, 'created_at': now
+    } for i in range(1, args.exams + 1)])
+    db.session.execute(insert(Question), [{
+        'exam_id': exam_id, 'question_text': 'q', 'option_a': 'a', 'option_b': 'b',
+        'option_c': 'c', 'option_d': 'd', 'correct_answer': rng.choice('ABCD'), 'marks': 1
+    } for exam_id in range(1, args.exams + 1) for _ in range(args.questions)])
+
+    sessions, results, violations = [], [], []
+    session_id = 0
+    for student_id in range(2, args.students + 2):
+        for exam_id in rng.sample(range(1, args.exams + 1), min(args.attempts, args.exams)):
+            session_id += 1
+            created_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+            sessions.append({'id': session_id, 'student_id': student_id, 'exam_id': exam_id,
+                             'start_time': created_at, 'is_completed': True, 'violation_count': 0})
+            percentage = rng.uniform(0, 100)
+            results.append({'student_id': student_id, 'exam_id': exam_id, 'session_id': session_id,
+                            'marks_obtained': percentage, 'total_marks': 100, 'percentage': percentage,
+                            'passed': percentage >= 50, 'correct_answers': 0, 'wrong_answers': 0,
+                            'unanswered': 0, 'created_at': created_at})
+            violations.extend({'session_id': session_id, 'violation_type': 'no_face', 'timestamp': created_at}
+                              for _ in range(rng.randint(0, args.violations * 2)))
+    db.session.execute(insert(ExamSession), sessions)
+    db.session.execute(insert(Result), results)
+    db.session.execute(insert(Violation), violations)
+    db.session.commit()
+    return session_id
+
+def measure(db, params, repeat):
+    report = {}
+    for name, sql in QUERIES.items():
+        plan = db.session.execute(db.text('EXPLAIN QUERY PLAN ' + sql), params).all()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            db.session.execute(db.text(sql), params).all()
+        report[name] = {
+            'plan': [row[-1] for row in plan],
+            'avg_ms': round((time.perf_counter() - start) * 1000 / repeat, 3)
+        }
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=2000)
+    parser.add_argument('--exams', type=int, default=40)
+    parser.add_argument('--questions', type=int, default=50)
+    parser.add_argument('--attempts', type=int, default=10, help='exams taken per student')
+    parser.add_argument('--violations', type=int, default=3, help='average violations per session')
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    after_path = os.path.join(workdir, 'after.db')
+    before_path = os.path.join(workdir, 'before.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{after_path}'
+    os.environ['AUTO_MIGRATE'] = '1'
+
+    from flask_migrate import downgrade
+    from app import create_app, db
+    from schema import MIGRATIONS_DIR
+
+    app = create_app()
+    with app.app_context():
+        sessions = seed(db, args)
+        db.engine.dispose()
+    shutil.copy(after_path, before_path)
+
+    params = {'student_id': args.students // 2, 'exam_id': args.exams // 2, 'session_id': sessions // 2}
+    with app.app_context():
+        after = measure(db, params, args.repeat)
+
+    os.environ['DATABASE_URL'] = f'sqlite:///{before_path}'
+    before_app = create_app()
+    with before_app.app_context():
+        downgrade(directory=MIGRATIONS_DIR, revision='0001')
+        before = measure(db, params, args.repeat)
+
+    print(json.dumps({
+        'rows': {'sessions': sessions, 'results': sessions},
+        'queries': {
+            name: {
+                'before': before[name],
+                'after': after[name],
+                'speedup': round(before[name]['avg_ms'] / after[name]['avg_ms'], 1) if after[name]['avg_ms'] else None
+            } for name in QUERIES
+        }
+    }, indent=2))
+    shutil.rmtree(workdir)
+
+if __name__ == '__main__':
+    main()
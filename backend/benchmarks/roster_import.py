@@ -0,0 +1,126 @@
+"""Student onboarding: one registration per call versus a roster import.
+
+Registers students one POST /api/auth/register/student at a time, then
+imports a whole roster CSV through POST /api/admin/students/import with
+passwords hashed across a process pool. A share of the roster collides
+with accounts that already exist. Each run gets a fresh database file;
+a JSON report of users/second is printed.
+
+    python benchmarks/roster_import.py --single 200 --students 20000 --workers 8
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def seed(db, existing):
+    from sqlalchemy import insert
+    from models import User
+
+    now = datetime.utcnow()
+    db.session.execute(insert(User), [{
+        'id': i, 'username': f'user{i}', 'email': f'user{i}@example.com',
+        'password_hash': 'x', 'role': 'admin' if i == 1 else 'student', 'created_at': now
+    } for i in range(1, existing + 2)])
+    db.session.commit()
+
+def create_app(name, args, workdir):
+    os.environ['DATABASE_URL'] = f'sqlite:///{os.path.join(workdir, name + ".db")}'
+    os.environ['PASSWORD_HASH_METHOD'] = args.method
+    os.environ['BULK_HASH_WORKERS'] = str(args.workers)
+
+    from app import create_app, db
+
+    app = create_app()
+    with app.app_context():
+        seed(db, args.existing)
+    return app
+
+def run_single(args, workdir):
+    app = create_app('single', args, workdir)
+    client = app.test_client()
+
+    created = 0
+    started = time.perf_counter()
+    for i in range(args.single):
+        response = client.post('/api/auth/register/student', json={
+            'username': f'new{i}', 'email': f'new{i}@example.com', 'password': f'password-{i}'
+        })
+        created += response.status_code == 201
+    elapsed = time.perf_counter() - started
+
+    return {
+        'students': args.single,
+        'created': created,
+        'seconds': round(elapsed, 2),
+        'users_per_s': round(created / elapsed, 1),
+    }
+
+def run_bulk(args, workdir):
+    app = create_app('bulk', args, workdir)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = '1'
+        session['_fresh'] = True
+
+    # Every tenth row reuses an existing account
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['username', 'email', 'password'])
+    for i in range(args.students):
+        if i % 10 == 0 and i // 10 < args.existing:
+            name = f'user{i // 10 + 2}'
+        else:
+            name = f'new{i}'
+        writer.writerow([name, f'{name}@example.com', f'password-{i}'])
+
+    started = time.perf_counter()
+    response = client.post('/api/admin/students/import', data=buffer.getvalue(), content_type='text/csv')
+    elapsed = time.perf_counter() - started
+    body = response.get_json()
+
+    return {
+        'students': args.students,
+        'created': body.get('created'),
+        'rejected': body.get('rejected'),
+        'hash_workers': app.extensions['password_hasher'].bulk_workers,
+        'seconds': round(elapsed, 2),
+        'users_per_s': round((body.get('created') or 0) / elapsed, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--single', type=int, default=200, help='students registered one call at a time')
+    parser.add_argument('--students', type=int, default=20000, help='rows in the imported roster')
+    parser.add_argument('--existing', type=int, default=1000, help='accounts present before the import')
+    parser.add_argument('--workers', type=int, default=0, help='hashing processes (0 uses every CPU)')
+    parser.add_argument('--method', default='scrypt', help='PASSWORD_HASH_METHOD for both runs')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ['AUTO_MIGRATE'] = '1'
+    os.environ['EXAM_SWEEP_INTERVAL'] = '0'
+    os.environ['SUBMIT_QUEUE_INTERVAL'] = '0'
+    try:
+        single = run_single(args, workdir)
+        bulk = run_bulk(args, workdir)
+    finally:
+        shutil.rmtree(workdir)
+
+    print(json.dumps({
+        'password_hash_method': args.method,
+        'single_registration': single,
+        'roster_import': bulk,
+        'speedup': round(bulk['users_per_s'] / single['users_per_s'], 1),
+    }, indent=2))
+
+if __name__ == '__main__':
+    main()
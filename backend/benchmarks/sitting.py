@@ -0,0 +1,256 @@
+"""Full exam sitting: many students taking one exam while admins watch.
+
+Boots the app from create_app on a fresh SQLite file (or the empty
+database given with --database-url) and drives one thread per virtual
+student through login, the exam list, start_exam, a stream of answer
+autosaves, heartbeats and proctoring violations, and submit_exam, polling
+for the result when grading is queued. Admin threads poll the overall and
+per-exam analytics for the whole sitting. Throughput, errors and
+p50/p95/p99 latency per endpoint are printed as JSON (and written to
+--output). With --baseline, endpoints whose p95 grew by more than
+--tolerance (and --min-delta-ms) against an earlier report, or that
+return more errors, are listed and the exit status is 1.
+
+    python benchmarks/sitting.py --students 300 --admins 2 --questions 50 --output sitting.json
+    python benchmarks/sitting.py --students 300 --baseline sitting.json --tolerance 0.2
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PASSWORD = 'sitting-password'
+
+def seed(db, students, admins, questions, method):
+    from sqlalchemy import insert, select
+    from werkzeug.security import generate_password_hash
+    from models import User, Exam, Question
+
+    password_hash = generate_password_hash(PASSWORD, method)
+    now = datetime.utcnow()
+    db.session.execute(insert(User), [{
+        'username': f'admin{i}', 'email': f'admin{i}@example.com',
+        'password_hash': password_hash, 'role': 'admin', 'created_at': now
+    } for i in range(admins)] + [{
+        'username': f'student{i}', 'email': f'student{i}@example.com',
+        'password_hash': password_hash, 'role': 'student', 'created_at': now
+    } for i in range(students)])
+    admin_id = db.session.execute(select(User.id).where(User.username == 'admin0')).scalar_one()
+    exam_id = db.session.execute(insert(Exam).returning(Exam.id), [{
+        'title': 'Sitting', 'duration': 120, 'total_marks': questions,
+        'passing_marks': questions // 2, 'created_by': admin_id, 'created_at': now,
+        'randomize_questions': True, 'question_count': questions
+    }]).scalar_one()
+    db.session.execute(insert(Question), [{
+        'exam_id': exam_id, 'question_text': f'Question {i}', 'option_a': 'A', 'option_b': 'B',
+        'option_c': 'C', 'option_d': 'D', 'correct_answer': 'ABCD'[i % 4], 'marks': 1, 'created_at': now
+    } for i in range(questions)])
+    db.session.commit()
+    return exam_id
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * fraction))] * 1000, 1)
+
+class Recorder:
+    """Latency and status counts per endpoint name"""
+
+    def __init__(self):
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def call(self, name, method, *args, **kwargs):
+        start = time.perf_counter()
+        response = method(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        with self.lock:
+            entry = self.calls.setdefault(name, {'latency': [], 'errors': 0, 'busy': 0})
+            entry['latency'].append(elapsed)
+            if response.status_code == 503:
+                entry['busy'] += 1
+            elif response.status_code >= 400:
+                entry['errors'] += 1
+        return response
+
+    def report(self, wall):
+        return {name: {
+            'requests': len(entry['latency']),
+            'errors': entry['errors'],
+            'busy_503': entry['busy'],
+            'throughput_rps': round(len(entry['latency']) / wall, 1),
+            'p50_ms': percentile(entry['latency'], 0.5),
+            'p95_ms': percentile(entry['latency'], 0.95),
+            'p99_ms': percentile(entry['latency'], 0.99),
+        } for name, entry in sorted(self.calls.items())}
+
+def student(app, recorder, number, exam_id, args, ready, failures):
+    rng = random.Random(number)
+    client = app.test_client()
+    try:
+        try:
+            login = recorder.call('login', client.post, '/api/auth/login', json={
+                'email': f'student{number}@example.com', 'password': PASSWORD
+            })
+            if login.status_code != 200:
+                raise RuntimeError(f'login returned {login.status_code}')
+            recorder.call('exam_list', client.get, '/api/student/exams')
+        finally:
+            # The whole cohort starts the exam together, as at a real sitting
+            ready.wait()
+
+        while True:
+            started = recorder.call('start_exam', client.post, f'/api/student/exams/{exam_id}/start')
+            if started.status_code != 503:
+                break
+            time.sleep(started.get_json().get('retry_after', 1))
+        if started.status_code not in (200, 201):
+            raise RuntimeError(f'start_exam returned {started.status_code}')
+        session_id = started.get_json()['session']['id']
+        question_ids = [q['id'] for q in started.get_json()['questions']]
+
+        answers = {}
+        for step in range(args.steps):
+            time.sleep(rng.uniform(0, 2 * args.think))
+            changed = {str(q): rng.choice('ABCD') for q in rng.sample(question_ids, min(3, len(question_ids)))}
+            answers.update(changed)
+            recorder.call('autosave', client.patch, f'/api/student/sessions/{session_id}/answers',
+                          json={'answers': changed})
+            recorder.call('heartbeat', client.post, f'/api/student/sessions/{session_id}/heartbeat')
+            if rng.random() < args.violation_rate:
+                recorder.call('violation', client.post, '/api/violations', json={
+                    'session_id': session_id,
+                    'violation_type': rng.choice(['no_face', 'multiple_faces', 'tab_switch']),
+                    'details': f'step {step}'
+                })
+
+        submitted = recorder.call('submit_exam', client.post, f'/api/student/sessions/{session_id}/submit',
+                                  json={'answers': answers})
+        while submitted.status_code == 202:
+            time.sleep(float(submitted.headers.get('Retry-After', 1)))
+            submitted = recorder.call('session_result', client.get, f'/api/student/sessions/{session_id}/result')
+        if submitted.status_code != 200:
+            raise RuntimeError(f'submit returned {submitted.status_code}')
+    except Exception as e:
+        failures.append(f'student{number}: {e}')
+
+def admin(app, recorder, number, exam_id, args, done, failures):
+    client = app.test_client()
+    try:
+        login = recorder.call('login', client.post, '/api/auth/login', json={
+            'email': f'admin{number}@example.com', 'password': PASSWORD
+        })
+        if login.status_code != 200:
+            raise RuntimeError(f'login returned {login.status_code}')
+        while not done.is_set():
+            recorder.call('admin_analytics', client.get, '/api/admin/analytics')
+            recorder.call('exam_analytics', client.get, f'/api/admin/exams/{exam_id}/analytics')
+            done.wait(args.admin_interval)
+    except Exception as e:
+        failures.append(f'admin{number}: {e}')
+
+def regressions(report, baseline, tolerance, min_delta_ms):
+    """Endpoints whose p95 grew by more than tolerance and min_delta_ms, or that newly fail"""
+    found = []
+    for name, before in baseline['endpoints'].items():
+        after = report['endpoints'].get(name)
+        if after is None:
+            continue
+        grown = after['p95_ms'] - before['p95_ms']
+        if grown > before['p95_ms'] * tolerance and grown > min_delta_ms:
+            found.append(f'{name}: p95 {before["p95_ms"]}ms -> {after["p95_ms"]}ms')
+        if after['errors'] > before['errors']:
+            found.append(f'{name}: errors {before["errors"]} -> {after["errors"]}')
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=300)
+    parser.add_argument('--admins', type=int, default=2)
+    parser.add_argument('--questions', type=int, default=50)
+    parser.add_argument('--steps', type=int, default=20, help='autosave/heartbeat rounds per student')
+    parser.add_argument('--think', type=float, default=0.05, help='mean seconds between rounds')
+    parser.add_argument('--violation-rate', type=float, default=0.2, help='chance of a violation per round')
+    parser.add_argument('--admin-interval', type=float, default=0.5, help='seconds between admin polls')
+    parser.add_argument('--hash-method', default='pbkdf2:sha256:1000', help='password hash for the seeded accounts')
+    parser.add_argument('--database-url', default=None, help='empty database to use instead of a temporary SQLite file')
+    parser.add_argument('--output', default=None, help='also write the JSON report here')
+    parser.add_argument('--baseline', default=None, help='earlier report to compare p95 latency against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative p95 growth over the baseline')
+    parser.add_argument('--min-delta-ms', type=float, default=5, help='p95 growth below this is never a regression')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = args.database_url or f'sqlite:///{os.path.join(workdir, "sitting.db")}'
+    os.environ['AUTO_MIGRATE'] = '1'
+    os.environ['PASSWORD_HASH_METHOD'] = args.hash_method
+    try:
+        from app import create_app, db
+
+        app = create_app()
+        with app.app_context():
+            exam_id = seed(db, args.students, args.admins, args.questions, args.hash_method)
+
+        recorder = Recorder()
+        failures = []
+        ready = threading.Barrier(args.students)
+        done = threading.Event()
+        students = [threading.Thread(target=student, args=(app, recorder, i, exam_id, args, ready, failures))
+                    for i in range(args.students)]
+        admins = [threading.Thread(target=admin, args=(app, recorder, i, exam_id, args, done, failures))
+                  for i in range(args.admins)]
+
+        started = time.perf_counter()
+        for thread in admins + students:
+            thread.start()
+        for thread in students:
+            thread.join()
+        done.set()
+        for thread in admins:
+            thread.join()
+        wall = time.perf_counter() - started
+
+    except BaseException:
+        shutil.rmtree(workdir)
+        raise
+
+    calls = recorder.report(wall)
+    report = {
+        'students': args.students,
+        'admins': args.admins,
+        'questions': args.questions,
+        'steps': args.steps,
+        'database': 'sqlite' if not args.database_url else args.database_url.split(':', 1)[0],
+        'wall_s': round(wall, 2),
+        'total_requests': sum(entry['requests'] for entry in calls.values()),
+        'throughput_rps': round(sum(entry['requests'] for entry in calls.values()) / wall, 1),
+        'failed_users': len(failures),
+        'failures': failures[:20],
+        'endpoints': calls,
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            report['regressions'] = regressions(report, json.load(f), args.tolerance, args.min_delta_ms)
+
+    output = json.dumps(report, indent=2)
+    print(output, flush=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+
+    # The grading queue, sweeper and violation buffer run in daemon threads
+    # that would keep polling the deleted database; leave without them
+    shutil.rmtree(workdir)
+    os._exit(1 if report.get('regressions') else 0)
+
+if __name__ == '__main__':
+    main()
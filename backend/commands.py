@@ -0,0 +1,101 @@
+import click
+from app import db
+
+def register_commands(app):
+    """Register the flask CLI maintenance commands"""
+
+    @app.cli.command('rebuild-stats')
+    @click.option('--exam-id', type=int, default=None, help='Rebuild a single exam')
+    def rebuild_stats(exam_id):
+        """Recompute exam statistics from the results table"""
+        from exam_stats import rebuild_statistics
+        rows = rebuild_statistics(exam_id)
+        db.session.commit()
+        click.echo(f'Rebuilt statistics for {rows} exam(s)')
+
+    @app.cli.command('provision-sessions')
+    @click.argument('exam_id', type=int)
+    def provision(exam_id):
+        """Create not-yet-started sessions for every student ahead of an exam"""
+        from exam_start import provision_sessions
+        created = provision_sessions(exam_id)
+        db.session.commit()
+        click.echo(f'Provisioned {created} session(s) for exam {exam_id}')
+
+    @app.cli.command('import-questions')
+    @click.argument('exam_id', type=int)
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'import_format', type=click.Choice(['csv', 'json']), default=None,
+                  help='Defaults to the file extension')
+    @click.option('--keep-total-marks', is_flag=True, help='Leave Exam.total_marks as it is')
+    def import_questions_command(exam_id, path, import_format, keep_total_marks):
+        """Bulk-add questions to an exam from a CSV or JSON file"""
+        from models import Exam
+        from question_import import parse_questions, import_questions
+        if db.session.get(Exam, exam_id) is None:
+            raise click.ClickException(f'Exam {exam_id} not found')
+        import_format = import_format or ('csv' if path.lower().endswith('.csv') else 'json')
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            try:
+                rows = parse_questions(f.read(), import_format)
+            except ValueError as e:
+                raise click.ClickException(str(e))
+        imported, errors = import_questions(exam_id, rows, not keep_total_marks)
+        db.session.commit()
+        for error in errors:
+            click.echo(f'Row {error["row"]}: {error["error"]}', err=True)
+        click.echo(f'Imported {imported} question(s), rejected {len(errors)}')
+
+    @app.cli.command('import-roster')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--workers', type=int, default=None, help='Password hashing processes (default BULK_HASH_WORKERS)')
+    @click.option('--report', type=click.File('w'), default='-', help='Where to write the per-row CSV report')
+    def import_roster_command(path, workers, report):
+        """Create student accounts from a roster CSV (username, email, password)"""
+        import csv
+        from roster_import import parse_roster, import_roster, REPORT_FIELDS
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            rows = parse_roster(f.read())
+        created, entries = import_roster(rows, workers)
+        db.session.commit()
+        # Generated passwords are only ever shown in this report
+        writer = csv.DictWriter(report, fieldnames=REPORT_FIELDS)
+        writer.writeheader()
+        writer.writerows(entries)
+        click.echo(f'Created {created} student(s), rejected {len(entries) - created}', err=True)
+
+    @app.cli.command('sweep-sessions')
+    def sweep():
+        """Finalize open sessions whose time has run out"""
+        from exam_timer import session_sweeper
+        finalized = session_sweeper.sweep()
+        click.echo(f'Finalized {finalized} expired session(s)')
+
+    @app.cli.command('grade-submissions')
+    def grade_submissions():
+        """Grade every submission waiting in the queue"""
+        from submission_queue import submission_queue
+        graded = submission_queue.drain()
+        click.echo(f'Graded {graded} queued submission(s)')
+
+    @app.cli.command('seed-scale')
+    @click.option('--students', type=int, default=10000, show_default=True)
+    @click.option('--exams', type=int, default=200, show_default=True)
+    @click.option('--questions', type=int, default=100, show_default=True, help='Average questions per exam')
+    @click.option('--attempts', type=int, default=10, show_default=True, help='Average completed exams per student')
+    @click.option('--admins', type=click.IntRange(min=1), default=1, show_default=True)
+    @click.option('--password', default='password123', show_default=True, help='Password of every generated account')
+    @click.option('--seed', type=int, default=0, show_default=True, help='Same seed, same data')
+    @click.option('--batch-size', type=click.IntRange(min=1), default=5000, show_default=True,
+                  help='Sessions inserted per commit')
+    def seed_scale_command(students, exams, questions, attempts, admins, password, seed, batch_size):
+        """Generate a large, realistic data set for load and query testing"""
+        import time
+        from scale_seed import seed_scale
+        started = time.perf_counter()
+        counts = seed_scale(
+            students, exams, questions, attempts, admins, password, seed, batch_size,
+            progress=lambda c: click.echo(f'{c["results"]} result(s), {c["violations"]} violation(s)', err=True)
+        )
+        elapsed = time.perf_counter() - started
+        click.echo(', '.join(f'{count} {name}' for name, count in counts.items()) + f' in {elapsed:.0f}s')
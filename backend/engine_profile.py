@@ -0,0 +1,59 @@
+import os
+from sqlalchemy import event
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+def _env_bool(name, default):
+    return os.environ.get(name, str(default)).lower() in ('1', 'true', 'yes')
+
+def tuned_profile_enabled():
+    # 'default' leaves SQLAlchemy's own settings untouched, e.g. for benchmarks
+    return os.environ.get('DB_ENGINE_PROFILE', 'tuned').lower() != 'default'
+
+def engine_options(database_uri):
+    """SQLAlchemy engine options for the configured profile"""
+    if not tuned_profile_enabled():
+        return {}
+
+    if database_uri.startswith('sqlite'):
+        if database_uri in ('sqlite://', 'sqlite:///:memory:'):
+            # In-memory databases use a per-thread singleton pool
+            return {}
+        # Local file: no server connection to go stale, so only size the pool
+        return {
+            'pool_size': _env_int('DB_POOL_SIZE', 5),
+            'max_overflow': _env_int('DB_MAX_OVERFLOW', 10),
+            'pool_timeout': _env_int('DB_POOL_TIMEOUT', 30),
+        }
+
+    # Keep pool_size * workers within the server's max_connections
+    return {
+        'pool_size': _env_int('DB_POOL_SIZE', 10),
+        'max_overflow': _env_int('DB_MAX_OVERFLOW', 20),
+        'pool_timeout': _env_int('DB_POOL_TIMEOUT', 30),
+        'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', True),
+        'pool_recycle': _env_int('DB_POOL_RECYCLE', 1800),
+    }
+
+def sqlite_pragmas():
+    return {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': _env_int('SQLITE_BUSY_TIMEOUT_MS', 5000),
+        'mmap_size': _env_int('SQLITE_MMAP_SIZE', 256 * 1024 * 1024),
+    }
+
+def install_sqlite_pragmas(engine):
+    """Apply the SQLite pragmas to every new connection"""
+    if engine.dialect.name != 'sqlite' or not tuned_profile_enabled():
+        return
+
+    pragmas = sqlite_pragmas()
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
@@ -0,0 +1,52 @@
+import threading
+from collections import OrderedDict
+from app import db
+from models import Exam
+
+def _token(exam):
+    return exam.version, exam.created_at
+
+class ExamCache:
+    """Bounded per-exam cache keyed on Exam.version.
+
+    Every worker compares the version on the Exam row it already loaded, so
+    a bump committed by any worker invalidates all of them. The token also
+    carries created_at: SQLite reuses the id of a deleted exam, and a new
+    exam under that id starts again at version 1.
+    """
+
+    def __init__(self, build, maxsize=256):
+        self.build = build
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, exam):
+        with self._lock:
+            entry = self._entries.get(exam.id)
+            if entry is not None and entry[0] == _token(exam):
+                self._entries.move_to_end(exam.id)
+                return entry[1]
+
+        value = self.build(exam)
+        with self._lock:
+            self._entries[exam.id] = (_token(exam), value)
+            self._entries.move_to_end(exam.id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+def invalidate_exam(exam_id, questions_added=0):
+    """Bump an exam's version so every cached copy of it is rebuilt.
+
+    questions_added adjusts the maintained question_count in the same
+    statement; pass a negative number for deletions.
+    """
+    values = {Exam.version: Exam.version + 1}
+    if questions_added:
+        values[Exam.question_count] = Exam.question_count + questions_added
+    db.session.query(Exam).filter(Exam.id == exam_id).update(values, synchronize_session=False)
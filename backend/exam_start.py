@@ -0,0 +1,85 @@
+import math
+import secrets
+import threading
+import time
+from sqlalchemy import insert, select, exists
+from app import db
+from models import User, ExamSession
+
+PROVISION_BATCH_SIZE = 1000
+
+class StartAdmission:
+    """Token bucket in front of start_exam, per worker.
+
+    With START_ADMISSION_RATE > 0 at most that many starts per second are
+    let through after an initial START_ADMISSION_BURST. Turned-away students
+    get an approximate queue position and a retry hint instead of waiting
+    on the connection pool; the position drains at the admission rate.
+    """
+
+    def __init__(self, app=None):
+        self.rate = 0.0
+        self.burst = 0
+        self._tokens = 0.0
+        self._backlog = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.rate = float(app.config.get('START_ADMISSION_RATE', 0))
+        self.burst = int(app.config.get('START_ADMISSION_BURST') or max(1, math.ceil(self.rate)))
+        self._tokens = float(self.burst)
+        self._backlog = 0.0
+        self._updated = time.monotonic()
+        app.extensions['start_admission'] = self
+
+    def admit(self):
+        """None if the start may proceed, else (queue position, retry-after seconds)"""
+        if self.rate <= 0:
+            return None
+
+        with self._lock:
+            now = time.monotonic()
+            refill = (now - self._updated) * self.rate
+            self._updated = now
+            self._tokens = min(self.burst, self._tokens + refill)
+            self._backlog = max(0.0, self._backlog - refill)
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return None
+            self._backlog += 1
+            position = math.ceil(self._backlog)
+        return position, position / self.rate
+
+start_admission = StartAdmission()
+
+def provision_sessions(exam_id, student_ids=None):
+    """Create not-yet-started sessions for an exam's roster.
+
+    The roster is every student, or only student_ids. Students who already
+    have a session for the exam are skipped. The sessions have no
+    start_time until the student starts the exam. The caller commits.
+    Returns the number of sessions created.
+    """
+    query = select(User.id).where(
+        User.role == 'student',
+        ~exists().where(ExamSession.exam_id == exam_id, ExamSession.student_id == User.id)
+    )
+    if student_ids is not None:
+        query = query.where(User.id.in_(student_ids))
+    roster = db.session.execute(query).scalars().all()
+
+    # Core insert on the table: the ORM bulk path would fill start_time's default
+    for offset in range(0, len(roster), PROVISION_BATCH_SIZE):
+        db.session.execute(insert(ExamSession.__table__), [{
+            'student_id': student_id,
+            'exam_id': exam_id,
+            'start_time': None,
+            'is_completed': False,
+            'violation_count': 0,
+            'pending_answer_patches': 0,
+            'shuffle_seed': secrets.randbits(31)
+        } for student_id in roster[offset:offset + PROVISION_BATCH_SIZE]])
+    return len(roster)
@@ -0,0 +1,106 @@
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.exc import IntegrityError
+from app import db
+from models import ExamStatistics, Result
+
+def bucket_index(percentage):
+    """Histogram bucket for a percentage; the top bucket includes 100"""
+    return min(max(int(percentage // 10), 0), ExamStatistics.HISTOGRAM_BUCKETS - 1)
+
+def _bucket_expression(percentage):
+    # SQL twin of bucket_index, used by the rebuild
+    return case(
+        *[(percentage < (i + 1) * 10, i) for i in range(ExamStatistics.HISTOGRAM_BUCKETS - 1)],
+        else_=ExamStatistics.HISTOGRAM_BUCKETS - 1
+    )
+
+def record_result(result):
+    """Fold a new Result into its exam's statistics row.
+
+    Runs as a single atomic UPDATE in the caller's transaction; the caller
+    commits.
+    """
+    record_results(result.exam_id, [result.percentage], [result.passed])
+
+def record_results(exam_id, percentages, passed):
+    """Fold a batch of new results for one exam in a single UPDATE"""
+    if not percentages:
+        return
+    low, high = min(percentages), max(percentages)
+    buckets = Counter(bucket_index(percentage) for percentage in percentages)
+    values = {
+        ExamStatistics.attempts: ExamStatistics.attempts + len(percentages),
+        ExamStatistics.passed_count: ExamStatistics.passed_count + sum(1 for p in passed if p),
+        ExamStatistics.percentage_sum: ExamStatistics.percentage_sum + sum(percentages),
+        ExamStatistics.percentage_sq_sum: ExamStatistics.percentage_sq_sum + sum(p * p for p in percentages),
+        ExamStatistics.min_percentage: case(
+            (ExamStatistics.min_percentage.is_(None), low),
+            (ExamStatistics.min_percentage > low, low),
+            else_=ExamStatistics.min_percentage
+        ),
+        ExamStatistics.max_percentage: case(
+            (ExamStatistics.max_percentage.is_(None), high),
+            (ExamStatistics.max_percentage < high, high),
+            else_=ExamStatistics.max_percentage
+        ),
+        ExamStatistics.updated_at: datetime.utcnow()
+    }
+    for index, count in buckets.items():
+        bucket = getattr(ExamStatistics, f'bucket_{index}')
+        values[bucket] = bucket + count
+    query = db.session.query(ExamStatistics).filter(ExamStatistics.exam_id == exam_id)
+    if query.update(values, synchronize_session=False):
+        return
+
+    # First result for this exam; another worker may create the row concurrently
+    try:
+        with db.session.begin_nested():
+            db.session.add(empty_statistics(exam_id))
+    except IntegrityError:
+        pass
+    query.update(values, synchronize_session=False)
+
+def empty_statistics(exam_id):
+    return ExamStatistics(
+        exam_id=exam_id,
+        attempts=0,
+        passed_count=0,
+        percentage_sum=0.0,
+        percentage_sq_sum=0.0,
+        **{f'bucket_{i}': 0 for i in range(ExamStatistics.HISTOGRAM_BUCKETS)}
+    )
+
+def rebuild_statistics(exam_id=None):
+    """Recompute statistics from the results table with one aggregate query.
+
+    Rebuilds one exam, or every exam when exam_id is None. The caller
+    commits. Returns the number of statistics rows written.
+    """
+    bucket = _bucket_expression(Result.percentage)
+    aggregate = select(
+        Result.exam_id,
+        func.count(Result.id),
+        func.sum(case((Result.passed == True, 1), else_=0)),
+        func.sum(Result.percentage),
+        func.sum(Result.percentage * Result.percentage),
+        func.min(Result.percentage),
+        func.max(Result.percentage),
+        *[func.sum(case((bucket == i, 1), else_=0)) for i in range(ExamStatistics.HISTOGRAM_BUCKETS)],
+        func.now()
+    ).group_by(Result.exam_id)
+
+    clear = delete(ExamStatistics)
+    if exam_id is not None:
+        aggregate = aggregate.where(Result.exam_id == exam_id)
+        clear = clear.where(ExamStatistics.exam_id == exam_id)
+
+    db.session.execute(clear)
+    columns = [
+        'exam_id', 'attempts', 'passed_count', 'percentage_sum', 'percentage_sq_sum',
+        'min_percentage', 'max_percentage',
+        *[f'bucket_{i}' for i in range(ExamStatistics.HISTOGRAM_BUCKETS)],
+        'updated_at'
+    ]
+    return db.session.execute(insert(ExamStatistics).from_select(columns, aggregate)).rowcount
@@ -0,0 +1,206 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, select, update
+from app import db
+from models import Exam, ExamSession, AnswerPatch
+from submission_queue import grade_sessions, publish_submitted
+
+def session_deadline(exam, start_time):
+    """When a session started at start_time runs out of time"""
+    deadline = start_time + timedelta(minutes=exam.duration)
+    if exam.end_time and exam.end_time < deadline:
+        return exam.end_time
+    return deadline
+
+def reschedule_sessions(exam):
+    """Recompute the deadlines of an exam's open sessions after its timing changed.
+
+    The caller commits. Returns the number of sessions updated.
+    """
+    rows = db.session.query(ExamSession.id, ExamSession.start_time).filter(
+        ExamSession.exam_id == exam.id,
+        ExamSession.is_completed == False,
+        ExamSession.start_time.isnot(None)
+    ).all()
+    if rows:
+        db.session.execute(update(ExamSession), [
+            {'id': row.id, 'deadline': session_deadline(exam, row.start_time)} for row in rows
+        ])
+    return len(rows)
+
+def heartbeat_statement(session_id):
+    """Columns of a session the heartbeat needs, in one query"""
+    return select(
+        ExamSession.student_id,
+        ExamSession.start_time,
+        ExamSession.deadline,
+        ExamSession.is_completed,
+        ExamSession.violation_count,
+        Exam.duration
+    ).join(Exam, ExamSession.exam_id == Exam.id).where(ExamSession.id == session_id)
+
+def heartbeat_payload(row, now=None):
+    now = now or datetime.utcnow()
+    if row.is_completed:
+        remaining = 0
+    elif row.deadline is None:
+        # Pre-provisioned and not started yet
+        remaining = row.duration * 60
+    else:
+        remaining = max(0, int((row.deadline - now).total_seconds()))
+    return {
+        'remaining_seconds': remaining,
+        'deadline': row.deadline.isoformat() if row.deadline else None,
+        'is_completed': row.is_completed,
+        'violation_count': row.violation_count or 0
+    }
+
+def finalize_sessions(session_ids, now=None):
+    """Close open sessions and grade them on their saved answers.
+
+    Sessions another worker already closed are skipped. Pending autosave
+    patches are folded before grading. The caller commits. Returns the
+    results of the finalized sessions as dicts.
+    """
+    now = now or datetime.utcnow()
+    claimed = db.session.execute(
+        update(ExamSession)
+        .where(ExamSession.id.in_(session_ids), ExamSession.is_completed == False)
+        .values(
+            is_completed=True,
+            auto_submitted=True,
+            end_time=func.coalesce(ExamSession.deadline, now)
+        )
+        .returning(
+            ExamSession.id, ExamSession.exam_id, ExamSession.student_id,
+            ExamSession.answers, ExamSession.violation_count, ExamSession.end_time
+        )
+        .execution_options(synchronize_session=False)
+    ).all()
+    if not claimed:
+        return []
+
+    answers = {row.id: json.loads(row.answers) if row.answers else {} for row in claimed}
+    patches = db.session.query(AnswerPatch.session_id, AnswerPatch.question_id, AnswerPatch.answer).filter(
+        AnswerPatch.session_id.in_(answers)
+    ).order_by(AnswerPatch.id).all()
+    if patches:
+        patched = set()
+        for patch in patches:
+            if patch.answer is None:
+                answers[patch.session_id].pop(str(patch.question_id), None)
+            else:
+                answers[patch.session_id][str(patch.question_id)] = patch.answer
+            patched.add(patch.session_id)
+        db.session.execute(update(ExamSession), [
+            {'id': session_id, 'answers': json.dumps(answers[session_id]), 'pending_answer_patches': 0}
+            for session_id in patched
+        ])
+        db.session.query(AnswerPatch).filter(AnswerPatch.session_id.in_(patched)).delete(synchronize_session=False)
+
+    return grade_sessions(claimed, answers, now)
+
+class SessionSweeper:
+    """Finalizes sessions whose time ran out without a submit.
+
+    Every EXAM_SWEEP_INTERVAL seconds each worker selects open sessions
+    past their deadline plus EXAM_SUBMIT_GRACE and finalizes them in chunks
+    of EXAM_SWEEP_BATCH, one commit per chunk. Workers may overlap; a
+    session is only claimed by the first UPDATE that closes it.
+
+    Provisioned sessions that were never started have no deadline. They
+    are closed without a result once their exam's end_time has passed,
+    and stay open while the exam has no end_time.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.interval = 30.0
+        self.batch_size = 500
+        self.grace = 30
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.interval = float(app.config.get('EXAM_SWEEP_INTERVAL', 30))
+        self.batch_size = int(app.config.get('EXAM_SWEEP_BATCH', 500))
+        self.grace = int(app.config.get('EXAM_SUBMIT_GRACE', 30))
+        app.extensions['session_sweeper'] = self
+        if self.interval > 0:
+            app.before_request(self._ensure_thread)
+
+    def cutoff(self, now=None):
+        """Deadlines before this have run out, grace included"""
+        return (now or datetime.utcnow()) - timedelta(seconds=self.grace)
+
+    def is_late(self, deadline, now=None):
+        # Only never-started provisioned sessions have no deadline, and the
+        # write paths turn those away before asking
+        return deadline is not None and deadline < self.cutoff(now)
+
+    def sweep(self, now=None):
+        """Finalize every expired session; returns how many were finalized"""
+        now = now or datetime.utcnow()
+        if self.close_unstarted(now):
+            db.session.commit()
+        total = 0
+        while True:
+            session_ids = db.session.execute(
+                select(ExamSession.id).where(
+                    ExamSession.is_completed == False,
+                    ExamSession.deadline < self.cutoff(now)
+                ).order_by(ExamSession.deadline).limit(self.batch_size)
+            ).scalars().all()
+            if not session_ids:
+                return total
+
+            finalized = finalize_sessions(session_ids, now)
+            db.session.commit()
+            total += len(finalized)
+            publish_submitted(finalized, {result['session_id'] for result in finalized}, timed_out=True)
+            if len(session_ids) < self.batch_size:
+                return total
+
+    def close_unstarted(self, now=None):
+        """Close never-started sessions of exams that have ended; returns how many were closed"""
+        ended = select(Exam.id).where(Exam.end_time < (now or datetime.utcnow()))
+        return db.session.execute(
+            update(ExamSession)
+            .where(
+                ExamSession.is_completed == False,
+                ExamSession.start_time.is_(None),
+                ExamSession.exam_id.in_(ended)
+            )
+            .values(is_completed=True)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+    def _ensure_thread(self):
+        # Threads do not survive a fork, so start one per worker process
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='session-sweeper', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self.app.app_context():
+                try:
+                    self.sweep()
+                except Exception:
+                    db.session.rollback()
+                    self.app.logger.exception('Session sweep failed')
+
+session_sweeper = SessionSweeper()
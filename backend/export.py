@@ -0,0 +1,118 @@
+import csv
+import io
+from sqlalchemy import select
+from app import db
+from models import Result, Exam, User
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = None
+    pq = None
+
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = [
+    ('id', Result.id),
+    ('exam_id', Result.exam_id),
+    ('exam_title', Exam.title),
+    ('student_id', Result.student_id),
+    ('student_name', User.username),
+    ('session_id', Result.session_id),
+    ('marks_obtained', Result.marks_obtained),
+    ('total_marks', Result.total_marks),
+    ('percentage', Result.percentage),
+    ('passed', Result.passed),
+    ('correct_answers', Result.correct_answers),
+    ('wrong_answers', Result.wrong_answers),
+    ('unanswered', Result.unanswered),
+    ('violation_count', Result.violation_count),
+    ('created_at', Result.created_at),
+]
+
+def export_batches(criteria, batch_size=EXPORT_BATCH_SIZE):
+    """Yield lists of result row tuples, streamed from a server-side cursor"""
+    stmt = select(*[column for _, column in EXPORT_COLUMNS]).join(
+        Exam, Result.exam_id == Exam.id
+    ).join(
+        User, Result.student_id == User.id
+    ).where(*criteria).order_by(Result.id)
+
+    rows = db.session.execute(stmt.execution_options(yield_per=batch_size))
+    for batch in rows.partitions():
+        yield batch
+
+def generate_csv(criteria):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    # Send the header straight away
+    writer.writerow([name for name, _ in EXPORT_COLUMNS])
+    yield buffer.getvalue()
+
+    for batch in export_batches(criteria):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(batch)
+        yield buffer.getvalue()
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands written bytes back to a generator"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+def parquet_schema():
+    return pa.schema([
+        ('id', pa.int64()),
+        ('exam_id', pa.int64()),
+        ('exam_title', pa.string()),
+        ('student_id', pa.int64()),
+        ('student_name', pa.string()),
+        ('session_id', pa.int64()),
+        ('marks_obtained', pa.float64()),
+        ('total_marks', pa.int64()),
+        ('percentage', pa.float64()),
+        ('passed', pa.bool_()),
+        ('correct_answers', pa.int64()),
+        ('wrong_answers', pa.int64()),
+        ('unanswered', pa.int64()),
+        ('violation_count', pa.int64()),
+        ('created_at', pa.timestamp('us')),
+    ])
+
+def generate_parquet(criteria):
+    """Stream a Parquet file, writing one row group per batch"""
+    schema = parquet_schema()
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    yield sink.drain()
+    try:
+        for batch in export_batches(criteria):
+            columns = list(zip(*batch))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
@@ -0,0 +1,182 @@
+import json
+import numpy as np
+from sqlalchemy import update
+from app import db
+from models import Question, ExamSession, Result
+from exam_cache import ExamCache
+
+# Answers are encoded as small integers so a whole exam fits in one int8 matrix
+UNANSWERED = 0
+ANSWER_CODES = {'A': 1, 'B': 2, 'C': 3, 'D': 4}
+INVALID = 5
+_STRING_CODES = dict(ANSWER_CODES, **{option.lower(): code for option, code in ANSWER_CODES.items()}, **{'': UNANSWERED})
+
+def answer_code(value):
+    if not value:
+        return UNANSWERED
+    if isinstance(value, str):
+        return ANSWER_CODES.get(value.upper(), INVALID)
+    return INVALID
+
+def answer_matrix(answer_maps, question_index):
+    """Encode answer dicts as an (attempts x questions) int8 matrix"""
+    width = len(question_index)
+    cells, codes = [], []
+    index_get = question_index.get
+    code_get = _STRING_CODES.get
+    for row, answers in enumerate(answer_maps):
+        offset = row * width
+        for question_id, value in answers.items():
+            column = index_get(question_id)
+            if column is not None:
+                cells.append(offset + column)
+                codes.append(code_get(value, INVALID) if isinstance(value, str) else answer_code(value))
+
+    matrix = np.zeros(len(answer_maps) * width, dtype=np.int8)
+    matrix[cells] = codes
+    return matrix.reshape(len(answer_maps), width)
+
+def score_matrix(matrix, plan):
+    """Score every attempt in one pass.
+
+    This is the only scoring implementation; single submissions are scored
+    as a one-row matrix so they always match a bulk re-grade.
+    """
+    key = plan.key
+    marks = plan.marks
+    correct = matrix == key
+    answered = matrix != UNANSWERED
+    wrong = answered & ~correct
+
+    correct_count = correct.sum(axis=1)
+    wrong_count = wrong.sum(axis=1)
+    unanswered_count = key.shape[0] - answered.sum(axis=1)
+
+    # Accumulate question by question, in key order, so the floating point
+    # result is identical to adding and deducting marks one answer at a time
+    penalty = plan.penalty
+    marks_obtained = np.zeros(matrix.shape[0], dtype=np.float64)
+    for column in range(key.shape[0]):
+        marks_obtained += np.where(correct[:, column], marks[column], np.where(wrong[:, column], penalty, 0.0))
+
+    # Ensure marks don't go below 0
+    marks_obtained = np.maximum(marks_obtained, 0.0)
+
+    if plan.total_marks > 0:
+        percentage = (marks_obtained / plan.total_marks) * 100
+    else:
+        percentage = np.zeros_like(marks_obtained)
+
+    return {
+        'marks_obtained': marks_obtained,
+        'percentage': percentage,
+        'passed': marks_obtained >= plan.passing_marks,
+        'correct_answers': correct_count,
+        'wrong_answers': wrong_count,
+        'unanswered': unanswered_count
+    }
+
+class ScoringPlan:
+    """An exam's answer key compiled for grading"""
+    __slots__ = ('question_index', 'key', 'marks', 'penalty', 'total_marks', 'passing_marks')
+
+    def __init__(self, exam, questions):
+        self.question_index = {str(q.id): i for i, q in enumerate(questions)}
+        self.key = np.array([ANSWER_CODES[q.correct_answer] for q in questions], dtype=np.int8)
+        self.marks = np.array([q.marks for q in questions], dtype=np.float64)
+        self.penalty = -float(exam.negative_marks_value or 0.0) if exam.negative_marking else 0.0
+        self.total_marks = exam.total_marks
+        self.passing_marks = exam.passing_marks
+
+def compile_plan(exam):
+    questions = db.session.query(Question.id, Question.correct_answer, Question.marks).filter(
+        Question.exam_id == exam.id
+    ).order_by(Question.id).all()
+    return ScoringPlan(exam, questions)
+
+_plans = ExamCache(compile_plan)
+
+def scoring_plan(exam):
+    """Return the compiled plan for an exam from the per-worker cache"""
+    return _plans.get(exam)
+
+def grade_answers(plan, answers):
+    """Score a single answer map; returns the Result fields"""
+    scores = score_matrix(answer_matrix([answers], plan.question_index), plan)
+    return {
+        'marks_obtained': float(scores['marks_obtained'][0]),
+        'total_marks': plan.total_marks,
+        'percentage': float(scores['percentage'][0]),
+        'passed': bool(scores['passed'][0]),
+        'correct_answers': int(scores['correct_answers'][0]),
+        'wrong_answers': int(scores['wrong_answers'][0]),
+        'unanswered': int(scores['unanswered'][0])
+    }
+
+def grade_attempts(plan, attempts):
+    """Score many answer maps at once; returns Result fields per attempt.
+
+    Equal to calling grade_answers on each map, in one matrix pass.
+    """
+    if not attempts:
+        return []
+    scores = score_matrix(answer_matrix(attempts, plan.question_index), plan)
+    return [{
+        'marks_obtained': marks_obtained,
+        'total_marks': plan.total_marks,
+        'percentage': percentage,
+        'passed': passed,
+        'correct_answers': correct_answers,
+        'wrong_answers': wrong_answers,
+        'unanswered': unanswered
+    } for marks_obtained, percentage, passed, correct_answers, wrong_answers, unanswered in zip(
+        scores['marks_obtained'].tolist(),
+        scores['percentage'].tolist(),
+        scores['passed'].tolist(),
+        scores['correct_answers'].tolist(),
+        scores['wrong_answers'].tolist(),
+        scores['unanswered'].tolist()
+    )]
+
+def regrade_exam(exam, chunk_size=1000):
+    """Re-score every completed attempt of an exam against the current key.
+
+    Result rows are bulk-updated by primary key in chunks. The caller
+    commits. Returns the number of results updated.
+    """
+    plan = compile_plan(exam)
+
+    rows = db.session.query(Result.id, ExamSession.answers).join(
+        ExamSession, Result.session_id == ExamSession.id
+    ).filter(
+        Result.exam_id == exam.id,
+        ExamSession.is_completed == True
+    ).all()
+    if not rows:
+        return 0
+
+    result_ids = [row.id for row in rows]
+    matrix = answer_matrix([json.loads(row.answers) if row.answers else {} for row in rows], plan.question_index)
+    scores = score_matrix(matrix, plan)
+
+    for start in range(0, len(result_ids), chunk_size):
+        end = start + chunk_size
+        db.session.execute(update(Result), [{
+            'id': result_id,
+            'marks_obtained': marks_obtained,
+            'total_marks': plan.total_marks,
+            'percentage': percentage,
+            'passed': passed,
+            'correct_answers': correct_answers,
+            'wrong_answers': wrong_answers,
+            'unanswered': unanswered
+        } for result_id, marks_obtained, percentage, passed, correct_answers, wrong_answers, unanswered in zip(
+            result_ids[start:end],
+            scores['marks_obtained'][start:end].tolist(),
+            scores['percentage'][start:end].tolist(),
+            scores['passed'][start:end].tolist(),
+            scores['correct_answers'][start:end].tolist(),
+            scores['wrong_answers'][start:end].tolist(),
+            scores['unanswered'][start:end].tolist()
+        )])
+    return len(result_ids)
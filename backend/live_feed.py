@@ -0,0 +1,235 @@
+import asyncio
+import atexit
+import glob
+import hashlib
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+MAX_DATAGRAM = 64 * 1024
+
+# Stop proxies such as nginx from buffering the stream
+SSE_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+def default_directory(database_uri):
+    """Per-database socket directory, so deployments sharing a host don't share a feed"""
+    digest = hashlib.sha1(database_uri.encode('utf-8')).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), f'exam-live-feed-{digest}')
+
+def sse_message(event):
+    """Server-Sent Events frame for a feed event"""
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+class Subscription:
+    """One listener on an exam's feed; deliver must not block"""
+
+    def __init__(self, feed, exam_id, deliver):
+        self.feed = feed
+        self.exam_id = exam_id
+        self.deliver = deliver
+
+    def close(self):
+        self.feed.unsubscribe(self)
+
+class LiveFeed:
+    """In-process pub/sub of proctoring events per exam.
+
+    Routes publish after they commit; admin streams subscribe to an exam and
+    never touch the database. A worker with at least one subscriber binds a
+    datagram socket in LIVE_FEED_DIR, and every publish is also sent to the
+    sockets of the other workers on this host, so one admin connection sees
+    events handled by any worker. The directory must be private to the
+    current user; when it is not, or the bind fails, the worker falls back
+    to in-process delivery.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.directory = ''
+        self.keepalive = 15.0
+        self.queue_size = 1000
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._socket = None
+        self._socket_path = None
+        self._pid = None
+        self._peers = []
+        self._peers_checked = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.directory = app.config.get('LIVE_FEED_DIR', '')
+        self.keepalive = float(app.config.get('LIVE_FEED_KEEPALIVE', 15))
+        self.queue_size = int(app.config.get('LIVE_FEED_QUEUE_SIZE', 1000))
+        app.extensions['live_feed'] = self
+        atexit.register(self._unbind)
+
+    def subscribe(self, exam_id, deliver):
+        subscription = Subscription(self, exam_id, deliver)
+        with self._lock:
+            self._subscribers.setdefault(exam_id, set()).add(subscription)
+        self._ensure_bound()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.exam_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.exam_id]
+
+    def publish(self, exam_id, event_type, **data):
+        event = {'type': event_type, 'exam_id': exam_id, 'at': datetime.utcnow().isoformat(), **data}
+        self._deliver(event)
+        self._send_to_peers(event)
+        return event
+
+    async def stream_async(self, exam_id):
+        """Async iterator of SSE frames for one exam, for the ASGI live endpoint.
+
+        Only the async app serves the feed: a long-lived stream would hold a
+        WSGI worker for as long as the admin watches. Ends when the listener
+        falls queue_size events behind; EventSource clients reconnect on
+        their own.
+        """
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue(maxsize=self.queue_size)
+        overflow = asyncio.Event()
+
+        def put(event):
+            try:
+                events.put_nowait(event)
+            except asyncio.QueueFull:
+                overflow.set()
+
+        subscription = self.subscribe(exam_id, lambda event: loop.call_soon_threadsafe(put, event))
+        try:
+            yield 'retry: 3000\n\n'
+            while not overflow.is_set():
+                try:
+                    event = await asyncio.wait_for(events.get(), self.keepalive)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                yield sse_message(event)
+        finally:
+            subscription.close()
+
+    def _deliver(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(event['exam_id'], ()))
+        for subscription in subscribers:
+            try:
+                subscription.deliver(event)
+            except RuntimeError:
+                # The listener's event loop closed before it unsubscribed
+                pass
+
+    def _send_to_peers(self, event):
+        if not self.directory or not hasattr(socket, 'AF_UNIX'):
+            return
+
+        payload = json.dumps(event).encode()
+        if len(payload) > MAX_DATAGRAM:
+            return
+        sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sender.setblocking(False)
+        try:
+            for path in self._peer_paths():
+                try:
+                    sender.sendto(payload, path)
+                except BlockingIOError:
+                    # A peer that is not draining its socket loses the event
+                    pass
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # Left behind by a worker that did not exit cleanly
+                    self._forget_peer(path)
+                except OSError:
+                    pass
+        finally:
+            sender.close()
+
+    def _peer_paths(self):
+        # Workers come and go rarely; rescan the directory once a second
+        now = time.monotonic()
+        if now - self._peers_checked > 1.0:
+            self._peers = glob.glob(os.path.join(self.directory, '*.sock'))
+            self._peers_checked = now
+        return [path for path in self._peers if path != self._socket_path]
+
+    def _forget_peer(self, path):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        self._peers_checked = 0.0
+
+    def _ensure_bound(self):
+        # Sockets and threads do not survive a fork, so bind once per worker
+        if not self.directory or not hasattr(socket, 'AF_UNIX'):
+            return
+        if self._socket is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._socket is not None and self._pid == os.getpid():
+                return
+            try:
+                receiver, path = self._bind()
+            except OSError:
+                # Other workers' events are lost, but this worker's still reach its listeners
+                if self.app is not None:
+                    self.app.logger.warning('Live feed cannot bind in %s; delivering in-process only',
+                                            self.directory, exc_info=True)
+                self.directory = ''
+                return
+            self._socket, self._socket_path, self._pid = receiver, path, os.getpid()
+            self._peers_checked = 0.0
+            threading.Thread(target=self._receive, args=(receiver,), name='live-feed', daemon=True).start()
+
+    def _bind(self):
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        # Anyone who can write here can inject events into the feed
+        info = os.stat(self.directory)
+        if info.st_mode & 0o077 or (hasattr(os, 'getuid') and info.st_uid != os.getuid()):
+            raise PermissionError(f'{self.directory} must be owned by this user with mode 0700')
+        path = os.path.join(self.directory, f'{os.getpid()}.sock')
+        if os.path.exists(path):
+            os.unlink(path)
+        receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            receiver.bind(path)
+        except OSError:
+            receiver.close()
+            raise
+        return receiver, path
+
+    def _receive(self, receiver):
+        while True:
+            try:
+                payload = receiver.recv(MAX_DATAGRAM)
+            except OSError:
+                return
+            try:
+                event = json.loads(payload)
+            except ValueError:
+                continue
+            self._deliver(event)
+
+    def _unbind(self):
+        if self._socket is None or self._pid != os.getpid():
+            return
+        self._socket.close()
+        try:
+            os.unlink(self._socket_path)
+        except OSError:
+            pass
+        self._socket = None
+
+live_feed = LiveFeed()
@@ -0,0 +1,206 @@
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from flask import g, request
+from sqlalchemy import event
+from app import db
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_profile = ContextVar('request_profile', default=None)
+
+class RequestProfile:
+    """SQL issued while handling one sampled request"""
+    __slots__ = ('started', 'statements', 'sql_seconds', 'texts')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.sql_seconds = 0.0
+        self.texts = Counter()
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {self.count}'
+        yield f'{name}_sum{{{labels}}} {self.sum:.6f}'
+        yield f'{name}_count{{{labels}}} {self.count}'
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _normalize(statement):
+    return re.sub(r'\s+', ' ', statement).strip()
+
+class RequestMetrics:
+    """Per-endpoint latency and SQL counters in Prometheus text format.
+
+    A METRICS_SAMPLE_RATE share of requests is profiled: its latency, the
+    statements it issues and their time are recorded per endpoint. A request
+    that runs the same SQL at least METRICS_REPEAT_THRESHOLD times is
+    counted and logged once per endpoint and statement as a likely N+1.
+    With the rate at 0 no hooks are installed. Counters are per worker.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.sample_rate = 0.0
+        self.repeat_threshold = 10
+        self.token = None
+        self._latency = {}
+        self._sql = {}
+        self._reported = set()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.sample_rate = float(app.config.get('METRICS_SAMPLE_RATE', 0))
+        self.repeat_threshold = int(app.config.get('METRICS_REPEAT_THRESHOLD', 10))
+        self.token = app.config.get('METRICS_TOKEN') or None
+        app.extensions['request_metrics'] = self
+        if not self.enabled:
+            return
+
+        with app.app_context():
+            self.instrument_engine(db.engine)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    @property
+    def enabled(self):
+        return self.sample_rate > 0
+
+    def instrument_engine(self, engine):
+        """Count the statements an engine runs for profiled requests"""
+        if not self.enabled:
+            return
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    def start(self):
+        """Begin profiling the current request if it is sampled; returns a token or None"""
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return None
+        return _profile.set(RequestProfile())
+
+    def finish(self, token, endpoint, method, status):
+        """Record the profiled request started with token"""
+        profile = _profile.get()
+        _profile.reset(token)
+        elapsed = time.perf_counter() - profile.started
+
+        statement, repeats = profile.texts.most_common(1)[0] if profile.texts else (None, 0)
+        repeated = repeats >= self.repeat_threshold
+        first_report = False
+
+        with self._lock:
+            key = (endpoint, method, str(status))
+            histogram = self._latency.get(key)
+            if histogram is None:
+                histogram = self._latency[key] = Histogram(LATENCY_BUCKETS)
+            histogram.observe(elapsed)
+
+            sql = self._sql.get(endpoint)
+            if sql is None:
+                sql = self._sql[endpoint] = [Histogram(STATEMENT_BUCKETS), 0.0, 0]
+            sql[0].observe(profile.statements)
+            sql[1] += profile.sql_seconds
+            if repeated:
+                sql[2] += 1
+                first_report = (endpoint, statement) not in self._reported
+                self._reported.add((endpoint, statement))
+
+        if first_report:
+            self.app.logger.warning('Possible N+1 in %s: %d executions of %s', endpoint, repeats, _normalize(statement))
+
+    def render(self):
+        """All counters in the Prometheus text exposition format"""
+        with self._lock:
+            latency = sorted(self._latency.items())
+            sql = sorted(self._sql.items())
+            lines = [
+                '# HELP http_request_duration_seconds Time to produce a response, per endpoint',
+                '# TYPE http_request_duration_seconds histogram',
+            ]
+            for (endpoint, method, status), histogram in latency:
+                labels = f'endpoint="{_label(endpoint)}",method="{method}",status="{status}"'
+                lines.extend(histogram.lines('http_request_duration_seconds', labels))
+
+            lines += [
+                '# HELP sql_statements_per_request SQL statements issued by one request',
+                '# TYPE sql_statements_per_request histogram',
+            ]
+            for endpoint, (histogram, _, _) in sql:
+                lines.extend(histogram.lines('sql_statements_per_request', f'endpoint="{_label(endpoint)}"'))
+
+            lines += [
+                '# HELP sql_duration_seconds_total Time spent executing SQL',
+                '# TYPE sql_duration_seconds_total counter',
+            ]
+            lines += [f'sql_duration_seconds_total{{endpoint="{_label(e)}"}} {s[1]:.6f}' for e, s in sql]
+
+            lines += [
+                '# HELP sql_repeated_statement_requests_total Requests that ran one statement at least the repeat threshold times',
+                '# TYPE sql_repeated_statement_requests_total counter',
+            ]
+            lines += [f'sql_repeated_statement_requests_total{{endpoint="{_label(e)}"}} {s[2]}' for e, s in sql]
+        return '\n'.join(lines) + '\n'
+
+    def _before_request(self):
+        g.metrics_token = self.start()
+
+    def _after_request(self, response):
+        token = g.pop('metrics_token', None)
+        if token is not None:
+            self.finish(token, request.endpoint or 'unmatched', request.method, response.status_code)
+        return response
+
+    def _teardown_request(self, exc):
+        # after_request did not run; drop the profile without recording it
+        token = g.pop('metrics_token', None)
+        if token is not None:
+            _profile.reset(token)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _profile.get() is not None:
+        context._metrics_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _profile.get()
+    if profile is None:
+        return
+    started = getattr(context, '_metrics_started', None)
+    if started is not None:
+        profile.sql_seconds += time.perf_counter() - started
+    profile.statements += 1
+    # Compiled statements are cached, so repeats share the same text
+    profile.texts[statement] += 1
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,108 @@
+"""exam caches, answer autosave log and exam statistics
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 16:03:24.364360
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('exams', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+        batch_op.add_column(sa.Column('question_count', sa.Integer(), nullable=False, server_default='0'))
+
+    op.execute(
+        'UPDATE exams SET question_count = '
+        '(SELECT COUNT(*) FROM questions WHERE questions.exam_id = exams.id)'
+    )
+
+    with op.batch_alter_table('exam_sessions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('shuffle_seed', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('pending_answer_patches', sa.Integer(), nullable=True))
+
+    op.create_table('answer_patches',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('session_id', sa.Integer(), nullable=False),
+    sa.Column('question_id', sa.Integer(), nullable=False),
+    sa.Column('answer', sa.String(length=1), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['session_id'], ['exam_sessions.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('answer_patches', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_answer_patches_session_id'), ['session_id'], unique=False)
+
+    op.create_table('exam_statistics',
+    sa.Column('exam_id', sa.Integer(), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('passed_count', sa.Integer(), nullable=False),
+    sa.Column('percentage_sum', sa.Float(), nullable=False),
+    sa.Column('percentage_sq_sum', sa.Float(), nullable=False),
+    sa.Column('min_percentage', sa.Float(), nullable=True),
+    sa.Column('max_percentage', sa.Float(), nullable=True),
+    sa.Column('bucket_0', sa.Integer(), nullable=False),
+    sa.Column('bucket_1', sa.Integer(), nullable=False),
+    sa.Column('bucket_2', sa.Integer(), nullable=False),
+    sa.Column('bucket_3', sa.Integer(), nullable=False),
+    sa.Column('bucket_4', sa.Integer(), nullable=False),
+    sa.Column('bucket_5', sa.Integer(), nullable=False),
+    sa.Column('bucket_6', sa.Integer(), nullable=False),
+    sa.Column('bucket_7', sa.Integer(), nullable=False),
+    sa.Column('bucket_8', sa.Integer(), nullable=False),
+    sa.Column('bucket_9', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['exam_id'], ['exams.id'], ),
+    sa.PrimaryKeyConstraint('exam_id')
+    )
+
+    # Backfill statistics for results recorded before the table existed
+    bucket = 'CASE ' + ' '.join(f'WHEN percentage < {(i + 1) * 10} THEN {i}' for i in range(9)) + ' ELSE 9 END'
+    buckets = ', '.join(f'SUM(CASE WHEN {bucket} = {i} THEN 1 ELSE 0 END)' for i in range(10))
+    op.execute(
+        'INSERT INTO exam_statistics (exam_id, attempts, passed_count, percentage_sum, percentage_sq_sum, '
+        'min_percentage, max_percentage, '
+        + ', '.join(f'bucket_{i}' for i in range(10)) +
+        ', updated_at) '
+        'SELECT exam_id, COUNT(id), SUM(CASE WHEN passed THEN 1 ELSE 0 END), SUM(percentage), '
+        'SUM(percentage * percentage), MIN(percentage), MAX(percentage), '
+        + buckets +
+        ', CURRENT_TIMESTAMP FROM results GROUP BY exam_id'
+    )
+
+    # Keyset pagination indexes for result listings
+    with op.batch_alter_table('results', schema=None) as batch_op:
+        batch_op.create_index('ix_results_created_at_id', ['created_at', 'id'], unique=False)
+        batch_op.create_index('ix_results_exam_id_created_at_id', ['exam_id', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_results_student_id_created_at_id', ['student_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('results', schema=None) as batch_op:
+        batch_op.drop_index('ix_results_student_id_created_at_id')
+        batch_op.drop_index('ix_results_exam_id_created_at_id')
+        batch_op.drop_index('ix_results_created_at_id')
+
+    op.drop_table('exam_statistics')
+
+    with op.batch_alter_table('answer_patches', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_answer_patches_session_id'))
+
+    op.drop_table('answer_patches')
+
+    with op.batch_alter_table('exam_sessions', schema=None) as batch_op:
+        batch_op.drop_column('pending_answer_patches')
+        batch_op.drop_column('shuffle_seed')
+
+    with op.batch_alter_table('exams', schema=None) as batch_op:
+        batch_op.drop_column('question_count')
+        batch_op.drop_column('version')
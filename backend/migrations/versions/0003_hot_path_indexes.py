@@ -0,0 +1,74 @@
+"""hot path indexes and one result per session
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 16:20:02.118204
+
+"""
+import logging
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+
+def rebuild_statistics():
+    # The same aggregate as the 0002 backfill and exam_stats.rebuild_statistics
+    bucket = 'CASE ' + ' '.join(f'WHEN percentage < {(i + 1) * 10} THEN {i}' for i in range(9)) + ' ELSE 9 END'
+    buckets = ', '.join(f'SUM(CASE WHEN {bucket} = {i} THEN 1 ELSE 0 END)' for i in range(10))
+    op.execute('DELETE FROM exam_statistics')
+    op.execute(
+        'INSERT INTO exam_statistics (exam_id, attempts, passed_count, percentage_sum, percentage_sq_sum, '
+        'min_percentage, max_percentage, '
+        + ', '.join(f'bucket_{i}' for i in range(10)) +
+        ', updated_at) '
+        'SELECT exam_id, COUNT(id), SUM(CASE WHEN passed THEN 1 ELSE 0 END), SUM(percentage), '
+        'SUM(percentage * percentage), MIN(percentage), MAX(percentage), '
+        + buckets +
+        ', CURRENT_TIMESTAMP FROM results GROUP BY exam_id'
+    )
+
+
+def upgrade():
+    with op.batch_alter_table('exam_sessions', schema=None) as batch_op:
+        batch_op.create_index('ix_exam_sessions_student_exam_completed', ['student_id', 'exam_id', 'is_completed'], unique=False)
+
+    with op.batch_alter_table('questions', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_questions_exam_id'), ['exam_id'], unique=False)
+
+    with op.batch_alter_table('violations', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_violations_session_id'), ['session_id'], unique=False)
+
+    # A double submit could leave several results for one session; keep the
+    # first one so the unique constraint can be created, and recount the
+    # statistics the duplicates were folded into
+    deleted = op.get_bind().execute(sa.text(
+        'DELETE FROM results WHERE id NOT IN (SELECT MIN(id) FROM results GROUP BY session_id)'
+    )).rowcount
+    if deleted:
+        rebuild_statistics()
+        logger.info('Removed %d duplicate result(s) and rebuilt exam statistics', deleted)
+
+    with op.batch_alter_table('results', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_results_session_id', ['session_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('results', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_results_session_id', type_='unique')
+
+    with op.batch_alter_table('violations', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_violations_session_id'))
+
+    with op.batch_alter_table('questions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_questions_exam_id'))
+
+    with op.batch_alter_table('exam_sessions', schema=None) as batch_op:
+        batch_op.drop_index('ix_exam_sessions_student_exam_completed')
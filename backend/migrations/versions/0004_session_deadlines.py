@@ -0,0 +1,59 @@
+"""server-side session deadlines
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 17:40:12.540118
+
+"""
+from datetime import timedelta
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('exam_sessions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('deadline', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_exam_sessions_completed_deadline', ['is_completed', 'deadline'], unique=False)
+
+    # Open sessions get the deadline they would have had; date arithmetic
+    # differs between SQLite and PostgreSQL, so compute it here
+    sessions = sa.table(
+        'exam_sessions',
+        sa.column('id', sa.Integer), sa.column('exam_id', sa.Integer), sa.column('start_time', sa.DateTime),
+        sa.column('is_completed', sa.Boolean), sa.column('deadline', sa.DateTime)
+    )
+    exams = sa.table(
+        'exams',
+        sa.column('id', sa.Integer), sa.column('duration', sa.Integer), sa.column('end_time', sa.DateTime)
+    )
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(sessions.c.id, sessions.c.start_time, exams.c.duration, exams.c.end_time)
+        .join(exams, exams.c.id == sessions.c.exam_id)
+        .where(sessions.c.is_completed == False, sessions.c.start_time.isnot(None))
+    ).all()
+    deadlines = []
+    for session_id, start_time, duration, end_time in rows:
+        deadline = start_time + timedelta(minutes=duration)
+        if end_time is not None and end_time < deadline:
+            deadline = end_time
+        deadlines.append({'session_id': session_id, 'new_deadline': deadline})
+    if deadlines:
+        bind.execute(
+            sa.update(sessions).where(sessions.c.id == sa.bindparam('session_id'))
+            .values(deadline=sa.bindparam('new_deadline')),
+            deadlines
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('exam_sessions', schema=None) as batch_op:
+        batch_op.drop_index('ix_exam_sessions_completed_deadline')
+        batch_op.drop_column('deadline')
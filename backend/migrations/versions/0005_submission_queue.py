@@ -0,0 +1,28 @@
+"""queued grading of submitted sessions
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 18:12:37.804417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('exam_sessions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('grading_pending', sa.Boolean(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_exam_sessions_grading_pending'), ['grading_pending'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('exam_sessions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_exam_sessions_grading_pending'))
+        batch_op.drop_column('grading_pending')
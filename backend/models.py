@@ -1,4 +1,5 @@
 from app import db
+from flask import current_app
 from flask_login import UserMixin
 from datetime import datetime, timedelta
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -22,7 +23,9 @@ class User(UserMixin, db.Model):
     results = db.relationship('Result', backref='student', lazy=True, cascade='all, delete-orphan')
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = generate_password_hash(
+            password, current_app.config.get('PASSWORD_HASH_METHOD', 'scrypt')
+        )
     
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
@@ -74,11 +77,14 @@ class Exam(db.Model):
     created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_active = db.Column(db.Boolean, default=True)
+    version = db.Column(db.Integer, nullable=False, default=1)  # Bumped whenever cached exam data goes stale
+    question_count = db.Column(db.Integer, nullable=False, default=0)  # Maintained by the question endpoints
     
     # Relationships
     questions = db.relationship('Question', backref='exam', lazy=True, cascade='all, delete-orphan')
     exam_sessions = db.relationship('ExamSession', backref='exam', lazy=True, cascade='all, delete-orphan')
     results = db.relationship('Result', backref='exam', lazy=True, cascade='all, delete-orphan')
+    statistics = db.relationship('ExamStatistics', uselist=False, lazy=True, cascade='all, delete-orphan')
     creator = db.relationship('User', foreign_keys=[created_by])
     
     def to_dict(self, include_questions=False):
@@ -96,7 +102,7 @@ class Exam(db.Model):
             'end_time': self.end_time.isoformat() if self.end_time else None,
             'created_at': self.created_at.isoformat(),
             'is_active': self.is_active,
-            'question_count': len(self.questions)
+            'question_count': self.question_count or 0
         }
         if include_questions:
             data['questions'] = [q.to_dict() for q in self.questions]
@@ -106,7 +112,7 @@ class Question(db.Model):
     __tablename__ = 'questions'
     
     id = db.Column(db.Integer, primary_key=True)
-    exam_id = db.Column(db.Integer, db.ForeignKey('exams.id'), nullable=False)
+    exam_id = db.Column(db.Integer, db.ForeignKey('exams.id'), nullable=False, index=True)
     question_text = db.Column(db.Text, nullable=False)
     option_a = db.Column(db.String(500), nullable=False)
     option_b = db.Column(db.String(500), nullable=False)
@@ -137,15 +143,25 @@ class ExamSession(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     exam_id = db.Column(db.Integer, db.ForeignKey('exams.id'), nullable=False)
-    start_time = db.Column(db.DateTime, default=datetime.utcnow)
+    start_time = db.Column(db.DateTime, default=datetime.utcnow)  # None while pre-provisioned and not started
     end_time = db.Column(db.DateTime)
+    deadline = db.Column(db.DateTime)  # Server-side time limit, set when the session starts
     answers = db.Column(db.Text)  # JSON string of answers
     is_completed = db.Column(db.Boolean, default=False)
     violation_count = db.Column(db.Integer, default=0)
     auto_submitted = db.Column(db.Boolean, default=False)
+    shuffle_seed = db.Column(db.Integer)  # Per-session question order for randomized exams
+    pending_answer_patches = db.Column(db.Integer, default=0)  # Autosave patches not yet folded into answers
+    grading_pending = db.Column(db.Boolean, default=False, index=True)  # Submitted, waiting in the grading queue
     
     # Relationships
     violations = db.relationship('Violation', backref='session', lazy=True, cascade='all, delete-orphan')
+    answer_patches = db.relationship('AnswerPatch', backref='session', lazy=True, cascade='all, delete-orphan')
+    
+    __table_args__ = (
+        db.Index('ix_exam_sessions_student_exam_completed', 'student_id', 'exam_id', 'is_completed'),
+        db.Index('ix_exam_sessions_completed_deadline', 'is_completed', 'deadline'),
+    )
     
     def set_answers(self, answers_dict):
         self.answers = json.dumps(answers_dict)
@@ -158,8 +174,9 @@ class ExamSession(db.Model):
             'id': self.id,
             'student_id': self.student_id,
             'exam_id': self.exam_id,
-            'start_time': self.start_time.isoformat(),
+            'start_time': self.start_time.isoformat() if self.start_time else None,
             'end_time': self.end_time.isoformat() if self.end_time else None,
+            'deadline': self.deadline.isoformat() if self.deadline else None,
             'is_completed': self.is_completed,
             'violation_count': self.violation_count,
             'auto_submitted': self.auto_submitted
@@ -169,7 +186,7 @@ class Violation(db.Model):
     __tablename__ = 'violations'
     
     id = db.Column(db.Integer, primary_key=True)
-    session_id = db.Column(db.Integer, db.ForeignKey('exam_sessions.id'), nullable=False)
+    session_id = db.Column(db.Integer, db.ForeignKey('exam_sessions.id'), nullable=False, index=True)
     violation_type = db.Column(db.String(50), nullable=False)  # 'no_face', 'multiple_faces', 'tab_switch', 'exit_fullscreen'
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     details = db.Column(db.Text)
@@ -183,6 +200,15 @@ class Violation(db.Model):
             'details': self.details
         }
 
+class AnswerPatch(db.Model):
+    __tablename__ = 'answer_patches'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    session_id = db.Column(db.Integer, db.ForeignKey('exam_sessions.id'), nullable=False, index=True)
+    question_id = db.Column(db.Integer, nullable=False)
+    answer = db.Column(db.String(1))  # None clears the answer
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 class Result(db.Model):
     __tablename__ = 'results'
     
@@ -202,6 +228,15 @@ class Result(db.Model):
     
     session = db.relationship('ExamSession', foreign_keys=[session_id])
     
+    # Keyset pagination indexes; their leading columns also serve plain
+    # lookups by exam, by student and by created_at
+    __table_args__ = (
+        db.UniqueConstraint('session_id', name='uq_results_session_id'),  # One result per attempt
+        db.Index('ix_results_created_at_id', 'created_at', 'id'),
+        db.Index('ix_results_exam_id_created_at_id', 'exam_id', 'created_at', 'id'),
+        db.Index('ix_results_student_id_created_at_id', 'student_id', 'created_at', 'id'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -218,3 +253,50 @@ class Result(db.Model):
             'violation_count': self.violation_count,
             'created_at': self.created_at.isoformat()
         }
+
+class ExamStatistics(db.Model):
+    __tablename__ = 'exam_statistics'
+    
+    HISTOGRAM_BUCKETS = 10  # 10-point percentage bands, 90-100 inclusive
+    
+    exam_id = db.Column(db.Integer, db.ForeignKey('exams.id'), primary_key=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    passed_count = db.Column(db.Integer, nullable=False, default=0)
+    percentage_sum = db.Column(db.Float, nullable=False, default=0.0)
+    percentage_sq_sum = db.Column(db.Float, nullable=False, default=0.0)
+    min_percentage = db.Column(db.Float)
+    max_percentage = db.Column(db.Float)
+    bucket_0 = db.Column(db.Integer, nullable=False, default=0)
+    bucket_1 = db.Column(db.Integer, nullable=False, default=0)
+    bucket_2 = db.Column(db.Integer, nullable=False, default=0)
+    bucket_3 = db.Column(db.Integer, nullable=False, default=0)
+    bucket_4 = db.Column(db.Integer, nullable=False, default=0)
+    bucket_5 = db.Column(db.Integer, nullable=False, default=0)
+    bucket_6 = db.Column(db.Integer, nullable=False, default=0)
+    bucket_7 = db.Column(db.Integer, nullable=False, default=0)
+    bucket_8 = db.Column(db.Integer, nullable=False, default=0)
+    bucket_9 = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def histogram(self):
+        return [getattr(self, f'bucket_{i}') for i in range(self.HISTOGRAM_BUCKETS)]
+    
+    def to_dict(self):
+        attempts = self.attempts or 0
+        mean = self.percentage_sum / attempts if attempts else 0
+        variance = max(0.0, self.percentage_sq_sum / attempts - mean * mean) if attempts else 0
+        width = 100 // self.HISTOGRAM_BUCKETS
+        return {
+            'total_attempts': attempts,
+            'passed_count': self.passed_count,
+            'failed_count': attempts - self.passed_count,
+            'avg_percentage': round(mean, 2),
+            'std_dev_percentage': round(variance ** 0.5, 2),
+            'pass_rate': round((self.passed_count / attempts) * 100, 2) if attempts else 0,
+            'min_percentage': self.min_percentage,
+            'max_percentage': self.max_percentage,
+            'histogram': [{
+                'range': f'{i * width}-{(i + 1) * width}',
+                'count': count
+            } for i, count in enumerate(self.histogram())]
+        }
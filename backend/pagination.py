@@ -0,0 +1,77 @@
+import base64
+from datetime import datetime
+from sqlalchemy import tuple_
+from models import Result
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+def encode_cursor(created_at, result_id):
+    raw = f'{created_at.isoformat()}|{result_id}'.encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+def decode_cursor(cursor):
+    try:
+        created_at, result_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+        return datetime.fromisoformat(created_at), int(result_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+def _parse_datetime(value, name):
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+    except ValueError:
+        raise ValueError(f'{name} must be an ISO 8601 date or datetime')
+
+def page_size(args):
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+def result_filters(args):
+    """Translate query-string filters into Result criteria.
+
+    Supports exam_id, student_id, passed, date_from and date_to. Raises
+    ValueError on malformed values.
+    """
+    criteria = []
+    for name, column in (('exam_id', Result.exam_id), ('student_id', Result.student_id)):
+        if args.get(name):
+            try:
+                criteria.append(column == int(args[name]))
+            except ValueError:
+                raise ValueError(f'{name} must be an integer')
+    if args.get('passed'):
+        if args['passed'].lower() not in ('true', 'false', '1', '0'):
+            raise ValueError('passed must be true or false')
+        criteria.append(Result.passed == (args['passed'].lower() in ('true', '1')))
+    if args.get('date_from'):
+        criteria.append(Result.created_at >= _parse_datetime(args['date_from'], 'date_from'))
+    if args.get('date_to'):
+        criteria.append(Result.created_at <= _parse_datetime(args['date_to'], 'date_to'))
+    return criteria
+
+def paginate_results(query, args):
+    """Apply keyset pagination on (created_at, id), newest first.
+
+    The query must select Result (alone or with joined columns), or a
+    projection that includes its id and created_at columns. Returns the
+    rows of the page and the cursor for the next page, or None on the last
+    page. Seeking past the cursor keeps deep pages as cheap as the first.
+    """
+    limit = page_size(args)
+    if args.get('cursor'):
+        created_at, result_id = decode_cursor(args['cursor'])
+        query = query.filter(tuple_(Result.created_at, Result.id) < tuple_(created_at, result_id))
+
+    rows = query.order_by(Result.created_at.desc(), Result.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        if not isinstance(last, Result) and isinstance(last[0], Result):
+            last = last[0]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return rows, next_cursor
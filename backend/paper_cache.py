@@ -0,0 +1,55 @@
+import hashlib
+import json
+import random
+from models import Question
+from exam_cache import ExamCache
+
+def _encode(data):
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+class ExamPaper:
+    """The student-facing exam and questions, encoded once per exam version"""
+    __slots__ = ('exam', 'questions', 'etag')
+
+    def __init__(self, exam, questions):
+        self.exam = _encode(exam.to_dict())
+        # One encoded fragment per question, in id order
+        self.questions = [_encode(q.to_dict()) for q in questions]
+        self.etag = hashlib.sha1(self.exam + b''.join(self.questions)).hexdigest()
+
+    def order(self, seed):
+        """Question order for a session; stable for the same seed"""
+        order = list(range(len(self.questions)))
+        if seed is not None:
+            random.Random(seed).shuffle(order)
+        return order
+
+    def render_questions(self, seed=None):
+        return b'[' + b','.join(self.questions[i] for i in self.order(seed)) + b']'
+
+def _build_paper(exam):
+    questions = Question.query.filter_by(exam_id=exam.id).order_by(Question.id).all()
+    return ExamPaper(exam, questions)
+
+_papers = ExamCache(_build_paper)
+
+def exam_paper(exam):
+    """Return the cached paper for an exam"""
+    return _papers.get(exam)
+
+def session_seed(exam, session):
+    """Shuffle seed for a session, or None when the exam is not randomized"""
+    if not exam.randomize_questions:
+        return None
+    # Sessions created before seeds were stored fall back to their id
+    return session.shuffle_seed if session.shuffle_seed is not None else session.id
+
+def render_start_payload(paper, session, seed, answers):
+    """Assemble the start_exam body around the pre-encoded paper"""
+    return b''.join([
+        b'{"session":', _encode(session.to_dict()),
+        b',"exam":', paper.exam,
+        b',"questions":', paper.render_questions(seed),
+        b',"answers":', _encode(answers),
+        b'}'
+    ])
@@ -0,0 +1,97 @@
+import os
+import threading
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from werkzeug.security import generate_password_hash, check_password_hash
+
+class LoginBusy(Exception):
+    """Raised when every password-check slot is taken"""
+
+class PasswordHasher:
+    """Runs password hashing off the request thread.
+
+    With LOGIN_POOL_WORKERS > 0 checks go to a bounded process pool and at
+    most LOGIN_QUEUE_LIMIT may be in flight per worker; further calls raise
+    LoginBusy at once instead of queueing behind a login storm. With 0 the
+    hash runs inline as before. Bulk hashing for roster imports uses its
+    own short-lived pool of BULK_HASH_WORKERS processes.
+    """
+
+    def __init__(self, app=None):
+        self.workers = 0
+        self.queue_limit = 0
+        self.retry_after = 2
+        self.method = 'scrypt'
+        self.bulk_workers = 1
+        self._slots = None
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._method_prefix = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.workers = int(app.config.get('LOGIN_POOL_WORKERS', 0))
+        self.queue_limit = int(app.config.get('LOGIN_QUEUE_LIMIT') or self.workers * 4)
+        self.retry_after = int(app.config.get('LOGIN_RETRY_AFTER', 2))
+        self.method = app.config.get('PASSWORD_HASH_METHOD', 'scrypt')
+        self.bulk_workers = int(app.config.get('BULK_HASH_WORKERS') or os.cpu_count() or 1)
+        self._slots = threading.BoundedSemaphore(self.queue_limit) if self.workers > 0 else None
+        self._method_prefix = None
+        app.extensions['password_hasher'] = self
+
+    def check(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def hash_many(self, passwords, workers=None):
+        """Hash many passwords across a process pool; returns hashes in order"""
+        workers = min(workers or self.bulk_workers, len(passwords))
+        hash_one = partial(generate_password_hash, method=self.method)
+        if workers <= 1:
+            return [hash_one(password) for password in passwords]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(hash_one, passwords, chunksize=max(1, len(passwords) // (workers * 4))))
+
+    def needs_rehash(self, password_hash):
+        """True if the hash was made with a different method or cost"""
+        if self._method_prefix is None:
+            # Expand e.g. 'scrypt' to 'scrypt:32768:8:1' once per process
+            self._method_prefix = generate_password_hash('', self.method).split('$', 1)[0]
+        return password_hash.split('$', 1)[0] != self._method_prefix
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+    def _run(self, func, *args):
+        if self._slots is None:
+            return func(*args)
+
+        if not self._slots.acquire(blocking=False):
+            raise LoginBusy()
+        try:
+            return self._get_executor().submit(func, *args).result()
+        except BrokenProcessPool:
+            # A pool process died; start a fresh pool on the next call
+            with self._lock:
+                self._executor = None
+            raise
+        finally:
+            self._slots.release()
+
+    def _get_executor(self):
+        # Pools do not survive a fork, so create one per worker process
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                self._pid = os.getpid()
+            return self._executor
+
+password_hasher = PasswordHasher()
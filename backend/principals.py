@@ -0,0 +1,116 @@
+import threading
+import time
+from collections import OrderedDict
+from flask_login import UserMixin
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app import db
+from models import User
+
+PRINCIPAL_COLUMNS = (User.id, User.role, User.username)
+
+class UserPrincipal(UserMixin):
+    """Lightweight stand-in for User on authenticated requests.
+
+    Carries only what the auth decorators and routes read from current_user;
+    load the User row explicitly when more is needed.
+    """
+
+    def __init__(self, id, role, username):
+        self.id = id
+        self.role = role
+        self.username = username
+
+class PrincipalCache:
+    """Bounded TTL cache of user principals for the Flask-Login loader.
+
+    Entries are dropped when a user's password or role changes in this
+    worker; the TTL bounds how long other workers can serve a stale entry.
+    """
+
+    def __init__(self, maxsize=10000, ttl=60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.maxsize = int(app.config.get('PRINCIPAL_CACHE_SIZE', 10000))
+        self.ttl = float(app.config.get('PRINCIPAL_CACHE_TTL', 60.0))
+        app.extensions['principal_cache'] = self
+
+    def get(self, user_id):
+        principal = self.lookup(user_id)
+        if principal is not None:
+            return principal
+
+        row = db.session.query(*PRINCIPAL_COLUMNS).filter(User.id == user_id).first()
+        if row is None:
+            return None
+        return self.store(UserPrincipal(*row))
+
+    def lookup(self, user_id):
+        """Cached principal for user_id, or None; counts a hit or a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        return None
+
+    def store(self, principal):
+        if self.ttl > 0:
+            with self._lock:
+                self._entries[principal.id] = (time.monotonic() + self.ttl, principal)
+                self._entries.move_to_end(principal.id)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return principal
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'ttl': self.ttl
+            }
+
+principal_cache = PrincipalCache()
+
+# Watched User columns; changing either drops the cached principal
+_PRINCIPAL_FIELDS = ('password_hash', 'role')
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changed_users(session, flush_context):
+    changed = session.info.setdefault('changed_principals', set())
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            changed.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, User):
+            state = inspect(obj)
+            if any(state.attrs[name].history.has_changes() for name in _PRINCIPAL_FIELDS):
+                changed.add(obj.id)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_changed_users(session):
+    for user_id in session.info.pop('changed_principals', ()):
+        principal_cache.invalidate(user_id)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_changed_users(session):
+    session.info.pop('changed_principals', None)
@@ -0,0 +1,101 @@
+import csv
+import io
+import json
+from datetime import datetime
+from sqlalchemy import func, insert, select, update
+from app import db
+from models import Exam, Question
+from exam_cache import invalidate_exam
+
+IMPORT_BATCH_SIZE = 1000
+IMPORT_FORMATS = ('csv', 'json')
+
+QUESTION_FIELDS = ['question_text', 'option_a', 'option_b', 'option_c', 'option_d', 'correct_answer', 'marks']
+OPTION_MAX_LENGTH = 500
+
+def parse_questions(text, import_format):
+    """Rows of a CSV file with a header line, or of a JSON list of objects.
+
+    A JSON object with a 'questions' list is accepted too. Raises
+    ValueError if the document itself cannot be read.
+    """
+    if import_format == 'csv':
+        return list(csv.DictReader(io.StringIO(text)))
+
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f'Invalid JSON: {e}')
+    if isinstance(data, dict):
+        data = data.get('questions')
+    if not isinstance(data, list):
+        raise ValueError('JSON must be a list of questions or an object with a questions list')
+    return data
+
+def validate_question(row):
+    """Column values for a question row, or (None, error)"""
+    if not isinstance(row, dict):
+        return None, 'must be an object'
+
+    missing = [field for field in QUESTION_FIELDS if row.get(field) in (None, '')]
+    if missing:
+        return None, f'{", ".join(missing)} required'
+
+    values = {}
+    for field in ('question_text', 'option_a', 'option_b', 'option_c', 'option_d'):
+        value = row[field]
+        if not isinstance(value, str):
+            return None, f'{field} must be text'
+        if field != 'question_text' and len(value) > OPTION_MAX_LENGTH:
+            return None, f'{field} is longer than {OPTION_MAX_LENGTH} characters'
+        values[field] = value
+
+    correct_answer = row['correct_answer']
+    if not isinstance(correct_answer, str) or correct_answer.strip().upper() not in ('A', 'B', 'C', 'D'):
+        return None, 'correct_answer must be A, B, C, or D'
+    values['correct_answer'] = correct_answer.strip().upper()
+
+    marks = row['marks']
+    if isinstance(marks, str):
+        marks = marks.strip()
+        marks = int(marks) if marks.isdigit() else None
+    if isinstance(marks, bool) or not isinstance(marks, int) or marks < 1:
+        return None, 'marks must be a positive whole number'
+    values['marks'] = marks
+    return values, None
+
+def import_questions(exam_id, rows, sync_total_marks=True):
+    """Validate question rows and insert the valid ones for an exam.
+
+    Invalid rows are reported, not inserted. Valid rows go in with batched
+    multi-row inserts, the exam's caches are invalidated and, with
+    sync_total_marks, Exam.total_marks is set to the sum of its question
+    marks. The caller commits. Returns (imported count, errors), where
+    errors are {'row': 1-based row number, 'error': message}.
+    """
+    now = datetime.utcnow()
+    valid = []
+    errors = []
+    for number, row in enumerate(rows, start=1):
+        values, error = validate_question(row)
+        if error:
+            errors.append({'row': number, 'error': error})
+        else:
+            values['exam_id'] = exam_id
+            values['created_at'] = now
+            valid.append(values)
+
+    for offset in range(0, len(valid), IMPORT_BATCH_SIZE):
+        db.session.execute(insert(Question), valid[offset:offset + IMPORT_BATCH_SIZE])
+
+    if valid:
+        invalidate_exam(exam_id, questions_added=len(valid))
+        if sync_total_marks:
+            question_marks = select(func.coalesce(func.sum(Question.marks), 0)).where(
+                Question.exam_id == exam_id
+            ).scalar_subquery()
+            db.session.execute(
+                update(Exam).where(Exam.id == exam_id).values(total_marks=question_marks)
+                .execution_options(synchronize_session=False)
+            )
+    return len(valid), errors
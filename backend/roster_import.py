@@ -0,0 +1,98 @@
+import csv
+import io
+import secrets
+from datetime import datetime
+from sqlalchemy import insert, select
+from app import db
+from models import User
+from password_pool import password_hasher
+
+ROSTER_BATCH_SIZE = 1000
+REPORT_FIELDS = ['row', 'username', 'email', 'status', 'error', 'password']
+
+def parse_roster(text):
+    """Rows of a roster CSV with username, email and optional password columns"""
+    return list(csv.DictReader(io.StringIO(text)))
+
+def validate_student(row):
+    """(username, email, password or None), or (None, error)"""
+    username = (row.get('username') or '').strip()
+    email = (row.get('email') or '').strip()
+    password = row.get('password') or None
+    if not username or not email:
+        return None, 'username and email are required'
+    if len(username) > 80:
+        return None, 'username is longer than 80 characters'
+    if len(email) > 120 or '@' not in email:
+        return None, 'email is not a valid address'
+    return (username, email, password), None
+
+def _existing(column, values):
+    # Chunked IN lists keep each query under the bind parameter limits
+    values = list(values)
+    found = set()
+    for offset in range(0, len(values), ROSTER_BATCH_SIZE):
+        found.update(db.session.execute(
+            select(column).where(column.in_(values[offset:offset + ROSTER_BATCH_SIZE]))
+        ).scalars())
+    return found
+
+def import_roster(rows, workers=None):
+    """Create student accounts for the valid rows of a roster.
+
+    Username and email conflicts, within the file and against existing
+    users, are found with set-based queries. Students without a password
+    get a generated one, returned in their report row. Passwords are hashed
+    across a process pool and users inserted in batches. The caller
+    commits. Returns (created count, report rows).
+    """
+    report = []
+    candidates = []
+    seen_usernames = set()
+    seen_emails = set()
+    for number, row in enumerate(rows, start=1):
+        values, error = validate_student(row)
+        entry = {'row': number, 'username': row.get('username'), 'email': row.get('email')}
+        if not error:
+            username, email, password = values
+            if username in seen_usernames:
+                error = 'username appears earlier in the roster'
+            elif email in seen_emails:
+                error = 'email appears earlier in the roster'
+            seen_usernames.add(username)
+            seen_emails.add(email)
+        if error:
+            entry.update(status='rejected', error=error)
+        else:
+            candidates.append((entry, username, email, password))
+        report.append(entry)
+
+    taken_usernames = _existing(User.username, [c[1] for c in candidates])
+    taken_emails = _existing(User.email, [c[2] for c in candidates])
+
+    accepted = []
+    for entry, username, email, password in candidates:
+        if email in taken_emails:
+            entry.update(status='rejected', error='Email already registered')
+        elif username in taken_usernames:
+            entry.update(status='rejected', error='Username already taken')
+        else:
+            if password is None:
+                password = secrets.token_urlsafe(9)
+                entry['password'] = password
+            entry['status'] = 'created'
+            accepted.append((username, email, password))
+
+    if accepted:
+        hashes = password_hasher.hash_many([password for _, _, password in accepted], workers)
+        now = datetime.utcnow()
+        users = [{
+            'username': username,
+            'email': email,
+            'password_hash': password_hash,
+            'role': 'student',
+            'created_at': now
+        } for (username, email, _), password_hash in zip(accepted, hashes)]
+        for offset in range(0, len(users), ROSTER_BATCH_SIZE):
+            db.session.execute(insert(User), users[offset:offset + ROSTER_BATCH_SIZE])
+    return len(accepted), report
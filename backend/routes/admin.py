@@ -1,9 +1,24 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from flask_login import login_required, current_user
 from app import db
-from models import Exam, Question, User, Result
+from models import Exam, Question, User, Result, ExamStatistics, ExamSession, Violation, AnswerPatch
+from grading import regrade_exam
+from exam_start import provision_sessions
+from exam_timer import reschedule_sessions
+from exam_cache import invalidate_exam
+from question_import import parse_questions, import_questions, IMPORT_FORMATS
+from roster_import import parse_roster, import_roster
+from exam_stats import rebuild_statistics, empty_statistics
+from pagination import result_filters, paginate_results
+from principals import principal_cache
+from violation_buffer import violation_buffer
+from metrics import request_metrics, PROMETHEUS_CONTENT_TYPE
+from serialization import EXAM_COLUMNS, RESULT_COLUMNS, records, json_response
+from sqlalchemy import func, select, delete
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 from functools import wraps
+import hmac
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -21,10 +36,8 @@ def admin_required(f):
 @admin_required
 def get_exams():
     try:
-        exams = Exam.query.all()
-        return jsonify({
-            'exams': [exam.to_dict() for exam in exams]
-        }), 200
+        rows = db.session.execute(select(*EXAM_COLUMNS)).all()
+        return json_response({'exams': records(rows)})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -121,6 +134,11 @@ def update_exam(exam_id):
         if 'is_active' in data:
             exam.is_active = data['is_active']
         
+        # Open sessions keep their clocks in step with the new timing
+        if 'duration' in data or 'end_time' in data:
+            reschedule_sessions(exam)
+        
+        exam.version = Exam.version + 1
         db.session.commit()
         
         return jsonify({
@@ -140,7 +158,7 @@ def delete_exam(exam_id):
         if not exam:
             return jsonify({'error': 'Exam not found'}), 404
         
-        db.session.delete(exam)
+        _delete_exam_rows(exam.id)
         db.session.commit()
         
         return jsonify({'message': 'Exam deleted successfully'}), 200
@@ -149,6 +167,21 @@ def delete_exam(exam_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def _delete_exam_rows(exam_id):
+    # Set-based deletes, children first; the ORM cascade would load every
+    # session and then its violations and answer patches one by one
+    sessions = select(ExamSession.id).where(ExamSession.exam_id == exam_id)
+    for model, criteria in (
+        (Violation, Violation.session_id.in_(sessions)),
+        (AnswerPatch, AnswerPatch.session_id.in_(sessions)),
+        (Result, Result.exam_id == exam_id),
+        (ExamSession, ExamSession.exam_id == exam_id),
+        (Question, Question.exam_id == exam_id),
+        (ExamStatistics, ExamStatistics.exam_id == exam_id),
+        (Exam, Exam.id == exam_id),
+    ):
+        db.session.execute(delete(model).where(criteria).execution_options(synchronize_session=False))
+
 # Question Management
 @admin_bp.route('/exams/<int:exam_id>/questions', methods=['POST'])
 @admin_required
@@ -182,6 +215,7 @@ def add_question(exam_id):
         )
         
         db.session.add(question)
+        invalidate_exam(exam_id, questions_added=1)
         db.session.commit()
         
         return jsonify({
@@ -193,6 +227,51 @@ def add_question(exam_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@admin_bp.route('/exams/<int:exam_id>/questions/import', methods=['POST'])
+@admin_required
+def import_exam_questions(exam_id):
+    """Bulk-add questions from an uploaded CSV or JSON question bank"""
+    try:
+        exam = Exam.query.get(exam_id)
+        if not exam:
+            return jsonify({'error': 'Exam not found'}), 404
+        
+        # A multipart 'file' upload or the raw request body
+        upload = request.files.get('file')
+        if upload:
+            text = upload.read().decode('utf-8-sig')
+            guessed = 'csv' if upload.filename.lower().endswith('.csv') else 'json'
+        else:
+            text = request.get_data(as_text=True)
+            guessed = 'csv' if request.mimetype == 'text/csv' else 'json'
+        
+        import_format = request.args.get('format', guessed).lower()
+        if import_format not in IMPORT_FORMATS:
+            return jsonify({'error': 'format must be csv or json'}), 400
+        
+        rows = parse_questions(text, import_format)
+        if not rows:
+            return jsonify({'error': 'No questions to import'}), 400
+        
+        sync_total_marks = request.args.get('sync_total_marks', 'true').lower() != 'false'
+        imported, errors = import_questions(exam.id, rows, sync_total_marks)
+        db.session.commit()
+        
+        return jsonify({
+            'message': f'Imported {imported} question(s)',
+            'imported': imported,
+            'rejected': len(errors),
+            'errors': errors,
+            'exam': exam.to_dict()
+        }), 201 if imported else 400
+
+    except (ValueError, UnicodeDecodeError) as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @admin_bp.route('/questions/<int:question_id>', methods=['PUT'])
 @admin_required
 def update_question(question_id):
@@ -221,6 +300,7 @@ def update_question(question_id):
         if 'marks' in data:
             question.marks = data['marks']
         
+        invalidate_exam(question.exam_id)
         db.session.commit()
         
         return jsonify({
@@ -241,6 +321,7 @@ def delete_question(question_id):
             return jsonify({'error': 'Question not found'}), 404
         
         db.session.delete(question)
+        invalidate_exam(question.exam_id, questions_added=-1)
         db.session.commit()
         
         return jsonify({'message': 'Question deleted successfully'}), 200
@@ -249,6 +330,91 @@ def delete_question(question_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@admin_bp.route('/exams/<int:exam_id>/regrade', methods=['POST'])
+@admin_required
+def regrade(exam_id):
+    """Re-score all completed attempts against the current answer key"""
+    try:
+        exam = Exam.query.get(exam_id)
+        if not exam:
+            return jsonify({'error': 'Exam not found'}), 404
+        
+        regraded = regrade_exam(exam)
+        rebuild_statistics(exam.id)
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Exam re-graded successfully',
+            'regraded': regraded
+        }), 200
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/exams/<int:exam_id>/provision', methods=['POST'])
+@admin_required
+def provision(exam_id):
+    """Bulk-create not-yet-started sessions ahead of the exam start"""
+    try:
+        exam = Exam.query.get(exam_id)
+        if not exam:
+            return jsonify({'error': 'Exam not found'}), 404
+        
+        data = request.get_json(silent=True) or {}
+        student_ids = data.get('student_ids')
+        if student_ids is not None and (
+            not isinstance(student_ids, list) or not all(isinstance(i, int) for i in student_ids)
+        ):
+            return jsonify({'error': 'student_ids must be a list of user ids'}), 400
+        
+        created = provision_sessions(exam.id, student_ids)
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Sessions provisioned successfully',
+            'created': created
+        }), 200
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+# Student Roster
+@admin_bp.route('/students/import', methods=['POST'])
+@admin_required
+def import_students():
+    """Create student accounts from an uploaded roster CSV"""
+    try:
+        # A multipart 'file' upload or the raw CSV body
+        upload = request.files.get('file')
+        text = upload.read().decode('utf-8-sig') if upload else request.get_data(as_text=True)
+        
+        rows = parse_roster(text)
+        if not rows:
+            return jsonify({'error': 'No students to import'}), 400
+        
+        created, report = import_roster(rows)
+        db.session.commit()
+        
+        return jsonify({
+            'message': f'Created {created} student(s)',
+            'created': created,
+            'rejected': len(report) - created,
+            'report': report
+        }), 201 if created else 400
+    
+    except IntegrityError:
+        # Someone registered a listed username or email while the roster was hashed
+        db.session.rollback()
+        return jsonify({'error': 'Roster conflicts with accounts created during the import; retry it'}), 409
+    except UnicodeDecodeError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 # Analytics
 @admin_bp.route('/analytics', methods=['GET'])
 @admin_required
@@ -256,26 +422,53 @@ def get_analytics():
     try:
         total_students = User.query.filter_by(role='student').count()
         total_exams = Exam.query.count()
-        total_results = Result.query.count()
         
         # Get recent results
-        recent_results = Result.query.order_by(Result.created_at.desc()).limit(10).all()
+        recent_results = db.session.execute(
+            select(*RESULT_COLUMNS).order_by(Result.created_at.desc()).limit(10)
+        ).all()
         
-        # Calculate average performance
-        results = Result.query.all()
-        avg_percentage = sum([r.percentage for r in results]) / len(results) if results else 0
+        # Average performance from the per-exam aggregates
+        total_results, percentage_sum = db.session.query(
+            func.coalesce(func.sum(ExamStatistics.attempts), 0),
+            func.coalesce(func.sum(ExamStatistics.percentage_sum), 0.0)
+        ).one()
+        avg_percentage = percentage_sum / total_results if total_results else 0
         
-        return jsonify({
+        return json_response({
             'total_students': total_students,
             'total_exams': total_exams,
             'total_results': total_results,
             'avg_percentage': round(avg_percentage, 2),
-            'recent_results': [r.to_dict() for r in recent_results]
-        }), 200
+            'recent_results': records(recent_results)
+        })
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@admin_bp.route('/cache-stats', methods=['GET'])
+@admin_required
+def get_cache_stats():
+    # Per-worker counters; each gunicorn worker keeps its own cache and buffer
+    return jsonify({
+        'principals': principal_cache.stats(),
+        'violations': violation_buffer.stats()
+    }), 200
+
+@admin_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus scrape target: an admin session or the METRICS_TOKEN bearer token"""
+    token = request_metrics.token
+    scraper = token and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+    if not scraper:
+        if not current_user.is_authenticated:
+            return jsonify({'error': 'Authentication required'}), 401
+        if current_user.role != 'admin':
+            return jsonify({'error': 'Admin access required'}), 403
+    
+    # Per-worker counters, like the principal cache stats
+    return Response(request_metrics.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
 @admin_bp.route('/exams/<int:exam_id>/analytics', methods=['GET'])
 @admin_required
 def get_exam_analytics(exam_id):
@@ -284,31 +477,20 @@ def get_exam_analytics(exam_id):
         if not exam:
             return jsonify({'error': 'Exam not found'}), 404
         
-        results = Result.query.filter_by(exam_id=exam_id).all()
-        
-        if not results:
-            return jsonify({
-                'exam': exam.to_dict(),
-                'total_attempts': 0,
-                'avg_percentage': 0,
-                'pass_rate': 0,
-                'results': []
-            }), 200
+        stats = ExamStatistics.query.get(exam_id) or empty_statistics(exam_id)
         
-        total_attempts = len(results)
-        passed_count = sum([1 for r in results if r.passed])
-        avg_percentage = sum([r.percentage for r in results]) / total_attempts
-        pass_rate = (passed_count / total_attempts) * 100
+        # Embed one page of results; follow next_cursor for more
+        query = db.session.query(*RESULT_COLUMNS).filter(Result.exam_id == exam_id, *result_filters(request.args))
+        results, next_cursor = paginate_results(query, request.args)
         
-        return jsonify({
+        return json_response({
             'exam': exam.to_dict(),
-            'total_attempts': total_attempts,
-            'avg_percentage': round(avg_percentage, 2),
-            'pass_rate': round(pass_rate, 2),
-            'passed_count': passed_count,
-            'failed_count': total_attempts - passed_count,
-            'results': [r.to_dict() for r in results]
-        }), 200
+            **stats.to_dict(),
+            'results': records(results),
+            'next_cursor': next_cursor
+        })
     
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
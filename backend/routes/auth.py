@@ -1,7 +1,8 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, current_app, request, jsonify, session
 from flask_login import login_user, logout_user, login_required, current_user
 from app import db
 from models import User
+from password_pool import password_hasher, LoginBusy
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -93,9 +94,28 @@ def login():
         
         user = User.query.filter_by(email=data['email']).first()
         
-        if not user or not user.check_password(data['password']):
+        try:
+            valid = user is not None and password_hasher.check(user.password_hash, data['password'])
+        except LoginBusy:
+            return jsonify({'error': 'Too many sign-ins in progress, please retry shortly'}), 503, {
+                'Retry-After': str(password_hasher.retry_after)
+            }
+        
+        if not valid:
             return jsonify({'error': 'Invalid email or password'}), 401
         
+        # Upgrade hashes made with an older method or cost; a failed upgrade
+        # never fails the login
+        if password_hasher.needs_rehash(user.password_hash):
+            try:
+                user.password_hash = password_hasher.hash(data['password'])
+                db.session.commit()
+            except LoginBusy:
+                db.session.rollback()  # Try again on a later login
+            except Exception:
+                current_app.logger.exception('Password rehash failed for user %s', user.id)
+                db.session.rollback()
+        
         login_user(user, remember=True)
         
         return jsonify({
@@ -115,7 +135,8 @@ def logout():
 @auth_bp.route('/me', methods=['GET'])
 @login_required
 def get_current_user():
-    return jsonify({'user': current_user.to_dict()}), 200
+    user = User.query.get(current_user.id)
+    return jsonify({'user': user.to_dict()}), 200
 
 @auth_bp.route('/forgot-password', methods=['POST'])
 def forgot_password():
@@ -1,7 +1,10 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from flask_login import login_required, current_user
 from app import db
 from models import Result, Exam, User
+from pagination import result_filters, paginate_results
+from export import generate_csv, generate_parquet, pa
+from serialization import RESULT_COLUMNS, records, json_response
 from functools import wraps
 
 results_bp = Blueprint('results', __name__)
@@ -19,17 +22,49 @@ def admin_required(f):
 @admin_required
 def get_all_results():
     try:
-        results = Result.query.order_by(Result.created_at.desc()).all()
+        query = db.session.query(
+            *RESULT_COLUMNS, Exam.title.label('exam_title'), User.username.label('student_name')
+        ).join(
+            Exam, Result.exam_id == Exam.id
+        ).join(
+            User, Result.student_id == User.id
+        ).filter(*result_filters(request.args))
         
-        results_data = []
-        for result in results:
-            result_dict = result.to_dict()
-            result_dict['exam_title'] = result.exam.title
-            result_dict['student_name'] = result.student.username
-            results_data.append(result_dict)
+        rows, next_cursor = paginate_results(query, request.args)
         
-        return jsonify({'results': results_data}), 200
+        return json_response({'results': records(rows), 'next_cursor': next_cursor})
     
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@results_bp.route('/export', methods=['GET'])
+@admin_required
+def export_results():
+    """Stream results as CSV or Parquet with flat memory use"""
+    try:
+        export_format = request.args.get('format', 'csv').lower()
+        if export_format not in ('csv', 'parquet'):
+            return jsonify({'error': 'format must be csv or parquet'}), 400
+        if export_format == 'parquet' and pa is None:
+            return jsonify({'error': 'Parquet export requires pyarrow'}), 501
+        
+        criteria = result_filters(request.args)
+        
+        if export_format == 'csv':
+            body, mimetype = generate_csv(criteria), 'text/csv'
+        else:
+            body, mimetype = generate_parquet(criteria), 'application/vnd.apache.parquet'
+        
+        return Response(
+            stream_with_context(body),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename=results.{export_format}'}
+        )
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -1,10 +1,23 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from flask_login import login_required, current_user
 from app import db
-from models import Exam, Question, ExamSession, Result
+from models import Exam, ExamSession, Result
+from grading import grade_answers, scoring_plan
+from paper_cache import exam_paper, session_seed, render_start_payload
+from exam_stats import record_result
+from autosave import normalize_patch, append_patch, fold_answer_log, FOLD_THRESHOLD
+from exam_timer import heartbeat_statement, heartbeat_payload, session_deadline, finalize_sessions, session_sweeper
+from live_feed import live_feed
+from exam_start import start_admission
+from submission_queue import submission_queue, submitted_event
+from serialization import EXAM_COLUMNS, RESULT_COLUMNS, records, json_response
+from sqlalchemy import and_, or_, exists, select, update
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 from functools import wraps
-import random
+import json
+import math
+import secrets
 
 student_bp = Blueprint('student', __name__)
 
@@ -23,32 +36,22 @@ def get_available_exams():
     try:
         now = datetime.utcnow()
         
-        # Get active exams that are currently available
-        exams = Exam.query.filter_by(is_active=True).all()
-        
-        available_exams = []
-        for exam in exams:
-            # Check if exam is within schedule
-            is_available = True
-            if exam.start_time and exam.start_time > now:
-                is_available = False
-            if exam.end_time and exam.end_time < now:
-                is_available = False
-            
-            # Check if student has already taken the exam
-            existing_session = ExamSession.query.filter_by(
-                student_id=current_user.id,
-                exam_id=exam.id,
-                is_completed=True
-            ).first()
-            
-            exam_data = exam.to_dict()
-            exam_data['is_available'] = is_available
-            exam_data['already_taken'] = existing_session is not None
-            
-            available_exams.append(exam_data)
-        
-        return jsonify({'exams': available_exams}), 200
+        # Schedule window and completed attempts are resolved in one query
+        is_available = and_(
+            or_(Exam.start_time.is_(None), Exam.start_time <= now),
+            or_(Exam.end_time.is_(None), Exam.end_time >= now)
+        ).label('is_available')
+        already_taken = exists().where(
+            ExamSession.exam_id == Exam.id,
+            ExamSession.student_id == current_user.id,
+            ExamSession.is_completed == True
+        ).label('already_taken')
+        
+        rows = db.session.execute(
+            select(*EXAM_COLUMNS, is_available, already_taken).where(Exam.is_active == True)
+        ).all()
+        
+        return json_response({'exams': records(rows)})
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -57,6 +60,16 @@ def get_available_exams():
 @student_required
 def start_exam(exam_id):
     try:
+        # Turn the start-time herd away before it reaches the pool
+        busy = start_admission.admit()
+        if busy:
+            position, retry_after = busy
+            return jsonify({
+                'error': 'Exam start is busy, please retry shortly',
+                'queue_position': position,
+                'retry_after': round(retry_after, 1)
+            }), 503, {'Retry-After': str(math.ceil(retry_after))}
+        
         exam = Exam.query.get(exam_id)
         if not exam:
             return jsonify({'error': 'Exam not found'}), 404
@@ -72,71 +85,101 @@ def start_exam(exam_id):
         if exam.end_time and exam.end_time < now:
             return jsonify({'error': 'Exam has ended'}), 400
         
-        # Check if already taken
-        existing_session = ExamSession.query.filter_by(
+        # A completed session sorts first, else the open (possibly provisioned) one
+        session = ExamSession.query.filter_by(
             student_id=current_user.id,
-            exam_id=exam_id,
-            is_completed=True
-        ).first()
+            exam_id=exam_id
+        ).order_by(ExamSession.is_completed.desc()).first()
         
-        if existing_session:
+        if session and session.is_completed:
             return jsonify({'error': 'You have already taken this exam'}), 400
         
-        # Check for incomplete session
-        incomplete_session = ExamSession.query.filter_by(
-            student_id=current_user.id,
-            exam_id=exam_id,
-            is_completed=False
-        ).first()
-        
-        if incomplete_session:
-            # Return existing session
-            questions = Question.query.filter_by(exam_id=exam_id).all()
-            questions_data = [q.to_dict() for q in questions]
-            
-            # Randomize if needed
-            if exam.randomize_questions:
-                random.shuffle(questions_data)
+        paper = exam_paper(exam)
+        
+        if session and session.start_time and session_sweeper.is_late(session.deadline, now):
+            # Ran out of time without a submit; grade it now instead of waiting for the sweep
+            finalize_sessions([session.id], now)
+            db.session.commit()
+            return jsonify({'error': 'Time for this exam is up'}), 400
+        
+        if session and session.start_time:
+            # Return existing session with its autosaved answers
+            answers = fold_answer_log(session) if session.pending_answer_patches else session.get_answers()
+            response = _start_response(paper, exam, session, answers, 200)
+            db.session.commit()
             
-            return jsonify({
-                'session': incomplete_session.to_dict(),
-                'exam': exam.to_dict(),
-                'questions': questions_data
-            }), 200
+            return response
+        
+        if session:
+            # Pre-provisioned session: the clock starts now
+            session.start_time = now
+            session.deadline = session_deadline(exam, now)
+        else:
+            session = ExamSession(
+                student_id=current_user.id,
+                exam_id=exam_id,
+                start_time=now,
+                deadline=session_deadline(exam, now),
+                shuffle_seed=secrets.randbits(31)
+            )
+            db.session.add(session)
+        
+        # Render before commit expires the instances and they reload
+        db.session.flush()
+        session_id = session.id
+        response = _start_response(paper, exam, session, session.get_answers(), 201)
+        db.session.commit()
         
-        # Create new session
-        session = ExamSession(
+        live_feed.publish(
+            exam_id, 'session_started',
+            session_id=session_id,
             student_id=current_user.id,
-            exam_id=exam_id
+            username=current_user.username
         )
         
-        db.session.add(session)
-        db.session.commit()
+        return response
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+def _start_response(paper, exam, session, answers, status):
+    seed = session_seed(exam, session)
+    response = Response(render_start_payload(paper, session, seed, answers), status=status, mimetype='application/json')
+    response.set_etag(f'{paper.etag}-{seed}')
+    return response
+
+@student_bp.route('/sessions/<int:session_id>/questions', methods=['GET'])
+@student_required
+def get_session_questions(session_id):
+    """Question paper for a session in its own stable order"""
+    try:
+        session = ExamSession.query.get(session_id)
+        if not session:
+            return jsonify({'error': 'Session not found'}), 404
         
-        # Get questions
-        questions = Question.query.filter_by(exam_id=exam_id).all()
-        questions_data = [q.to_dict() for q in questions]
+        # Verify session belongs to current user
+        if session.student_id != current_user.id:
+            return jsonify({'error': 'Unauthorized'}), 403
         
-        # Randomize if needed
-        if exam.randomize_questions:
-            random.shuffle(questions_data)
+        exam = session.exam
+        paper = exam_paper(exam)
+        seed = session_seed(exam, session)
         
-        return jsonify({
-            'session': session.to_dict(),
-            'exam': exam.to_dict(),
-            'questions': questions_data
-        }), 201
+        response = Response(paper.render_questions(seed), mimetype='application/json')
+        response.set_etag(f'{paper.etag}-{seed}')
+        return response.make_conditional(request)
     
     except Exception as e:
-        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @student_bp.route('/sessions/<int:session_id>/submit', methods=['POST'])
 @student_required
 def submit_exam(session_id):
     try:
+        # A provisioned session does not exist for the student until it starts
         session = ExamSession.query.get(session_id)
-        if not session:
+        if not session or session.start_time is None:
             return jsonify({'error': 'Session not found'}), 404
         
         # Verify session belongs to current user
@@ -147,12 +190,22 @@ def submit_exam(session_id):
         if session.is_completed:
             return jsonify({'error': 'Exam already submitted'}), 400
         
-        data = request.get_json()
-        answers = data.get('answers', {})
+        data = request.get_json() or {}
+        now = datetime.utcnow()
+        late = session_sweeper.is_late(session.deadline, now)
+        
+        # Submitted answers take precedence over autosaved ones, unless
+        # they arrive after the deadline: then only what was saved in time counts
+        answers = fold_answer_log(session)
+        if not late:
+            answers.update(data.get('answers', {}))
+        
+        if submission_queue.enabled:
+            return _queue_submission(session, answers, now, late)
         
         # Save answers
         session.set_answers(answers)
-        session.end_time = datetime.utcnow()
+        session.end_time = session.deadline if late else now
         session.is_completed = True
         
         # Check if auto-submitted due to violations
@@ -161,73 +214,169 @@ def submit_exam(session_id):
         
         # Calculate result
         exam = session.exam
-        questions = Question.query.filter_by(exam_id=exam.id).all()
-        
-        correct_count = 0
-        wrong_count = 0
-        unanswered_count = 0
-        marks_obtained = 0.0
-        
-        for question in questions:
-            student_answer = answers.get(str(question.id), '').upper()
-            
-            if not student_answer:
-                unanswered_count += 1
-            elif student_answer == question.correct_answer:
-                correct_count += 1
-                marks_obtained += question.marks
-            else:
-                wrong_count += 1
-                # Apply negative marking if enabled
-                if exam.negative_marking:
-                    marks_obtained -= exam.negative_marks_value
-        
-        # Ensure marks don't go below 0
-        marks_obtained = max(0, marks_obtained)
-        
-        percentage = (marks_obtained / exam.total_marks) * 100 if exam.total_marks > 0 else 0
-        passed = marks_obtained >= exam.passing_marks
+        scores = grade_answers(scoring_plan(exam), answers)
         
         # Create result
         result = Result(
             student_id=current_user.id,
             exam_id=exam.id,
             session_id=session.id,
-            marks_obtained=marks_obtained,
-            total_marks=exam.total_marks,
-            percentage=percentage,
-            passed=passed,
-            correct_answers=correct_count,
-            wrong_answers=wrong_count,
-            unanswered=unanswered_count,
-            violation_count=session.violation_count
+            violation_count=session.violation_count,
+            created_at=session.end_time,
+            **scores
         )
         
         db.session.add(result)
+        record_result(result)
+        
+        # Read before commit expires the instances
+        db.session.flush()
+        exam_id = exam.id
+        result_data = result.to_dict()
+        submitted = submitted_event(result_data, current_user.username, bool(session.auto_submitted))
         db.session.commit()
         
+        live_feed.publish(exam_id, 'submitted', **submitted)
+        
         return jsonify({
             'message': 'Exam submitted successfully',
-            'result': result.to_dict()
+            'result': result_data,
+            'late': late
         }), 200
     
+    except IntegrityError:
+        # A concurrent submit already created the result for this session
+        db.session.rollback()
+        return jsonify({'error': 'Exam already submitted'}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
-@student_bp.route('/results', methods=['GET'])
+def _queue_submission(session, answers, now, late):
+    # Close the session and store its final answers in one conditional
+    # UPDATE; grading, the result and the statistics are left to the queue
+    closed = db.session.execute(
+        update(ExamSession)
+        .where(ExamSession.id == session.id, ExamSession.is_completed == False)
+        .values(
+            answers=json.dumps(answers),
+            end_time=session.deadline if late else now,
+            is_completed=True,
+            auto_submitted=bool(session.auto_submitted) or (session.violation_count or 0) >= 5,
+            grading_pending=True
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not closed:
+        db.session.rollback()
+        return jsonify({'error': 'Exam already submitted'}), 400
+    session_id = session.id
+    db.session.commit()
+    submission_queue.notify()
+    
+    response = jsonify({
+        'message': 'Exam submitted, grading in progress',
+        'status': 'pending',
+        'session_id': session_id,
+        'late': late
+    })
+    response.headers['Location'] = f'/api/student/sessions/{session_id}/result'
+    response.headers['Retry-After'] = str(max(1, math.ceil(submission_queue.interval)))
+    return response, 202
+
+@student_bp.route('/sessions/<int:session_id>/result', methods=['GET'])
 @student_required
-def get_my_results():
+def get_session_result(session_id):
+    """Poll for the result of a submitted session"""
     try:
-        results = Result.query.filter_by(student_id=current_user.id).order_by(Result.created_at.desc()).all()
+        row = db.session.query(
+            ExamSession.student_id, ExamSession.is_completed, ExamSession.grading_pending, Result
+        ).outerjoin(Result, Result.session_id == ExamSession.id).filter(ExamSession.id == session_id).first()
+        if not row:
+            return jsonify({'error': 'Session not found'}), 404
         
-        results_data = []
-        for result in results:
-            result_dict = result.to_dict()
-            result_dict['exam_title'] = result.exam.title
-            results_data.append(result_dict)
+        if row.student_id != current_user.id:
+            return jsonify({'error': 'Unauthorized'}), 403
         
-        return jsonify({'results': results_data}), 200
+        if row.Result is not None:
+            return jsonify({'status': 'graded', 'result': row.Result.to_dict()}), 200
+        if row.is_completed and row.grading_pending:
+            response = jsonify({'status': 'pending'})
+            response.headers['Retry-After'] = str(max(1, math.ceil(submission_queue.interval)))
+            return response, 202
+        return jsonify({'error': 'Exam not submitted yet'}), 400
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@student_bp.route('/sessions/<int:session_id>/answers', methods=['PATCH'])
+@student_required
+def autosave_answers(session_id):
+    """Append changed answers to the session's autosave log"""
+    try:
+        data = request.get_json() or {}
+        
+        patch, error = normalize_patch(data.get('answers'))
+        if error:
+            return jsonify({'error': error}), 400
+        
+        pending = append_patch(session_id, current_user.id, patch, session_sweeper.cutoff())
+        if pending is None:
+            db.session.rollback()
+            session = ExamSession.query.get(session_id)
+            if not session or session.start_time is None:
+                return jsonify({'error': 'Session not found'}), 404
+            if session.student_id != current_user.id:
+                return jsonify({'error': 'Unauthorized'}), 403
+            if session.is_completed:
+                return jsonify({'error': 'Exam already submitted'}), 400
+            return jsonify({'error': 'Time for this exam is up'}), 400
+        
+        # Periodically fold the log back into the session
+        if pending >= FOLD_THRESHOLD:
+            fold_answer_log(ExamSession.query.get(session_id))
+        
+        db.session.commit()
+        
+        return jsonify({
+            'message': 'Answers saved',
+            'saved': len(patch)
+        }), 200
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@student_bp.route('/sessions/<int:session_id>/heartbeat', methods=['POST'])
+@student_required
+def heartbeat(session_id):
+    """Server-side time left and violation count for an exam in progress"""
+    try:
+        row = db.session.execute(heartbeat_statement(session_id)).first()
+        if not row:
+            return jsonify({'error': 'Session not found'}), 404
+        
+        if row.student_id != current_user.id:
+            return jsonify({'error': 'Unauthorized'}), 403
+        
+        return jsonify(heartbeat_payload(row)), 200
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@student_bp.route('/results', methods=['GET'])
+@student_required
+def get_my_results():
+    try:
+        rows = db.session.execute(
+            select(*RESULT_COLUMNS, Exam.title.label('exam_title')).join(
+                Exam, Result.exam_id == Exam.id
+            ).where(
+                Result.student_id == current_user.id
+            ).order_by(Result.created_at.desc())
+        ).all()
+        
+        return json_response({'results': records(rows)})
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
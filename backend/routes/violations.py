@@ -2,6 +2,10 @@ from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
 from app import db
 from models import Violation, ExamSession
+from violation_buffer import violation_buffer
+from live_feed import live_feed
+from serialization import VIOLATION_COLUMNS, records, json_response
+from sqlalchemy import select
 from functools import wraps
 
 violations_bp = Blueprint('violations', __name__)
@@ -15,43 +19,93 @@ def student_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+MAX_BATCH_SIZE = 100
+
+def single_violation(data):
+    """Parse a log_violation body; returns (session_id, events, error)"""
+    if not data.get('session_id') or not data.get('violation_type'):
+        return None, None, 'session_id and violation_type are required'
+    
+    return data['session_id'], [{
+        'violation_type': data['violation_type'],
+        'details': data.get('details', '')
+    }], None
+
+def violation_batch(data):
+    """Parse a batch body; returns (session_id, events, error)"""
+    events = data.get('violations')
+    if not data.get('session_id') or not isinstance(events, list) or not events:
+        return None, None, 'session_id and a non-empty violations list are required'
+    
+    if len(events) > MAX_BATCH_SIZE:
+        return None, None, f'At most {MAX_BATCH_SIZE} violations per batch'
+    
+    for event in events:
+        if not isinstance(event, dict) or not event.get('violation_type'):
+            return None, None, 'Each violation requires a violation_type'
+    
+    return data['session_id'], [{
+        'violation_type': event['violation_type'],
+        'details': event.get('details', '')
+    } for event in events], None
+
+def logged_payload(logged, violation_count):
+    return {
+        'message': 'Violation logged' if logged == 1 else 'Violations logged',
+        'logged': logged,
+        'violation_count': violation_count,
+        'should_submit': violation_count >= 5
+    }
+
+def publish_violations(exam_id, session_id, student, events, violation_count):
+    """Push committed violations to the exam's live proctoring feed"""
+    live_feed.publish(
+        exam_id, 'violation',
+        session_id=session_id,
+        student_id=student.id,
+        username=student.username,
+        violations=events,
+        violation_count=violation_count,
+        should_submit=violation_count >= 5
+    )
+
+def _record_violations(session_id, events):
+    counted = violation_buffer.record(session_id, current_user.id, events)
+    if counted is None:
+        # A provisioned session does not exist for the student until it starts
+        session = ExamSession.query.get(session_id)
+        if not session or session.start_time is None:
+            return jsonify({'error': 'Session not found'}), 404
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    violation_count, exam_id = counted
+    publish_violations(exam_id, session_id, current_user, events, violation_count)
+    return jsonify(logged_payload(len(events), violation_count)), 201
+
 @violations_bp.route('', methods=['POST'])
 @student_required
 def log_violation():
     try:
-        data = request.get_json()
-        
-        # Validate required fields
-        if not data.get('session_id') or not data.get('violation_type'):
-            return jsonify({'error': 'session_id and violation_type are required'}), 400
+        session_id, events, error = single_violation(request.get_json())
+        if error:
+            return jsonify({'error': error}), 400
         
-        session = ExamSession.query.get(data['session_id'])
-        if not session:
-            return jsonify({'error': 'Session not found'}), 404
-        
-        # Verify session belongs to current user
-        if session.student_id != current_user.id:
-            return jsonify({'error': 'Unauthorized'}), 403
-        
-        # Create violation record
-        violation = Violation(
-            session_id=data['session_id'],
-            violation_type=data['violation_type'],
-            details=data.get('details', '')
-        )
-        
-        db.session.add(violation)
-        
-        # Increment violation count in session
-        session.violation_count += 1
-        
-        db.session.commit()
+        return _record_violations(session_id, events)
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@violations_bp.route('/batch', methods=['POST'])
+@student_required
+def log_violations_batch():
+    """Log several proctoring events for one session in a single request"""
+    try:
+        session_id, events, error = violation_batch(request.get_json())
+        if error:
+            return jsonify({'error': error}), 400
         
-        return jsonify({
-            'message': 'Violation logged',
-            'violation_count': session.violation_count,
-            'should_submit': session.violation_count >= 5
-        }), 201
+        return _record_violations(session_id, events)
     
     except Exception as e:
         db.session.rollback()
@@ -69,12 +123,17 @@ def get_session_violations(session_id):
         if current_user.role != 'admin' and session.student_id != current_user.id:
             return jsonify({'error': 'Unauthorized'}), 403
         
-        violations = Violation.query.filter_by(session_id=session_id).all()
+        # Make this worker's buffered rows visible before reading; rows other
+        # workers still hold appear within VIOLATION_FLUSH_INTERVAL
+        violation_buffer.flush()
+        violations = db.session.execute(
+            select(*VIOLATION_COLUMNS).where(Violation.session_id == session_id)
+        ).all()
         
-        return jsonify({
-            'violations': [v.to_dict() for v in violations],
+        return json_response({
+            'violations': records(violations),
             'total_count': len(violations)
-        }), 200
+        })
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
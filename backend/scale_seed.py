@@ -0,0 +1,255 @@
+import json
+from collections import namedtuple
+from datetime import datetime, time, timedelta
+import numpy as np
+from flask import current_app
+from sqlalchemy import func, insert, select, text
+from werkzeug.security import generate_password_hash
+from app import db
+from models import User, Exam, Question, ExamSession, Result, Violation
+from grading import ScoringPlan, score_matrix, UNANSWERED
+from exam_stats import rebuild_statistics
+
+SCALE_BATCH_SIZE = 5000
+OPTIONS = ['', 'A', 'B', 'C', 'D']  # Indexed by grading's answer codes
+VIOLATION_TYPES = ['no_face', 'multiple_faces', 'tab_switch', 'exit_fullscreen']
+VIOLATION_WEIGHTS = [0.45, 0.15, 0.3, 0.1]
+AUTO_SUBMIT_VIOLATIONS = 5
+
+_PlanExam = namedtuple('_PlanExam', 'negative_marking negative_marks_value total_marks passing_marks')
+_PlanQuestion = namedtuple('_PlanQuestion', 'id correct_answer marks')
+
+def _next_id(model):
+    return (db.session.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+def _advance_sequences(models):
+    """Move Postgres id sequences past the ids inserted explicitly, so later inserts don't collide"""
+    if db.engine.dialect.name != 'postgresql':
+        return
+    for model in models:
+        table = model.__table__.name
+        db.session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"(SELECT COALESCE(MAX(id), 0) + 1 FROM {table}), false)"
+        ))
+
+class _Batches:
+    """Rows per table, inserted and committed together every batch_size sessions"""
+
+    def __init__(self, batch_size, progress):
+        self.batch_size = batch_size
+        self.progress = progress
+        self.sessions, self.results, self.violations = [], [], []
+        self.counts = {'sessions': 0, 'results': 0, 'violations': 0}
+
+    def add(self, sessions, results, violations):
+        self.sessions += sessions
+        self.results += results
+        self.violations += violations
+        if len(self.sessions) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        # Core inserts on the tables skip the ORM's per-row bookkeeping
+        for name, model, rows in (
+            ('sessions', ExamSession, self.sessions),
+            ('results', Result, self.results),
+            ('violations', Violation, self.violations),
+        ):
+            if rows:
+                db.session.execute(insert(model.__table__), rows)
+            self.counts[name] += len(rows)
+        db.session.commit()
+        self.sessions, self.results, self.violations = [], [], []
+        if self.progress:
+            self.progress(self.counts)
+
+def _seed_users(rng, students, admins, password, now):
+    password_hash = generate_password_hash(password, current_app.config.get('PASSWORD_HASH_METHOD', 'scrypt'))
+    first_id = _next_id(User)
+    ages = rng.integers(0, 3 * 365, size=admins + students)
+    users = [{
+        'id': first_id + i,
+        'username': f'{"admin" if i < admins else "student"}{first_id + i}',
+        'email': f'{"admin" if i < admins else "student"}{first_id + i}@scale.example.com',
+        'password_hash': password_hash,
+        'role': 'admin' if i < admins else 'student',
+        'created_at': now - timedelta(days=int(ages[i]))
+    } for i in range(admins + students)]
+    for offset in range(0, len(users), SCALE_BATCH_SIZE):
+        db.session.execute(insert(User.__table__), users[offset:offset + SCALE_BATCH_SIZE])
+    return first_id, np.arange(first_id + admins, first_id + admins + students)
+
+def _seed_exams(rng, exams, questions, creator_id, now):
+    first_exam = _next_id(Exam)
+    question_id = _next_id(Question)
+    exam_rows, question_rows, papers = [], [], []
+    for i in range(exams):
+        exam_id = first_exam + i
+        count = int(rng.integers(max(1, questions // 2), questions * 3 // 2 + 1))
+        marks = rng.choice([1, 2, 4], size=count, p=[0.7, 0.2, 0.1])
+        key = rng.integers(1, 5, size=count)
+        total_marks = int(marks.sum())
+        negative = bool(rng.random() < 0.2)
+        exam = {
+            'id': exam_id,
+            'title': f'Exam {exam_id}',
+            'description': f'Generated exam with {count} questions',
+            'duration': int(rng.choice(np.arange(30, 181, 15))),
+            'total_marks': total_marks,
+            'passing_marks': int(round(total_marks * 0.4)),
+            'negative_marking': negative,
+            'negative_marks_value': 0.25 if negative else 0.0,
+            'randomize_questions': bool(rng.random() < 0.5),
+            'start_time': None,
+            'end_time': None,
+            'created_by': creator_id,
+            'created_at': now - timedelta(days=int(rng.integers(30, 365))),
+            'is_active': bool(rng.random() < 0.9),
+            'version': 1,
+            'question_count': count
+        }
+        exam_rows.append(exam)
+        ids = np.arange(question_id, question_id + count)
+        question_rows += [{
+            'id': int(qid),
+            'exam_id': exam_id,
+            'question_text': f'Question {n + 1} of exam {exam_id}',
+            'option_a': 'Option A', 'option_b': 'Option B', 'option_c': 'Option C', 'option_d': 'Option D',
+            'correct_answer': OPTIONS[code],
+            'marks': int(mark),
+            'created_at': exam['created_at']
+        } for n, (qid, code, mark) in enumerate(zip(ids, key, marks))]
+        plan = ScoringPlan(
+            _PlanExam(negative, exam['negative_marks_value'], total_marks, exam['passing_marks']),
+            [_PlanQuestion(int(qid), OPTIONS[code], int(mark)) for qid, code, mark in zip(ids, key, marks)]
+        )
+        papers.append((exam, [str(qid) for qid in ids], plan))
+        question_id += count
+
+    db.session.execute(insert(Exam.__table__), exam_rows)
+    for offset in range(0, len(question_rows), SCALE_BATCH_SIZE):
+        db.session.execute(insert(Question.__table__), question_rows[offset:offset + SCALE_BATCH_SIZE])
+    db.session.commit()
+    return papers
+
+def _attempts(rng, paper, student_ids, ability, now, first_session):
+    """Session, result and violation rows for one exam taken by student_ids"""
+    exam, question_ids, plan = paper
+    n, width = len(student_ids), len(question_ids)
+
+    # Stronger students and easier papers answer more questions correctly
+    ease = rng.uniform(0.75, 1.1)
+    correct_rate = np.clip(ability[:, None] * ease, 0.05, 0.98)
+    answered = rng.random((n, width)) < rng.uniform(0.8, 1.0, size=(n, 1))
+    correct = rng.random((n, width)) < correct_rate
+    wrong = (plan.key[None, :] + rng.integers(0, 3, size=(n, width))) % 4 + 1
+    matrix = np.where(answered, np.where(correct, plan.key[None, :], wrong), UNANSWERED).astype(np.int8)
+    scores = score_matrix(matrix, plan)
+
+    duration = timedelta(minutes=exam['duration'])
+    window = max(1, int((now - exam['created_at']).total_seconds()))
+    starts = rng.integers(0, window, size=n)
+    used = rng.uniform(0.4, 1.0, size=n)
+    bursts = rng.random(n) < 0.15
+
+    sessions, results, violations = [], [], []
+    for row in range(n):
+        session_id = first_session + row
+        start = exam['created_at'] + timedelta(seconds=int(starts[row]))
+        end = start + duration * float(used[row])
+
+        # Proctoring events arrive in bursts of a few seconds
+        events = []
+        if bursts[row]:
+            for _ in range(int(rng.integers(1, 4))):
+                at = start + (end - start) * float(rng.random())
+                for _ in range(int(rng.geometric(0.4))):
+                    at += timedelta(seconds=float(rng.exponential(2)))
+                    events.append({
+                        'session_id': session_id,
+                        'violation_type': VIOLATION_TYPES[rng.choice(4, p=VIOLATION_WEIGHTS)],
+                        'timestamp': min(at, end),
+                        'details': 'generated'
+                    })
+        violations += events
+
+        codes = matrix[row]
+        answers = {qid: OPTIONS[code] for qid, code in zip(question_ids, codes.tolist()) if code}
+        sessions.append({
+            'id': session_id,
+            'student_id': int(student_ids[row]),
+            'exam_id': exam['id'],
+            'start_time': start,
+            'end_time': end,
+            'deadline': start + duration,
+            'answers': json.dumps(answers),
+            'is_completed': True,
+            'violation_count': len(events),
+            'auto_submitted': len(events) >= AUTO_SUBMIT_VIOLATIONS,
+            'shuffle_seed': int(rng.integers(0, 2 ** 31)),
+            'pending_answer_patches': 0,
+            'grading_pending': False
+        })
+        results.append({
+            'student_id': int(student_ids[row]),
+            'exam_id': exam['id'],
+            'session_id': session_id,
+            'marks_obtained': float(scores['marks_obtained'][row]),
+            'total_marks': plan.total_marks,
+            'percentage': float(scores['percentage'][row]),
+            'passed': bool(scores['passed'][row]),
+            'correct_answers': int(scores['correct_answers'][row]),
+            'wrong_answers': int(scores['wrong_answers'][row]),
+            'unanswered': int(scores['unanswered'][row]),
+            'violation_count': len(events),
+            'created_at': end
+        })
+    return sessions, results, violations
+
+def seed_scale(students, exams, questions, attempts, admins=1, password='password123', seed=0,
+               batch_size=SCALE_BATCH_SIZE, progress=None):
+    """Bulk-generate a realistic data set for load and query testing.
+
+    Creates admins and students, exams of about `questions` questions,
+    about `attempts` completed attempts per student (popular exams taken
+    more often), their answers, graded results and bursts of violations,
+    then rebuilds the exam statistics. Rows are Core-inserted and committed
+    every batch_size sessions; on Postgres the id sequences are then
+    advanced past the explicit ids. The same seed gives the same data on
+    any machine, with timestamps relative to the start of today. Returns
+    counts per table.
+    """
+    rng = np.random.default_rng(seed)
+    now = datetime.combine(datetime.utcnow().date(), time())
+
+    first_user, student_ids = _seed_users(rng, students, admins, password, now)
+    papers = _seed_exams(rng, exams, questions, first_user, now)
+
+    # Zipf-like popularity: a few exams are taken by most students
+    popularity = 1.0 / np.arange(1, exams + 1) ** 0.8
+    popularity = rng.permutation(popularity / popularity.sum())
+    ability = rng.beta(5, 3, size=students)
+    taken = np.minimum(rng.poisson(attempts, size=students), exams)
+
+    batches = _Batches(batch_size, progress)
+    session_id = _next_id(ExamSession)
+    chunk = max(1, batch_size // max(1, attempts))
+    for offset in range(0, students, chunk):
+        # Group a chunk of students by exam so each exam is scored as one matrix
+        by_exam = {}
+        for student in range(offset, min(offset + chunk, students)):
+            for exam_index in rng.choice(exams, size=taken[student], replace=False, p=popularity):
+                by_exam.setdefault(int(exam_index), []).append(student)
+        for exam_index in sorted(by_exam):
+            members = np.array(by_exam[exam_index])
+            rows = _attempts(rng, papers[exam_index], student_ids[members], ability[members], now, session_id)
+            session_id += len(members)
+            batches.add(*rows)
+    batches.flush()
+    _advance_sequences([User, Exam, Question, ExamSession, Result, Violation])
+
+    rebuild_statistics()
+    db.session.commit()
+    return dict(users=students + admins, exams=exams,
+                questions=sum(len(paper[1]) for paper in papers), **batches.counts)
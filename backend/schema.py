@@ -0,0 +1,48 @@
+import os
+import click
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from flask.cli import ScriptInfo
+from flask_migrate import upgrade
+from app import db
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+def migration_state():
+    """Return the (current, head) migration revisions of the database"""
+    config = Config(os.path.join(MIGRATIONS_DIR, 'alembic.ini'))
+    config.set_main_option('script_location', MIGRATIONS_DIR)
+    head = ScriptDirectory.from_config(config).get_current_head()
+    with db.engine.connect() as connection:
+        current = MigrationContext.configure(connection).get_current_revision()
+    return current, head
+
+def _running_flask_cli():
+    # `flask db upgrade` and friends must be able to load an outdated app
+    ctx = click.get_current_context(silent=True)
+    return ctx is not None and ctx.find_object(ScriptInfo) is not None
+
+def check_schema(app):
+    """Verify at startup that the database is at the latest migration.
+
+    With AUTO_MIGRATE enabled an outdated database is upgraded in place;
+    otherwise startup fails until `flask --app app db upgrade` is run.
+    """
+    if _running_flask_cli():
+        return
+
+    with app.app_context():
+        current, head = migration_state()
+        if current == head:
+            return
+
+        if app.config['AUTO_MIGRATE']:
+            app.logger.info('Upgrading database schema from %s to %s', current, head)
+            upgrade(directory=MIGRATIONS_DIR)
+            return
+
+        raise RuntimeError(
+            f'Database schema is at revision {current or "(none)"} but the code expects {head}; '
+            'run "flask --app app db upgrade"'
+        )
@@ -0,0 +1,74 @@
+import json
+from datetime import date
+from flask import Response
+from models import Exam, Result, Violation
+
+try:
+    import orjson
+except ImportError:  # Falls back to the standard library encoder
+    orjson = None
+
+# Column projections matching the keys and values of the models' to_dict(),
+# for listings that need rows rather than ORM instances
+EXAM_COLUMNS = (
+    Exam.id,
+    Exam.title,
+    Exam.description,
+    Exam.duration,
+    Exam.total_marks,
+    Exam.passing_marks,
+    Exam.negative_marking,
+    Exam.negative_marks_value,
+    Exam.randomize_questions,
+    Exam.start_time,
+    Exam.end_time,
+    Exam.created_at,
+    Exam.is_active,
+    Exam.question_count,
+)
+
+RESULT_COLUMNS = (
+    Result.id,
+    Result.student_id,
+    Result.exam_id,
+    Result.session_id,
+    Result.marks_obtained,
+    Result.total_marks,
+    Result.percentage,
+    Result.passed,
+    Result.correct_answers,
+    Result.wrong_answers,
+    Result.unanswered,
+    Result.violation_count,
+    Result.created_at,
+)
+
+VIOLATION_COLUMNS = (
+    Violation.id,
+    Violation.session_id,
+    Violation.violation_type,
+    Violation.timestamp,
+    Violation.details,
+)
+
+def _default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+def dumps(data):
+    """Encode to JSON bytes; datetimes become ISO 8601 strings like isoformat()"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(',', ':'), default=_default).encode('utf-8')
+
+def records(rows):
+    """Projection rows as dicts keyed by column label"""
+    if not rows:
+        return []
+    keys = rows[0]._fields
+    return [dict(zip(keys, row)) for row in rows]
+
+def json_response(data, status=200):
+    """A JSON response encoded straight to bytes, bypassing jsonify"""
+    return Response(dumps(data), status=status, mimetype='application/json')
@@ -1,11 +1,11 @@
 from app import create_app
-from asgiref.wsgi import WsgiToAsgi
+from async_api import create_async_app
 
 # Create Flask app
 flask_app = create_app()
 
-# Convert Flask WSGI app to ASGI for uvicorn
-app = WsgiToAsgi(flask_app)
+# Serve the chatty exam endpoints natively; everything else goes through WsgiToAsgi
+app = create_async_app(flask_app)
 
 if __name__ == '__main__':
     import uvicorn
@@ -0,0 +1,162 @@
+import json
+import os
+import threading
+from datetime import datetime
+from sqlalchemy import insert, select, update
+from app import db
+from models import User, Exam, ExamSession, Result
+from grading import scoring_plan, grade_attempts
+from exam_stats import record_results
+from live_feed import live_feed
+
+def grade_sessions(rows, answers, now):
+    """Grade closed sessions and store their results.
+
+    rows carry id, exam_id, student_id, violation_count and end_time;
+    answers maps session id to its final answers. Results are dated at the
+    session's end_time, as an inline submit dates them, falling back to
+    now. Each exam is graded in one pass, results are bulk-inserted and
+    statistics updated once per exam. The caller commits. Returns the
+    results as dicts.
+    """
+    by_exam = {}
+    for row in rows:
+        by_exam.setdefault(row.exam_id, []).append(row)
+
+    graded = []
+    for exam in Exam.query.filter(Exam.id.in_(by_exam)).all():
+        exam_rows = by_exam[exam.id]
+        scores = grade_attempts(scoring_plan(exam), [answers[row.id] for row in exam_rows])
+        results = [dict(
+            student_id=row.student_id,
+            exam_id=exam.id,
+            session_id=row.id,
+            violation_count=row.violation_count or 0,
+            created_at=row.end_time or now,
+            **score
+        ) for row, score in zip(exam_rows, scores)]
+        db.session.execute(insert(Result), results)
+        record_results(exam.id, [r['percentage'] for r in results], [r['passed'] for r in results])
+        graded.extend(results)
+    return graded
+
+def submitted_event(result, username, auto_submitted, **extra):
+    """The live feed's 'submitted' payload for a graded result dict"""
+    return dict(
+        session_id=result['session_id'],
+        student_id=result['student_id'],
+        username=username,
+        percentage=result['percentage'],
+        passed=result['passed'],
+        violation_count=result['violation_count'],
+        auto_submitted=auto_submitted,
+        **extra
+    )
+
+def publish_submitted(results, auto_submitted=(), **extra):
+    """Publish 'submitted' for results graded off the request path.
+
+    auto_submitted is the set of session ids that were auto-submitted.
+    Usernames are looked up in one query; call after committing.
+    """
+    if not results:
+        return
+    usernames = dict(db.session.execute(
+        select(User.id, User.username).where(User.id.in_({result['student_id'] for result in results}))
+    ).all())
+    for result in results:
+        live_feed.publish(result['exam_id'], 'submitted', **submitted_event(
+            result, usernames.get(result['student_id']), result['session_id'] in auto_submitted, **extra
+        ))
+
+class SubmissionQueue:
+    """Grades submitted sessions off the request path.
+
+    With SUBMIT_QUEUE_INTERVAL > 0, submit_exam only stores the final
+    answers and flags the session grading_pending. Each worker drains the
+    flagged sessions in batches of SUBMIT_QUEUE_BATCH, one commit per
+    batch, waking up on every local submit or at least every interval.
+    A session is only graded by the worker whose UPDATE claims it.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.interval = 0.0
+        self.batch_size = 500
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.interval = float(app.config.get('SUBMIT_QUEUE_INTERVAL', 0))
+        self.batch_size = int(app.config.get('SUBMIT_QUEUE_BATCH', 500))
+        app.extensions['submission_queue'] = self
+        if self.enabled:
+            app.before_request(self._ensure_thread)
+
+    @property
+    def enabled(self):
+        return self.interval > 0
+
+    def notify(self):
+        """A submission was queued; grade without waiting for the next poll"""
+        self._wakeup.set()
+
+    def drain(self, now=None):
+        """Grade every queued submission; returns how many were graded"""
+        total = 0
+        while True:
+            session_ids = db.session.execute(
+                select(ExamSession.id).where(ExamSession.grading_pending == True)
+                .order_by(ExamSession.id).limit(self.batch_size)
+            ).scalars().all()
+            if not session_ids:
+                return total
+
+            claimed = db.session.execute(
+                update(ExamSession)
+                .where(ExamSession.id.in_(session_ids), ExamSession.grading_pending == True)
+                .values(grading_pending=False)
+                .returning(
+                    ExamSession.id, ExamSession.exam_id, ExamSession.student_id,
+                    ExamSession.answers, ExamSession.violation_count, ExamSession.auto_submitted,
+                    ExamSession.end_time
+                )
+                .execution_options(synchronize_session=False)
+            ).all()
+            answers = {row.id: json.loads(row.answers) if row.answers else {} for row in claimed}
+            graded = grade_sessions(claimed, answers, now or datetime.utcnow())
+            db.session.commit()
+            total += len(graded)
+
+            publish_submitted(graded, {row.id for row in claimed if row.auto_submitted})
+            if len(session_ids) < self.batch_size:
+                return total
+
+    def _ensure_thread(self):
+        # Threads do not survive a fork, so start one per worker process
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='submission-queue', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            with self.app.app_context():
+                try:
+                    self.drain()
+                except Exception:
+                    db.session.rollback()
+                    self.app.logger.exception('Grading queued submissions failed')
+
+submission_queue = SubmissionQueue()
@@ -0,0 +1,91 @@
+import os
+import shutil
+import sys
+import tempfile
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PASSWORD = 'test-password'
+HASH_METHOD = 'pbkdf2:sha256:1000'
+
+# Cheap hashing, and no background threads: tests grade, sweep and flush inline
+TEST_ENVIRONMENT = {
+    'AUTO_MIGRATE': '1',
+    'PASSWORD_HASH_METHOD': HASH_METHOD,
+    'BULK_HASH_WORKERS': '1',
+    'EXAM_SWEEP_INTERVAL': '0',
+    'SUBMIT_QUEUE_INTERVAL': '0',
+    'VIOLATION_FLUSH_INTERVAL': '0',
+    'METRICS_SAMPLE_RATE': '0',
+}
+
+def reset_process_caches():
+    """Empty the caches that outlive an app: they are keyed by row ids, which each test database reuses"""
+    from grading import _plans
+    from paper_cache import _papers
+    from principals import principal_cache
+
+    _plans.clear()
+    _papers.clear()
+    principal_cache.clear()
+
+def build_app(workdir, **environment):
+    """A fresh app on an empty SQLite database in workdir; environment overrides TEST_ENVIRONMENT"""
+    from app import create_app
+
+    settings = dict(TEST_ENVIRONMENT, DATABASE_URL=f'sqlite:///{os.path.join(workdir, "test.db")}',
+                    LIVE_FEED_DIR=os.path.join(workdir, 'live'))
+    settings.update(environment)
+    with pytest.MonkeyPatch.context() as patch:
+        for name, value in settings.items():
+            patch.setenv(name, value)
+        reset_process_caches()
+        return create_app()
+
+@pytest.fixture
+def app():
+    workdir = tempfile.mkdtemp()
+    try:
+        yield build_app(workdir)
+    finally:
+        shutil.rmtree(workdir)
+
+@pytest.fixture
+def db(app):
+    from app import db
+
+    with app.app_context():
+        yield db
+        db.session.remove()
+
+def register(app, username, role='student'):
+    """A logged-in test client for a new user"""
+    client = app.test_client()
+    client.post(f'/api/auth/register/{role}', json={
+        'username': username, 'email': f'{username}@example.com', 'password': PASSWORD
+    })
+    response = client.post('/api/auth/login', json={'email': f'{username}@example.com', 'password': PASSWORD})
+    assert response.status_code == 200, response.get_json()
+    return client
+
+def create_exam(admin, title, key):
+    """An exam with one 1-mark question per answer in key; returns its id"""
+    exam_id = admin.post('/api/admin/exams', json={
+        'title': title, 'duration': 60, 'total_marks': len(key), 'passing_marks': 1
+    }).get_json()['exam']['id']
+    for answer in key:
+        response = admin.post(f'/api/admin/exams/{exam_id}/questions', json={
+            'question_text': f'{title} question', 'option_a': 'a', 'option_b': 'b', 'option_c': 'c',
+            'option_d': 'd', 'correct_answer': answer, 'marks': 1
+        })
+        assert response.status_code == 201, response.get_json()
+    return exam_id
+
+@pytest.fixture
+def admin(app):
+    return register(app, 'admin', role='admin')
+
+@pytest.fixture
+def student(app):
+    return register(app, 'student')
@@ -0,0 +1,31 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+from conftest import PASSWORD, register
+
+@pytest.fixture
+def rehash_fails(app, monkeypatch):
+    """Every login wants a rehash, and committing it fails as under lock contention"""
+    from app import db
+    from password_pool import password_hasher
+
+    def locked():
+        raise OperationalError('UPDATE users', {}, Exception('database is locked'))
+
+    register(app, 'rehash')
+    monkeypatch.setattr(password_hasher, 'needs_rehash', lambda password_hash: True)
+    monkeypatch.setattr(db.session, 'commit', locked)
+
+def test_failed_rehash_does_not_fail_login(app, rehash_fails):
+    from models import User
+    from password_pool import password_hasher
+
+    client = app.test_client()
+    response = client.post('/api/auth/login', json={'email': 'rehash@example.com', 'password': PASSWORD})
+    assert response.status_code == 200
+    assert response.get_json()['user']['username'] == 'rehash'
+    assert client.get('/api/auth/me').status_code == 200
+
+    with app.app_context():
+        # The old hash is kept and still verifies
+        stored = User.query.filter_by(email='rehash@example.com').one().password_hash
+        assert password_hasher.check(stored, PASSWORD)
@@ -0,0 +1,32 @@
+import json
+from sqlalchemy.orm import Session
+from conftest import create_exam
+
+def test_fold_on_a_stale_session_keeps_folded_answers(app, admin, student):
+    from app import db
+    from autosave import fold_answer_log
+    from models import ExamSession
+
+    exam_id = create_exam(admin, 'Autosave', 'ABC')
+    started = student.post(f'/api/student/exams/{exam_id}/start').get_json()
+    session_id = started['session']['id']
+    first, second, third = [str(q['id']) for q in started['questions']]
+    student.patch(f'/api/student/sessions/{session_id}/answers', json={'answers': {first: 'A', second: 'B'}})
+    with app.app_context():
+        engine = db.engine
+
+    # A worker loads the session, then another folds the log under it
+    with Session(engine) as stale, Session(engine) as other:
+        session = stale.get(ExamSession, session_id)
+        fold_answer_log(other.get(ExamSession, session_id), other)
+        other.commit()
+        student.patch(f'/api/student/sessions/{session_id}/answers', json={'answers': {third: 'C'}})
+
+        answers = fold_answer_log(session, stale)
+        stale.commit()
+
+    assert answers == {first: 'A', second: 'B', third: 'C'}
+    with Session(engine) as check:
+        folded = check.get(ExamSession, session_id)
+        assert json.loads(folded.answers) == answers
+        assert folded.pending_answer_patches == 0
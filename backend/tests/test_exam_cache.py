@@ -0,0 +1,24 @@
+from conftest import create_exam
+
+def sit(student, exam_id, answer):
+    """Start exam_id, answer every question with answer and return the result"""
+    started = student.post(f'/api/student/exams/{exam_id}/start').get_json()
+    session_id = started['session']['id']
+    response = student.post(f'/api/student/sessions/{session_id}/submit', json={
+        'answers': {str(question['id']): answer for question in started['questions']}
+    })
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()['result']
+
+def test_recreated_exam_is_graded_against_its_own_key(admin, student):
+    exam_id = create_exam(admin, 'Original', 'AA')
+    assert sit(student, exam_id, 'A')['correct_answers'] == 2
+    assert admin.delete(f'/api/admin/exams/{exam_id}').status_code == 200
+
+    # SQLite hands the freed id to the next exam, at the same version
+    recreated = create_exam(admin, 'Recreated', 'BB')
+    assert recreated == exam_id
+
+    result = sit(student, recreated, 'B')
+    assert result['correct_answers'] == 2
+    assert result['wrong_answers'] == 0
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+import pytest
+from conftest import create_exam, register
+
+KEY = 'ABCD'
+
+def sitting(app, name):
+    """A started session of a new student; returns the client, session id and question ids"""
+    client = register(app, name)
+    started = client.post('/api/student/exams/1/start').get_json()
+    question_ids = [str(question['id']) for question in sorted(started['questions'], key=lambda q: q['id'])]
+    return client, started['session']['id'], question_ids
+
+def answered(question_ids, correct):
+    """The first correct questions answered right, the rest wrong"""
+    return {question_id: KEY[i] if i < correct else KEY[(i + 1) % len(KEY)]
+            for i, question_id in enumerate(question_ids)}
+
+def statistics(app):
+    from app import db
+    from models import ExamStatistics
+
+    with app.app_context():
+        row = db.session.get(ExamStatistics, 1)
+        columns = [column.name for column in ExamStatistics.__table__.columns if column.name != 'updated_at']
+        snapshot = {name: getattr(row, name) for name in columns}
+        db.session.remove()
+    return snapshot
+
+def test_incremental_statistics_match_a_rebuild(app, admin):
+    from app import db
+    from exam_stats import rebuild_statistics
+    from exam_timer import session_sweeper
+    from submission_queue import submission_queue
+
+    # Each test's database starts empty, so the exam has id 1
+    assert create_exam(admin, 'Statistics', KEY) == 1
+
+    # Graded in the request
+    for index, correct in enumerate([4, 2, 0]):
+        client, session_id, question_ids = sitting(app, f'inline{index}')
+        response = client.post(f'/api/student/sessions/{session_id}/submit',
+                               json={'answers': answered(question_ids, correct)})
+        assert response.status_code == 200, response.get_json()
+
+    # Queued, then graded in one batch
+    submission_queue.interval = 3600
+    try:
+        for index, correct in enumerate([3, 1, 4]):
+            client, session_id, question_ids = sitting(app, f'queued{index}')
+            response = client.post(f'/api/student/sessions/{session_id}/submit',
+                                   json={'answers': answered(question_ids, correct)})
+            assert response.status_code == 202, response.get_json()
+        with app.app_context():
+            assert submission_queue.drain() == 3
+    finally:
+        submission_queue.interval = 0
+
+    # Finalized by the sweeper from autosaved answers, or none at all
+    for index, correct in enumerate([2, 3, None]):
+        client, session_id, question_ids = sitting(app, f'swept{index}')
+        if correct is not None:
+            response = client.patch(f'/api/student/sessions/{session_id}/answers',
+                                    json={'answers': answered(question_ids, correct)})
+            assert response.status_code == 200, response.get_json()
+    with app.app_context():
+        assert session_sweeper.sweep(datetime.utcnow() + timedelta(days=1)) == 3
+
+    incremental = statistics(app)
+    assert incremental['attempts'] == 9
+
+    with app.app_context():
+        assert rebuild_statistics(1) == 1
+        db.session.commit()
+    rebuilt = statistics(app)
+
+    assert incremental == {name: pytest.approx(value) if isinstance(value, float) else value
+                           for name, value in rebuilt.items()}
@@ -0,0 +1,53 @@
+import pytest
+from conftest import register
+
+KEY = [('A', 1), ('B', 2), ('C', 3), ('D', 1)]
+
+def answer_sets(q):
+    """Answer maps covering correct, wrong, unanswered and malformed answers"""
+    return [
+        {q[0]: 'A', q[1]: 'B', q[2]: 'C', q[3]: 'D'},
+        {q[0]: 'B', q[1]: 'C', q[2]: 'D', q[3]: 'A'},
+        {q[0]: 'A', q[2]: '', q[3]: None},
+        {q[0]: 'a', q[1]: 'b', q[2]: 'E', q[3]: 5},
+        {q[0]: ['A'], q[1]: {'B': 1}, q[2]: 'c', '999999': 'A'},
+        {},
+    ]
+
+@pytest.mark.parametrize('negative_marking', [False, True])
+def test_regrade_matches_submit(app, admin, negative_marking):
+    from models import Result
+
+    exam_id = admin.post('/api/admin/exams', json={
+        'title': 'Regrade', 'duration': 60, 'total_marks': 7, 'passing_marks': 4,
+        'negative_marking': negative_marking, 'negative_marks_value': 0.5
+    }).get_json()['exam']['id']
+    for answer, marks in KEY:
+        assert admin.post(f'/api/admin/exams/{exam_id}/questions', json={
+            'question_text': 'q', 'option_a': 'a', 'option_b': 'b', 'option_c': 'c', 'option_d': 'd',
+            'correct_answer': answer, 'marks': marks
+        }).status_code == 201
+
+    attempts = len(answer_sets([None] * len(KEY)))
+    for index in range(attempts):
+        student = register(app, f'regrade{index}')
+        started = student.post(f'/api/student/exams/{exam_id}/start').get_json()
+        question_ids = [str(question['id']) for question in sorted(started['questions'], key=lambda q: q['id'])]
+        response = student.post(f'/api/student/sessions/{started["session"]["id"]}/submit', json={
+            'answers': answer_sets(question_ids)[index]
+        })
+        assert response.status_code == 200, response.get_json()
+
+    fields = ('marks_obtained', 'total_marks', 'percentage', 'passed',
+              'correct_answers', 'wrong_answers', 'unanswered')
+
+    def scores():
+        with app.app_context():
+            return {result.session_id: tuple(getattr(result, field) for field in fields)
+                    for result in Result.query.filter_by(exam_id=exam_id)}
+
+    submitted = scores()
+    assert len(submitted) == attempts
+    assert max(score[0] for score in submitted.values()) == 7
+    assert admin.post(f'/api/admin/exams/{exam_id}/regrade').status_code == 200
+    assert scores() == submitted
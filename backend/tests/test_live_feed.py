@@ -0,0 +1,71 @@
+import asyncio
+import os
+import pytest
+from live_feed import LiveFeed, default_directory
+
+def test_default_directory_is_per_database():
+    assert default_directory('sqlite:///one.db') != default_directory('sqlite:///two.db')
+    assert default_directory('sqlite:///one.db') == default_directory('sqlite:///one.db')
+
+def feed_in(app, directory):
+    app.config['LIVE_FEED_DIR'] = directory
+    feed = LiveFeed()
+    feed.init_app(app)
+    return feed
+
+def test_socket_directory_is_private(app, tmp_path):
+    feed = feed_in(app, str(tmp_path / 'feed'))
+    subscription = feed.subscribe(1, lambda event: None)
+    try:
+        assert os.stat(tmp_path / 'feed').st_mode & 0o777 == 0o700
+        assert feed._socket is not None
+    finally:
+        subscription.close()
+        feed._unbind()
+
+@pytest.mark.parametrize('unusable', ['shared', 'file'])
+def test_falls_back_to_in_process_delivery(app, tmp_path, unusable):
+    directory = tmp_path / 'feed'
+    if unusable == 'shared':
+        directory.mkdir(mode=0o777)
+        os.chmod(directory, 0o777)
+    else:
+        directory.write_text('not a directory')
+    feed = feed_in(app, str(directory))
+
+    received = []
+    feed.subscribe(1, received.append)
+    feed.publish(1, 'violation', session_id=7)
+
+    assert feed._socket is None
+    assert feed.directory == ''
+    assert [event['session_id'] for event in received] == [7]
+
+def test_only_the_async_app_serves_the_feed(app, admin):
+    from async_api import create_async_app
+
+    assert admin.get('/api/admin/exams/1/live').status_code == 404
+    async_app = create_async_app(app)
+    try:
+        paths = [getattr(route, 'path', '') for route in async_app.routes]
+        assert '/api/admin/exams/{exam_id:int}/live' in paths
+    finally:
+        asyncio.run(async_app.state.engine.dispose())
+
+def test_async_stream_delivers_published_events(app):
+    feed = feed_in(app, '')
+
+    async def first_frames():
+        frames = feed.stream_async(1)
+        retry = await frames.__anext__()
+        pending = asyncio.ensure_future(frames.__anext__())
+        await asyncio.sleep(0)
+        feed.publish(1, 'violation', session_id=7)
+        event = await asyncio.wait_for(pending, 5)
+        await frames.aclose()
+        return retry, event
+
+    retry, event = asyncio.run(first_frames())
+    assert retry == 'retry: 3000\n\n'
+    assert event.startswith('event: violation\n')
+    assert '"session_id": 7' in event
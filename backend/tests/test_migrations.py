@@ -0,0 +1,28 @@
+from sqlalchemy import text
+
+def test_result_dedupe_rebuilds_statistics(app):
+    from flask_migrate import downgrade, upgrade
+    from app import db
+
+    with app.app_context():
+        downgrade(revision='0002')
+        for statement in [
+            "INSERT INTO users (id, username, email, password_hash, role) VALUES (1, 'u', 'u@example.com', 'x', 'student')",
+            "INSERT INTO exams (id, title, duration, total_marks, passing_marks, created_by) VALUES (1, 'e', 60, 10, 5, 1)",
+            "INSERT INTO exam_sessions (id, student_id, exam_id) VALUES (1, 1, 1)",
+            # A double submit: the second result was folded into the statistics too
+            *[f"INSERT INTO results (student_id, exam_id, session_id, marks_obtained, total_marks, percentage, passed, "
+              f"correct_answers, wrong_answers, unanswered) VALUES (1, 1, 1, {marks}, 10, {marks * 10}, {passed}, 0, 0, 0)"
+              for marks, passed in ((8, 1), (2, 0))],
+            "INSERT INTO exam_statistics (exam_id, attempts, passed_count, percentage_sum, percentage_sq_sum, "
+            "min_percentage, max_percentage, " + ', '.join(f'bucket_{i}' for i in range(10)) + ") "
+            "VALUES (1, 2, 1, 100, 6800, 20, 80, 0, 0, 1, 0, 0, 0, 0, 0, 1, 0)",
+        ]:
+            db.session.execute(text(statement))
+        db.session.commit()
+
+        upgrade()
+        stats = db.session.execute(text('SELECT attempts, passed_count, percentage_sum, bucket_2, bucket_8 '
+                                        'FROM exam_statistics WHERE exam_id = 1')).one()
+        assert tuple(stats) == (1, 1, 80.0, 0, 1)
+        db.session.remove()
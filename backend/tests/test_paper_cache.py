@@ -0,0 +1,25 @@
+from conftest import create_exam
+
+def start(student, exam_id):
+    started = student.post(f'/api/student/exams/{exam_id}/start')
+    assert started.status_code == 201, started.get_json()
+    return started.get_json()['session']['id']
+
+def test_recreated_exam_gets_its_own_paper_and_etag(admin, student):
+    exam_id = create_exam(admin, 'Original', 'AA')
+    session_id = start(student, exam_id)
+    original = student.get(f'/api/student/sessions/{session_id}/questions')
+    assert student.get(f'/api/student/sessions/{session_id}/questions',
+                       headers={'If-None-Match': original.headers['ETag']}).status_code == 304
+    assert admin.delete(f'/api/admin/exams/{exam_id}').status_code == 200
+
+    # Both the exam and the session ids are handed out again, at the same exam version
+    recreated = create_exam(admin, 'Recreated', 'BB')
+    assert recreated == exam_id
+    session_id = start(student, recreated)
+
+    response = student.get(f'/api/student/sessions/{session_id}/questions',
+                           headers={'If-None-Match': original.headers['ETag']})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != original.headers['ETag']
+    assert [q['question_text'] for q in response.get_json()] == ['Recreated question'] * 2
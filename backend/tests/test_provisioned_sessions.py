@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+import pytest
+from conftest import create_exam
+
+@pytest.fixture
+def provisioned(app, admin, student):
+    """(exam id, session id) of a session provisioned for the student but not started"""
+    from models import ExamSession
+
+    exam_id = create_exam(admin, 'Provisioned', 'AB')
+    assert admin.post(f'/api/admin/exams/{exam_id}/provision').status_code == 200
+    with app.app_context():
+        session_id = ExamSession.query.filter_by(exam_id=exam_id).one().id
+    return exam_id, session_id
+
+def test_unstarted_session_takes_no_writes(app, student, provisioned):
+    from models import AnswerPatch, ExamSession, Result, Violation
+
+    _, session_id = provisioned
+    assert student.post(f'/api/student/sessions/{session_id}/submit', json={'answers': {}}).status_code == 404
+    assert student.patch(f'/api/student/sessions/{session_id}/answers',
+                         json={'answers': {'1': 'A'}}).status_code == 404
+    assert student.post('/api/violations', json={
+        'session_id': session_id, 'violation_type': 'tab_switch'
+    }).status_code == 404
+
+    with app.app_context():
+        session = ExamSession.query.get(session_id)
+        assert not session.is_completed
+        assert session.violation_count == 0
+        assert session.pending_answer_patches == 0
+        assert AnswerPatch.query.count() == Violation.query.count() == Result.query.count() == 0
+
+def test_sweep_closes_unstarted_sessions_after_the_exam_ends(app, admin, student, provisioned):
+    from exam_timer import session_sweeper
+    from models import ExamSession, Result
+
+    exam_id, session_id = provisioned
+    with app.app_context():
+        # Still open while the exam has no end time
+        session_sweeper.sweep(datetime.utcnow() + timedelta(days=365))
+        assert not ExamSession.query.get(session_id).is_completed
+
+    ended = (datetime.utcnow() - timedelta(minutes=1)).isoformat()
+    assert admin.put(f'/api/admin/exams/{exam_id}', json={'end_time': ended}).status_code == 200
+    with app.app_context():
+        session_sweeper.sweep()
+        session = ExamSession.query.get(session_id)
+        assert session.is_completed
+        assert session.start_time is None
+        assert Result.query.count() == 0
@@ -0,0 +1,287 @@
+"""SQL statement and wall-clock budgets for every API endpoint at scale.
+
+Seeds a SQLite database with a realistic volume of data (hundreds of
+exams, tens of thousands of results, one student with a long result
+history), calls every endpoint of the five blueprints once, and checks
+each request against its budget. A request over its statement budget
+usually means a new N+1: the count grows with the data instead of
+staying flat. The scale and a factor on the time budgets come from the
+environment:
+
+    QUERY_BUDGET_STUDENTS=2000 QUERY_BUDGET_EXAMS=300 python -m pytest tests/test_query_budget.py
+"""
+import gc
+import math
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import pytest
+from conftest import PASSWORD, HASH_METHOD, build_app
+
+# Scale of the seeded data, overridable as QUERY_BUDGET_<NAME>
+SCALE = {
+    'students': 2000,
+    'exams': 300,
+    'questions': 20,       # per exam
+    'attempts': 10,        # results per student
+    'history': 200,        # results of the probe student
+    'roster': 50,          # rows in the imported roster
+    'seed': 1,
+}
+
+# endpoint: (max SQL statements, max milliseconds)
+BUDGETS = {
+    'auth.register_student': (4, 250),
+    'auth.register_admin': (4, 250),
+    'auth.login': (2, 250),
+    'auth.get_current_user': (2, 100),
+    'auth.forgot_password': (3, 100),
+    'auth.reset_password': (3, 250),
+    'auth.logout': (1, 100),
+    'admin.get_exams': (2, 500),
+    'admin.create_exam': (3, 100),
+    'admin.get_exam': (3, 100),
+    'admin.update_exam': (5, 100),
+    'admin.add_question': (4, 100),
+    'admin.import_exam_questions': (5, 250),
+    'admin.update_question': (4, 100),
+    'admin.delete_question': (5, 100),
+    'admin.provision': (3, 1000),
+    'admin.regrade': (8, 1000),
+    'admin.import_students': (5, 500),
+    'admin.get_analytics': (5, 250),
+    'admin.get_cache_stats': (1, 100),
+    'admin.get_metrics': (1, 100),
+    'admin.get_exam_analytics': (4, 250),
+    'admin.delete_exam': (8, 250),
+    'student.get_available_exams': (2, 500),
+    'student.start_exam': (6, 250),
+    'student.get_session_questions': (3, 100),
+    'student.autosave_answers': (3, 100),
+    'student.heartbeat': (3, 100),
+    'student.submit_exam': (14, 250),
+    'student.get_session_result': (2, 100),
+    'student.get_my_results': (2, 250),
+    'student.get_result_detail': (4, 100),
+    'violations.log_violation': (4, 100),
+    'violations.log_violations_batch': (4, 100),
+    'violations.get_session_violations': (4, 100),
+    'results.get_all_results': (2, 250),
+    'results.export_results': (3, 5000),
+    'results.get_result': (4, 100),
+}
+
+def seed(db, args):
+    from sqlalchemy import insert
+    from werkzeug.security import generate_password_hash
+    from models import User, Exam, Question, ExamSession, Result, Violation
+
+    rng = random.Random(args.seed)
+    now = datetime.utcnow()
+    password_hash = generate_password_hash(PASSWORD, HASH_METHOD)
+    db.session.execute(insert(User), [{
+        'id': i, 'username': f'user{i}', 'email': f'user{i}@example.com',
+        'password_hash': password_hash, 'role': 'admin' if i == 1 else 'student', 'created_at': now
+    } for i in range(1, args.students + 2)])
+    db.session.execute(insert(Exam), [{
+        'id': i, 'title': f'Exam {i}', 'duration': 60, 'total_marks': args.questions,
+        'passing_marks': args.questions // 2, 'created_by': 1, 'created_at': now,
+        'question_count': args.questions
+    } for i in range(1, args.exams + 1)])
+    db.session.execute(insert(Question), [{
+        'exam_id': exam_id, 'question_text': 'q', 'option_a': 'a', 'option_b': 'b',
+        'option_c': 'c', 'option_d': 'd', 'correct_answer': rng.choice('ABCD'), 'marks': 1, 'created_at': now
+    } for exam_id in range(1, args.exams + 1) for _ in range(args.questions)])
+
+    # user2 is the probe student: a long history, and the last exam still open
+    sessions, results, violations = [], [], []
+    session_id = 0
+    for student_id in range(2, args.students + 2):
+        attempts = args.history if student_id == 2 else args.attempts
+        for exam_id in rng.sample(range(1, args.exams), min(attempts, args.exams - 1)):
+            session_id += 1
+            created_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+            sessions.append({'id': session_id, 'student_id': student_id, 'exam_id': exam_id,
+                             'start_time': created_at, 'end_time': created_at, 'is_completed': True,
+                             'violation_count': 0, 'answers': '{}'})
+            percentage = rng.uniform(0, 100)
+            results.append({'student_id': student_id, 'exam_id': exam_id, 'session_id': session_id,
+                            'marks_obtained': percentage, 'total_marks': 100, 'percentage': percentage,
+                            'passed': percentage >= 50, 'correct_answers': 0, 'wrong_answers': 0,
+                            'unanswered': 0, 'created_at': created_at})
+            violations.extend({'session_id': session_id, 'violation_type': 'no_face', 'timestamp': created_at}
+                              for _ in range(rng.randint(0, 2)))
+    db.session.execute(insert(ExamSession), sessions)
+    db.session.execute(insert(Result), results)
+    db.session.execute(insert(Violation), violations)
+    db.session.commit()
+    return len(results)
+
+class Budget:
+    """Statements and time per request, counted on the calling thread only"""
+
+    def __init__(self, app, time_factor):
+        self.app = app
+        self.time_factor = time_factor
+        self.thread = threading.get_ident()
+        self.statements = 0
+        self.report = {}
+
+    def count(self, conn, cursor, statement, parameters, context, executemany):
+        # Background flushers and sweepers run on their own threads
+        if threading.get_ident() == self.thread:
+            self.statements += 1
+
+    def call(self, method, path, batches=0, **kwargs):
+        """Issue one request; batches is extra statements allowed for batched bulk work"""
+        endpoint = self.app.url_map.bind('').match(path.split('?')[0], method=method.__name__.upper())[0]
+        self.statements = 0
+        started = time.perf_counter()
+        response = method(path, **kwargs)
+        if response.is_streamed:
+            response.get_data()
+        elapsed = (time.perf_counter() - started) * 1000
+        response.close()
+
+        max_statements, max_ms = BUDGETS[endpoint]
+        self.report[endpoint] = {
+            'status': response.status_code,
+            'statements': self.statements,
+            'max_statements': max_statements + batches,
+            'ms': round(elapsed, 1),
+            'max_ms': max_ms * self.time_factor,
+        }
+        return response
+
+def login(budget, client, user_id):
+    response = budget.call(client.post, '/api/auth/login', json={
+        'email': f'user{user_id}@example.com', 'password': PASSWORD
+    })
+    if response.status_code != 200:
+        raise RuntimeError(f'login as user{user_id} returned {response.status_code}')
+
+def exercise(budget, app, args):
+    from exam_start import PROVISION_BATCH_SIZE
+
+    admin = app.test_client()
+    student = app.test_client()
+    guest = app.test_client()
+    exam_id = args.exams
+
+    # Auth
+    budget.call(guest.post, '/api/auth/register/student', json={
+        'username': 'budget-student', 'email': 'budget-student@example.com', 'password': PASSWORD
+    })
+    budget.call(guest.post, '/api/auth/register/admin', json={
+        'username': 'budget-admin', 'email': 'budget-admin@example.com', 'password': PASSWORD
+    })
+    token = budget.call(guest.post, '/api/auth/forgot-password', json={
+        'email': 'budget-student@example.com'
+    }).get_json()['token']
+    budget.call(guest.post, '/api/auth/reset-password', json={'token': token, 'password': PASSWORD})
+    login(budget, guest, 3)
+    budget.call(guest.post, '/api/auth/logout')
+    login(budget, admin, 1)
+    login(budget, student, 2)
+    budget.call(student.get, '/api/auth/me')
+
+    # Admin exam management, on an exam of its own
+    created = budget.call(admin.post, '/api/admin/exams', json={
+        'title': 'Budget', 'duration': 60, 'total_marks': 1, 'passing_marks': 1
+    }).get_json()['exam']['id']
+    question_id = budget.call(admin.post, f'/api/admin/exams/{created}/questions', json={
+        'question_text': 'q', 'option_a': 'a', 'option_b': 'b', 'option_c': 'c', 'option_d': 'd',
+        'correct_answer': 'A', 'marks': 1
+    }).get_json()['question']['id']
+    budget.call(admin.post, f'/api/admin/exams/{created}/questions/import', json=[{
+        'question_text': f'q{i}', 'option_a': 'a', 'option_b': 'b', 'option_c': 'c', 'option_d': 'd',
+        'correct_answer': 'B', 'marks': 1
+    } for i in range(args.questions)])
+    budget.call(admin.put, f'/api/admin/questions/{question_id}', json={'correct_answer': 'C'})
+    budget.call(admin.delete, f'/api/admin/questions/{question_id}')
+    budget.call(admin.put, f'/api/admin/exams/{created}', json={'duration': 90})
+    budget.call(admin.get, f'/api/admin/exams/{created}')
+    budget.call(admin.post, f'/api/admin/exams/{created}/provision',
+                batches=math.ceil((args.students + 1) / PROVISION_BATCH_SIZE))
+    budget.call(admin.post, '/api/admin/students/import', data='username,email,password\n' + ''.join(
+        f'roster{i},roster{i}@example.com,{PASSWORD}\n' for i in range(args.roster)
+    ), content_type='text/csv')
+    budget.call(admin.delete, f'/api/admin/exams/{created}')
+
+    # A sitting by the probe student
+    budget.call(student.get, '/api/student/exams')
+    started = budget.call(student.post, f'/api/student/exams/{exam_id}/start').get_json()
+    session_id = started['session']['id']
+    question_ids = [q['id'] for q in started['questions']]
+    budget.call(student.get, f'/api/student/sessions/{session_id}/questions')
+    budget.call(student.patch, f'/api/student/sessions/{session_id}/answers', json={
+        'answers': {str(q): 'A' for q in question_ids[:5]}
+    })
+    budget.call(student.post, f'/api/student/sessions/{session_id}/heartbeat')
+    budget.call(student.post, '/api/violations', json={
+        'session_id': session_id, 'violation_type': 'tab_switch', 'details': 'budget'
+    })
+    budget.call(student.post, '/api/violations/batch', json={
+        'session_id': session_id,
+        'violations': [{'violation_type': 'no_face', 'details': 'budget'}] * 5
+    })
+    budget.call(student.get, f'/api/violations/session/{session_id}')
+    budget.call(student.post, f'/api/student/sessions/{session_id}/submit', json={
+        'answers': {str(q): 'B' for q in question_ids}
+    })
+    result_id = budget.call(student.get, f'/api/student/sessions/{session_id}/result').get_json()['result']['id']
+    budget.call(student.get, '/api/student/results')
+    budget.call(student.get, f'/api/student/results/{result_id}')
+
+    # Admin reporting over the whole data set
+    budget.call(admin.get, '/api/admin/exams')
+    budget.call(admin.post, f'/api/admin/exams/{exam_id}/regrade')
+    budget.call(admin.get, '/api/admin/analytics')
+    budget.call(admin.get, f'/api/admin/exams/{exam_id}/analytics')
+    budget.call(admin.get, '/api/admin/cache-stats')
+    budget.call(admin.get, '/api/admin/metrics')
+    budget.call(admin.get, '/api/results?limit=100')
+    budget.call(admin.get, '/api/results/export')
+    budget.call(admin.get, f'/api/results/{result_id}')
+
+@pytest.fixture(scope='module')
+def report():
+    """Seed once, exercise every endpoint once, and return the per-endpoint report"""
+    from sqlalchemy import event
+    from app import db
+
+    args = SimpleNamespace(**{name: int(os.environ.get(f'QUERY_BUDGET_{name.upper()}', default))
+                              for name, default in SCALE.items()})
+    time_factor = float(os.environ.get('QUERY_BUDGET_TIME_FACTOR', 1.0))
+    workdir = tempfile.mkdtemp()
+    try:
+        app = build_app(workdir)
+        with app.app_context():
+            seed(db, args)
+            budget = Budget(app, time_factor)
+            event.listen(db.engine, 'before_cursor_execute', budget.count)
+        # Keep full collections of the seeded heap, and of whatever earlier
+        # tests left behind, out of the timed requests
+        gc.collect()
+        gc.freeze()
+        exercise(budget, app, args)
+        with app.app_context():
+            event.remove(db.engine, 'before_cursor_execute', budget.count)
+            db.engine.dispose()
+    finally:
+        gc.unfreeze()
+        shutil.rmtree(workdir)
+    return budget.report
+
+@pytest.mark.parametrize('endpoint', sorted(BUDGETS))
+def test_endpoint_within_budget(report, endpoint):
+    assert endpoint in report, f'{endpoint} was not called'
+    entry = report[endpoint]
+    assert entry['status'] < 400
+    assert entry['statements'] <= entry['max_statements']
+    assert entry['ms'] <= entry['max_ms']
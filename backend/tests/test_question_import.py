@@ -0,0 +1,96 @@
+import io
+import json
+from conftest import create_exam
+
+HEADER = 'question_text,option_a,option_b,option_c,option_d,correct_answer,marks\n'
+
+def question(text, correct_answer='A', marks=1, **overrides):
+    return dict({'question_text': text, 'option_a': 'a', 'option_b': 'b', 'option_c': 'c', 'option_d': 'd',
+                 'correct_answer': correct_answer, 'marks': marks}, **overrides)
+
+def stored(app, exam_id):
+    """Question text, answer and marks of the exam's questions, and its total marks"""
+    from app import db
+    from models import Exam, Question
+
+    with app.app_context():
+        questions = [(q.question_text, q.correct_answer, q.marks)
+                     for q in Question.query.filter_by(exam_id=exam_id).order_by(Question.id)]
+        total_marks = db.session.get(Exam, exam_id).total_marks
+        db.session.remove()
+    return questions, total_marks
+
+def test_csv_upload_imports_valid_rows_and_reports_the_rest(app, admin):
+    exam_id = create_exam(admin, 'Import', 'A')
+    upload = HEADER + '\n'.join([
+        'Two plus two,3,4,5,6, b ,2',
+        'No marks,a,b,c,d,A,',
+        'Bad answer,a,b,c,d,E,1',
+        'Zero marks,a,b,c,d,A,0',
+        '"Comma, quoted",a,b,c,d,d,3',
+    ])
+    response = admin.post(f'/api/admin/exams/{exam_id}/questions/import', data={
+        'file': (io.BytesIO(upload.encode('utf-8-sig')), 'bank.csv')
+    }, content_type='multipart/form-data')
+
+    assert response.status_code == 201, response.get_json()
+    body = response.get_json()
+    assert (body['imported'], body['rejected']) == (2, 3)
+    assert body['errors'] == [
+        {'row': 2, 'error': 'marks required'},
+        {'row': 3, 'error': 'correct_answer must be A, B, C, or D'},
+        {'row': 4, 'error': 'marks must be a positive whole number'},
+    ]
+    # Valid rows commit even though others were rejected
+    assert stored(app, exam_id) == ([
+        ('Import question', 'A', 1), ('Two plus two', 'B', 2), ('Comma, quoted', 'D', 3)
+    ], 6)
+    assert body['exam']['total_marks'] == 6
+
+def test_json_rows_are_validated_one_by_one(app, admin):
+    exam_id = create_exam(admin, 'Import', 'A')
+    rows = [
+        question('Kept', marks=4),
+        'not an object',
+        question('Boolean marks', marks=True),
+        question('Numeric option', option_b=2),
+        question('Long option', option_c='x' * 501),
+        question('Kept too', correct_answer='c', marks='2'),
+    ]
+    response = admin.post(f'/api/admin/exams/{exam_id}/questions/import?sync_total_marks=false',
+                          data=json.dumps({'questions': rows}), content_type='application/json')
+
+    assert response.status_code == 201, response.get_json()
+    body = response.get_json()
+    assert (body['imported'], body['rejected']) == (2, 4)
+    assert body['errors'] == [
+        {'row': 2, 'error': 'must be an object'},
+        {'row': 3, 'error': 'marks must be a positive whole number'},
+        {'row': 4, 'error': 'option_b must be text'},
+        {'row': 5, 'error': 'option_c is longer than 500 characters'},
+    ]
+    assert stored(app, exam_id) == ([('Import question', 'A', 1), ('Kept', 'A', 4), ('Kept too', 'C', 2)], 1)
+
+def test_nothing_is_written_without_a_valid_row(app, admin):
+    exam_id = create_exam(admin, 'Import', 'A')
+    response = admin.post(f'/api/admin/exams/{exam_id}/questions/import',
+                          json=[question('Bad', correct_answer='Z'), question('', marks=1)])
+
+    assert response.status_code == 400
+    body = response.get_json()
+    assert (body['imported'], body['rejected']) == (0, 2)
+    assert [error['row'] for error in body['errors']] == [1, 2]
+    assert stored(app, exam_id) == ([('Import question', 'A', 1)], 1)
+
+def test_unreadable_documents_are_rejected(app, admin):
+    exam_id = create_exam(admin, 'Import', 'A')
+    url = f'/api/admin/exams/{exam_id}/questions/import'
+
+    response = admin.post(url, data='[{"question_text": ', content_type='application/json')
+    assert response.status_code == 400
+    assert response.get_json()['error'].startswith('Invalid JSON')
+
+    response = admin.post(url, json={'rows': []})
+    assert response.status_code == 400
+    assert admin.post(f'{url}?format=xml', json=[question('Kept')]).status_code == 400
+    assert stored(app, exam_id) == ([('Import question', 'A', 1)], 1)
@@ -0,0 +1,101 @@
+from conftest import PASSWORD
+
+def roster(*rows):
+    return 'username,email,password\n' + '\n'.join(','.join(row) for row in rows)
+
+def post(admin, text):
+    return admin.post('/api/admin/students/import', data=text, content_type='text/csv')
+
+def accounts(app):
+    """Username, email and role of every user, in insertion order"""
+    from app import db
+    from models import User
+
+    with app.app_context():
+        users = [(user.username, user.email, user.role) for user in User.query.order_by(User.id)]
+        db.session.remove()
+    return users
+
+def logs_in(app, email, password):
+    response = app.test_client().post('/api/auth/login', json={'email': email, 'password': password})
+    return response.status_code == 200
+
+def test_roster_creates_valid_rows_and_reports_the_rest(app, admin, student):
+    response = post(admin, roster(
+        ('alice', 'alice@example.com', 'alice-password'),
+        ('', 'nobody@example.com', ''),
+        ('carol', 'not-an-address', ''),
+        ('alice', 'alice2@example.com', ''),
+        ('alice2', 'alice@example.com', ''),
+        ('student2', 'student@example.com', ''),
+        ('student', 'fresh@example.com', ''),
+        ('bob', 'bob@example.com', ''),
+    ))
+
+    assert response.status_code == 201, response.get_json()
+    body = response.get_json()
+    assert (body['created'], body['rejected']) == (2, 6)
+    assert [(entry['row'], entry['username'], entry['status'], entry.get('error')) for entry in body['report']] == [
+        (1, 'alice', 'created', None),
+        (2, '', 'rejected', 'username and email are required'),
+        (3, 'carol', 'rejected', 'email is not a valid address'),
+        (4, 'alice', 'rejected', 'username appears earlier in the roster'),
+        (5, 'alice2', 'rejected', 'email appears earlier in the roster'),
+        (6, 'student2', 'rejected', 'Email already registered'),
+        (7, 'student', 'rejected', 'Username already taken'),
+        (8, 'bob', 'created', None),
+    ]
+    # Only rows without a password get one generated and reported
+    assert 'password' not in body['report'][0]
+    generated = body['report'][7]['password']
+
+    # Valid rows commit even though others were rejected
+    assert accounts(app) == [
+        ('admin', 'admin@example.com', 'admin'),
+        ('student', 'student@example.com', 'student'),
+        ('alice', 'alice@example.com', 'student'),
+        ('bob', 'bob@example.com', 'student'),
+    ]
+    assert logs_in(app, 'alice@example.com', 'alice-password')
+    assert logs_in(app, 'bob@example.com', generated)
+    assert logs_in(app, 'student@example.com', PASSWORD)
+
+def test_nothing_is_written_without_a_valid_row(app, admin, student):
+    response = post(admin, roster(
+        ('student', 'other@example.com', ''),
+        ('dave', 'dave', ''),
+    ))
+
+    assert response.status_code == 400
+    body = response.get_json()
+    assert (body['created'], body['rejected']) == (0, 2)
+    assert [entry['status'] for entry in body['report']] == ['rejected', 'rejected']
+    assert [user[0] for user in accounts(app)] == ['admin', 'student']
+
+    assert post(admin, 'username,email,password\n').status_code == 400
+    assert [user[0] for user in accounts(app)] == ['admin', 'student']
+
+def test_a_conflict_during_hashing_rolls_back_the_whole_roster(app, admin, monkeypatch):
+    from sqlalchemy import insert
+    from app import db
+    from models import User
+    from password_pool import password_hasher
+
+    hash_many = password_hasher.hash_many
+
+    def racing_registration(passwords, workers=None):
+        # Another request registers a listed email after the conflict checks
+        db.session.execute(insert(User), [{
+            'username': 'racer', 'email': 'erin@example.com', 'password_hash': 'x', 'role': 'student'
+        }])
+        db.session.commit()
+        return hash_many(passwords, workers)
+
+    monkeypatch.setattr(password_hasher, 'hash_many', racing_registration)
+    response = post(admin, roster(
+        ('dan', 'dan@example.com', ''),
+        ('erin', 'erin@example.com', ''),
+    ))
+
+    assert response.status_code == 409
+    assert [user[0] for user in accounts(app)] == ['admin', 'racer']
@@ -0,0 +1,15 @@
+from conftest import register, create_exam
+
+def test_app_inserts_after_seeding(app):
+    from scale_seed import seed_scale
+
+    with app.app_context():
+        counts = seed_scale(students=20, exams=3, questions=5, attempts=2)
+    assert counts['users'] == 21
+
+    # New rows get ids past the seeded ones
+    admin = register(app, 'late-admin', role='admin')
+    student = register(app, 'late-student')
+    exam_id = create_exam(admin, 'After seeding', 'AB')
+    assert exam_id > 3
+    assert student.post(f'/api/student/exams/{exam_id}/start').status_code == 201
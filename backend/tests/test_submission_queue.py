@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+import pytest
+from conftest import create_exam
+
+def start(student, exam_id):
+    return student.post(f'/api/student/exams/{exam_id}/start').get_json()['session']['id']
+
+@pytest.fixture
+def submitted(app):
+    from live_feed import live_feed
+
+    # Each test's database starts empty, so its exam has id 1
+    events = []
+    subscription = live_feed.subscribe(1, events.append)
+    yield events
+    subscription.close()
+
+def test_inline_submit_event(admin, student, submitted):
+    exam_id = create_exam(admin, 'Inline', 'A')
+    session_id = start(student, exam_id)
+    student.post(f'/api/student/sessions/{session_id}/submit', json={'answers': {}})
+
+    assert [(e['type'], e['username'], e['session_id']) for e in submitted if e['type'] == 'submitted'] == [
+        ('submitted', 'student', session_id)
+    ]
+
+def test_queued_submit_event_names_the_student(app, admin, student, submitted):
+    from submission_queue import submission_queue
+
+    exam_id = create_exam(admin, 'Queued', 'A')
+    session_id = start(student, exam_id)
+    # Queue submissions without starting the grading thread
+    submission_queue.interval = 3600
+    try:
+        response = student.post(f'/api/student/sessions/{session_id}/submit', json={'answers': {}})
+        assert response.status_code == 202
+        with app.app_context():
+            assert submission_queue.drain() == 1
+    finally:
+        submission_queue.interval = 0
+
+    event, = [e for e in submitted if e['type'] == 'submitted']
+    assert event['username'] == 'student'
+    assert event['session_id'] == session_id
+    assert event['auto_submitted'] is False
+
+def test_timed_out_event_names_the_student(app, admin, student, submitted):
+    from exam_timer import session_sweeper
+
+    exam_id = create_exam(admin, 'Timed out', 'A')
+    session_id = start(student, exam_id)
+    with app.app_context():
+        assert session_sweeper.sweep(datetime.utcnow() + timedelta(days=1)) == 1
+
+    event, = [e for e in submitted if e['type'] == 'submitted']
+    assert event['username'] == 'student'
+    assert event['session_id'] == session_id
+    assert event['auto_submitted'] is True
+    assert event['timed_out'] is True
+
+def result_and_session_times(app, session_id):
+    from models import ExamSession, Result
+
+    with app.app_context():
+        result = Result.query.filter_by(session_id=session_id).one()
+        return result.created_at, ExamSession.query.get(session_id).end_time
+
+def test_queued_result_is_dated_at_submission(app, admin, student):
+    from submission_queue import submission_queue
+
+    exam_id = create_exam(admin, 'Queued later', 'A')
+    session_id = start(student, exam_id)
+    submission_queue.interval = 3600
+    try:
+        student.post(f'/api/student/sessions/{session_id}/submit', json={'answers': {}})
+        with app.app_context():
+            # A backlog drained an hour later
+            submission_queue.drain(datetime.utcnow() + timedelta(hours=1))
+    finally:
+        submission_queue.interval = 0
+
+    created_at, end_time = result_and_session_times(app, session_id)
+    assert created_at == end_time
+
+def test_timed_out_result_is_dated_at_the_deadline(app, admin, student):
+    from exam_timer import session_sweeper
+
+    exam_id = create_exam(admin, 'Swept later', 'A')
+    session_id = start(student, exam_id)
+    with app.app_context():
+        session_sweeper.sweep(datetime.utcnow() + timedelta(days=1))
+
+    created_at, end_time = result_and_session_times(app, session_id)
+    assert created_at == end_time
+    assert created_at < datetime.utcnow() + timedelta(hours=2)
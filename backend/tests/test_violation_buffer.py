@@ -0,0 +1,63 @@
+from datetime import datetime
+import pytest
+from sqlalchemy import func, select, text
+
+@pytest.fixture
+def buffer(app):
+    from violation_buffer import ViolationBuffer
+
+    app.config.update(VIOLATION_FLUSH_INTERVAL=3600, VIOLATION_BUFFER_LIMIT=5, VIOLATION_FLUSH_RETRIES=2)
+    return ViolationBuffer(app)
+
+def rows(count, violation_type='tab_switch'):
+    return [{'session_id': 1, 'violation_type': violation_type, 'details': str(i), 'timestamp': datetime.utcnow()}
+            for i in range(count)]
+
+def stored(app):
+    from app import db
+    from models import Violation
+
+    with app.app_context():
+        return db.session.execute(select(func.count()).select_from(Violation)).scalar()
+
+def test_queue_is_bounded(buffer):
+    buffer.enqueue(rows(8))
+    assert [row['details'] for row in buffer._pending] == ['3', '4', '5', '6', '7']
+    assert buffer.dropped == 3
+
+def test_rejected_rows_are_dropped_and_the_rest_written(app, buffer):
+    buffer.enqueue(rows(2) + rows(1, violation_type=None) + rows(1))
+    assert buffer.flush() == 3
+    assert buffer.dropped == 1
+    assert buffer._pending == []
+    assert stored(app) == 3
+    assert buffer.stats() == {'pending': 0, 'flushed': 3, 'dropped': 1, 'limit': 5}
+
+def test_failed_flushes_are_retried_then_dropped(app, buffer):
+    from app import db
+
+    def rename(old, new):
+        with app.app_context():
+            db.session.execute(text(f'ALTER TABLE {old} RENAME TO {new}'))
+            db.session.commit()
+
+    buffer.enqueue(rows(2))
+    rename('violations', 'violations_offline')
+    try:
+        for _ in range(buffer.retries):
+            assert buffer.flush() == 0
+            assert len(buffer._pending) == 2
+        assert buffer.flush() == 0
+    finally:
+        rename('violations_offline', 'violations')
+    assert buffer._pending == []
+    assert buffer.dropped == 2
+
+    buffer.enqueue(rows(1))
+    assert buffer.flush() == 1
+    assert stored(app) == 1
+
+def test_cache_stats_reports_the_buffer(admin):
+    response = admin.get('/api/admin/cache-stats')
+    assert response.status_code == 200
+    assert set(response.get_json()['violations']) == {'pending', 'flushed', 'dropped', 'limit'}
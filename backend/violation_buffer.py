@@ -0,0 +1,220 @@
+import atexit
+import os
+import threading
+from datetime import datetime
+from sqlalchemy import func, insert, update
+from sqlalchemy.exc import DataError, IntegrityError
+from app import db
+from models import ExamSession, Violation
+
+def count_violations(session_id, student_id, count):
+    """UPDATE adding count to a student's started session, returning the new total and its exam"""
+    return (
+        update(ExamSession)
+        .where(
+            ExamSession.id == session_id,
+            ExamSession.student_id == student_id,
+            ExamSession.start_time.isnot(None)
+        )
+        .values(violation_count=func.coalesce(ExamSession.violation_count, 0) + count)
+        .returning(ExamSession.violation_count, ExamSession.exam_id)
+    )
+
+def violation_rows(session_id, events):
+    now = datetime.utcnow()
+    return [{
+        'session_id': session_id,
+        'violation_type': event['violation_type'],
+        'details': event.get('details', ''),
+        'timestamp': now
+    } for event in events]
+
+class ViolationBuffer:
+    """Write-behind buffer for proctoring violations.
+
+    The per-session ``violation_count`` is incremented synchronously with a
+    single atomic UPDATE so the auto-submit threshold stays exact across
+    workers. The detail rows are queued in process and group-committed for
+    all sessions on a short interval.
+
+    The queue holds at most VIOLATION_BUFFER_LIMIT rows; beyond that the
+    oldest are dropped. A batch the database rejects is retried row by row
+    so only the offending rows are dropped, and a batch that fails for any
+    other reason is requeued for up to VIOLATION_FLUSH_RETRIES flushes.
+    Dropped rows are logged; their counts are already committed. The
+    flushed and dropped counters are per worker, like the queue itself.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.flush_interval = 1.0
+        self.max_pending = 1000
+        self.limit = 100000
+        self.retries = 5
+        self.flushed = 0
+        self.dropped = 0
+        self._failures = 0
+        self._pending = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.flush_interval = float(app.config.get('VIOLATION_FLUSH_INTERVAL', 1.0))
+        self.max_pending = int(app.config.get('VIOLATION_MAX_PENDING', 1000))
+        self.limit = int(app.config.get('VIOLATION_BUFFER_LIMIT', 100000))
+        self.retries = int(app.config.get('VIOLATION_FLUSH_RETRIES', 5))
+        app.extensions['violation_buffer'] = self
+        atexit.register(self.flush)
+
+    @property
+    def write_through(self):
+        return self.flush_interval <= 0
+
+    def record(self, session_id, student_id, events):
+        """Count events against a session and queue their detail rows.
+
+        Returns the new violation count and the session's exam id, or None
+        if the session does not exist, does not belong to the student or
+        has not been started.
+        """
+        counted = db.session.execute(
+            count_violations(session_id, student_id, len(events))
+        ).one_or_none()
+        if counted is None:
+            db.session.rollback()
+            return None
+
+        rows = violation_rows(session_id, events)
+        if self.write_through:
+            db.session.execute(insert(Violation), rows)
+            db.session.commit()
+            return counted
+
+        db.session.commit()
+        self.enqueue(rows)
+        return counted
+
+    def enqueue(self, rows):
+        """Queue committed-count violation rows for the next group commit"""
+        with self._lock:
+            self._pending.extend(rows)
+            overflow = self._trim()
+            pending = len(self._pending)
+        if overflow:
+            self._log_overflow(overflow)
+        self._ensure_thread()
+        if pending >= self.max_pending:
+            self._wakeup.set()
+
+    def flush(self):
+        """Insert every queued violation row in one transaction; returns how many were written"""
+        with self._lock:
+            rows, self._pending = self._pending, []
+        if not rows or self.app is None:
+            return 0
+
+        with self.app.app_context():
+            try:
+                db.session.execute(insert(Violation), rows)
+                db.session.commit()
+            except (IntegrityError, DataError):
+                db.session.rollback()
+                return self._flush_each(rows)
+            except Exception:
+                db.session.rollback()
+                self._failed(rows)
+                return 0
+        self._flushed(len(rows))
+        return len(rows)
+
+    def _flush_each(self, rows):
+        # One transaction per row, to find the rows the database rejects
+        written = 0
+        for index, row in enumerate(rows):
+            try:
+                db.session.execute(insert(Violation), [row])
+                db.session.commit()
+                written += 1
+            except (IntegrityError, DataError):
+                db.session.rollback()
+                with self._lock:
+                    self.dropped += 1
+                self.app.logger.exception('Dropping a buffered violation the database rejects: %r', row)
+            except Exception:
+                db.session.rollback()
+                with self._lock:
+                    self.flushed += written
+                self._failed(rows[index:])
+                return written
+        self._flushed(written)
+        return written
+
+    def _flushed(self, count):
+        with self._lock:
+            self.flushed += count
+            self._failures = 0
+
+    def _failed(self, rows):
+        with self._lock:
+            self._failures += 1
+            give_up = self._failures > self.retries
+            if give_up:
+                self._failures = 0
+                self.dropped += len(rows)
+                overflow = 0
+            else:
+                self._pending[:0] = rows
+                overflow = self._trim()
+        if give_up:
+            self.app.logger.exception('Dropping %d buffered violations after %d failed flushes',
+                                      len(rows), self.retries + 1)
+            return
+        self.app.logger.exception('Failed to flush %d buffered violations', len(rows))
+        if overflow:
+            self._log_overflow(overflow)
+
+    def _trim(self):
+        # Called with the lock held; drops the oldest rows over the limit
+        overflow = len(self._pending) - self.limit
+        if overflow <= 0:
+            return 0
+        del self._pending[:overflow]
+        self.dropped += overflow
+        return overflow
+
+    def _log_overflow(self, count):
+        if self.app is not None:
+            self.app.logger.warning('Violation buffer full; dropped the %d oldest rows', count)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending': len(self._pending),
+                'flushed': self.flushed,
+                'dropped': self.dropped,
+                'limit': self.limit
+            }
+
+    def _ensure_thread(self):
+        # Threads do not survive a fork, so start one per worker process
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='violation-flush', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+violation_buffer = ViolationBuffer()
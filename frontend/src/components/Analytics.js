@@ -39,6 +39,21 @@ function Analytics() {
     }
   };
 
+  const loadMoreResults = async () => {
+    try {
+      const response = await adminAPI.getExamAnalytics(selectedExam, {
+        cursor: examAnalytics.next_cursor
+      });
+      setExamAnalytics({
+        ...examAnalytics,
+        results: [...examAnalytics.results, ...response.data.results],
+        next_cursor: response.data.next_cursor
+      });
+    } catch (error) {
+      console.error('Error fetching more results:', error);
+    }
+  };
+
   if (loading) {
     return (
       <div className="min-h-screen flex items-center justify-center">
@@ -194,6 +209,17 @@ function Analytics() {
                   </tbody>
                 </table>
               </div>
+              {examAnalytics.next_cursor && (
+                <div className="mt-4 flex justify-center">
+                  <button
+                    onClick={loadMoreResults}
+                    className="px-4 py-2 text-blue-600 hover:underline"
+                    data-testid="load-more-results"
+                  >
+                    Load more
+                  </button>
+                </div>
+              )}
             </div>
           )}
         </div>
@@ -3,11 +3,14 @@ import { useParams, useNavigate } from 'react-router-dom';
 import { studentAPI, violationsAPI } from '../services/api';
 import * as faceapi from 'face-api.js';
 
+// Polling for a queued result backs off from Retry-After up to this many seconds
+const RESULT_POLL_MAX_DELAY = 16;
+const RESULT_POLL_ATTEMPTS = 6;
+
 function TakeExam() {
   const { examId } = useParams();
   const navigate = useNavigate();
   const [exam, setExam] = useState(null);
-  const [session, setSession] = useState(null);
   const [questions, setQuestions] = useState([]);
   const [answers, setAnswers] = useState({});
   const [timeLeft, setTimeLeft] = useState(0);
@@ -17,10 +20,19 @@ function TakeExam() {
   const [showWarning, setShowWarning] = useState(false);
   const [warningMessage, setWarningMessage] = useState('');
   const [submitting, setSubmitting] = useState(false);
+  const [gradingPending, setGradingPending] = useState(false);
   
   const videoRef = useRef(null);
   const detectionIntervalRef = useRef(null);
   const timerIntervalRef = useRef(null);
+  const sessionRef = useRef(null);
+  const violationQueueRef = useRef([]);
+  const violationFlushRef = useRef(null);
+  const dirtyAnswersRef = useRef({});
+  const autosaveRef = useRef(null);
+  const answersRef = useRef({});
+  const heartbeatRef = useRef(null);
+  const submittingRef = useRef(false);
 
   useEffect(() => {
     startExam();
@@ -31,7 +43,19 @@ function TakeExam() {
     document.addEventListener('visibilitychange', handleVisibilityChange);
     document.addEventListener('fullscreenchange', handleFullscreenChange);
     
+    // Send queued violations in batches
+    violationFlushRef.current = setInterval(flushViolations, 2000);
+    
+    // Autosave changed answers
+    autosaveRef.current = setInterval(saveAnswers, 5000);
+    
+    // Resync the timer with the server's deadline
+    heartbeatRef.current = setInterval(syncTimer, 30000);
+    
     return () => {
+      clearInterval(violationFlushRef.current);
+      clearInterval(autosaveRef.current);
+      clearInterval(heartbeatRef.current);
       stopFaceDetection();
       stopTimer();
       document.removeEventListener('visibilitychange', handleVisibilityChange);
@@ -43,9 +67,13 @@ function TakeExam() {
     try {
       const response = await studentAPI.startExam(examId);
       setExam(response.data.exam);
-      setSession(response.data.session);
+      sessionRef.current = response.data.session;
       setQuestions(response.data.questions);
-      setTimeLeft(response.data.exam.duration * 60); // Convert to seconds
+      setAnswers(response.data.answers || {});
+      answersRef.current = response.data.answers || {};
+      // A resumed session keeps its original deadline
+      const deadline = response.data.session.deadline;
+      setTimeLeft(deadline ? secondsUntil(deadline) : response.data.exam.duration * 60);
       setLoading(false);
       startTimer();
     } catch (error) {
@@ -133,6 +161,30 @@ function TakeExam() {
     }
   };
 
+  const secondsUntil = (deadline) => {
+    // Deadlines are UTC timestamps without a zone suffix
+    return Math.max(0, Math.round((Date.parse(deadline + 'Z') - Date.now()) / 1000));
+  };
+
+  const syncTimer = async () => {
+    const currentSession = sessionRef.current;
+    if (!currentSession || submittingRef.current) return;
+    
+    try {
+      const response = await studentAPI.heartbeat(currentSession.id);
+      setTimeLeft(response.data.remaining_seconds);
+      
+      // Closed by the server (deadline sweep): collect the result instead of submitting
+      if (response.data.is_completed) {
+        handleSubmit(true, true);
+      } else if (response.data.remaining_seconds <= 0) {
+        handleSubmit(true);
+      }
+    } catch (error) {
+      console.error('Error syncing timer:', error);
+    }
+  };
+
   const handleVisibilityChange = () => {
     if (document.hidden) {
       logViolation('tab_switch', 'Tab switched or minimized');
@@ -156,25 +208,34 @@ function TakeExam() {
     }
   };
 
-  const logViolation = async (type, details) => {
-    if (!session) return;
+  const logViolation = (type, details) => {
+    violationQueueRef.current.push({ violation_type: type, details: details });
+  };
+
+  const flushViolations = async () => {
+    const currentSession = sessionRef.current;
+    const queued = violationQueueRef.current;
+    if (!currentSession || queued.length === 0) return;
+    violationQueueRef.current = [];
     
     try {
-      const response = await violationsAPI.logViolation({
-        session_id: session.id,
-        violation_type: type,
-        details: details
+      const response = await violationsAPI.logViolations({
+        session_id: currentSession.id,
+        violations: queued
       });
       
       const newViolationCount = response.data.violation_count;
       setViolations(newViolationCount);
       
       if (response.data.should_submit) {
+        clearInterval(violationFlushRef.current);
         alert('⚠️ Maximum violations reached (5). Exam will be auto-submitted.');
         handleSubmit(true);
       }
     } catch (error) {
-      console.error('Error logging violation:', error);
+      console.error('Error logging violations:', error);
+      // Keep the events for the next flush
+      violationQueueRef.current = queued.concat(violationQueueRef.current);
     }
   };
 
@@ -189,35 +250,86 @@ function TakeExam() {
       ...answers,
       [questionId]: answer
     });
+    answersRef.current = { ...answersRef.current, [questionId]: answer };
+    dirtyAnswersRef.current[questionId] = answer;
+  };
+
+  const saveAnswers = async () => {
+    const currentSession = sessionRef.current;
+    const changed = dirtyAnswersRef.current;
+    if (!currentSession || Object.keys(changed).length === 0) return;
+    dirtyAnswersRef.current = {};
+    
+    try {
+      await studentAPI.saveAnswers(currentSession.id, { answers: changed });
+    } catch (error) {
+      console.error('Error saving answers:', error);
+      // Retry on the next autosave, keeping any newer changes
+      dirtyAnswersRef.current = { ...changed, ...dirtyAnswersRef.current };
+    }
   };
 
-  const handleSubmit = async (autoSubmit = false) => {
-    if (submitting) return;
+  const handleSubmit = async (autoSubmit = false, closed = false) => {
+    // Timers call this from the first render, so read refs rather than state
+    const currentSession = sessionRef.current;
+    if (submittingRef.current || !currentSession) return;
     
     if (!autoSubmit && !window.confirm('Are you sure you want to submit the exam?')) {
       return;
     }
     
+    submittingRef.current = true;
     setSubmitting(true);
+    clearInterval(autosaveRef.current);
+    clearInterval(heartbeatRef.current);
     stopTimer();
     stopFaceDetection();
     
     try {
-      const response = await studentAPI.submitExam(session.id, { answers });
+      let response = closed
+        ? await studentAPI.getSessionResult(currentSession.id)
+        : await studentAPI.submitExam(currentSession.id, { answers: answersRef.current });
+      
+      // Queued for grading
+      if (response.status === 202) {
+        response = await pollResult(currentSession.id, response);
+      }
       
       // Exit fullscreen
       if (document.exitFullscreen) {
         document.exitFullscreen();
       }
       
+      if (!response) {
+        setGradingPending(true);
+        return;
+      }
+      
       alert(`Exam submitted successfully! Score: ${response.data.result.marks_obtained}/${response.data.result.total_marks}`);
       navigate('/student');
     } catch (error) {
       alert('Error submitting exam: ' + (error.response?.data?.error || 'Unknown error'));
+      submittingRef.current = false;
       setSubmitting(false);
     }
   };
 
+  const pollResult = async (sessionId, response) => {
+    // The answers are stored: keep polling with backoff, then leave the result for later
+    let delay = Number(response.headers['retry-after']) || 1;
+    for (let attempt = 0; attempt < RESULT_POLL_ATTEMPTS; attempt++) {
+      await new Promise((resolve) => setTimeout(resolve, delay * 1000));
+      try {
+        const polled = await studentAPI.getSessionResult(sessionId);
+        if (polled.status !== 202) return polled;
+      } catch (error) {
+        console.error('Error fetching result:', error);
+      }
+      delay = Math.min(delay * 2, RESULT_POLL_MAX_DELAY);
+    }
+    return null;
+  };
+
   const formatTime = (seconds) => {
     const mins = Math.floor(seconds / 60);
     const secs = seconds % 60;
@@ -232,6 +344,25 @@ function TakeExam() {
     );
   }
 
+  if (gradingPending) {
+    return (
+      <div className="min-h-screen flex items-center justify-center bg-gray-900">
+        <div className="bg-gray-800 rounded-lg p-8 max-w-md text-center text-white" data-testid="grading-pending">
+          <h2 className="text-2xl font-bold mb-4">Exam submitted</h2>
+          <p className="text-gray-400 mb-6">
+            Your answers are saved and grading is still in progress. Check My Results later for your score.
+          </p>
+          <button
+            onClick={() => navigate('/student')}
+            className="px-6 py-3 bg-green-600 hover:bg-green-700 text-white rounded-lg font-bold transition"
+          >
+            Back to Dashboard
+          </button>
+        </div>
+      </div>
+    );
+  }
+
   return (
     <div className="min-h-screen bg-gray-900 text-white p-4" data-testid="exam-interface">
       {/* Warning Popup */}
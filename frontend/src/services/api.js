@@ -32,7 +32,7 @@ export const adminAPI = {
   updateQuestion: (id, data) => api.put(`/admin/questions/${id}`, data),
   deleteQuestion: (id) => api.delete(`/admin/questions/${id}`),
   getAnalytics: () => api.get('/admin/analytics'),
-  getExamAnalytics: (examId) => api.get(`/admin/exams/${examId}/analytics`),
+  getExamAnalytics: (examId, params) => api.get(`/admin/exams/${examId}/analytics`, { params }),
 };
 
 // Student API
@@ -40,6 +40,9 @@ export const studentAPI = {
   getExams: () => api.get('/student/exams'),
   startExam: (examId) => api.post(`/student/exams/${examId}/start`),
   submitExam: (sessionId, data) => api.post(`/student/sessions/${sessionId}/submit`, data),
+  getSessionResult: (sessionId) => api.get(`/student/sessions/${sessionId}/result`),
+  saveAnswers: (sessionId, data) => api.patch(`/student/sessions/${sessionId}/answers`, data),
+  heartbeat: (sessionId) => api.post(`/student/sessions/${sessionId}/heartbeat`),
   getResults: () => api.get('/student/results'),
   getResultDetail: (resultId) => api.get(`/student/results/${resultId}`),
 };
@@ -47,12 +50,13 @@ export const studentAPI = {
 // Violations API
 export const violationsAPI = {
   logViolation: (data) => api.post('/violations', data),
+  logViolations: (data) => api.post('/violations/batch', data),
   getSessionViolations: (sessionId) => api.get(`/violations/session/${sessionId}`),
 };
 
 // Results API
 export const resultsAPI = {
-  getAllResults: () => api.get('/results'),
+  getAllResults: (params) => api.get('/results', { params }),
   getResult: (id) => api.get(`/results/${id}`),
 };
 